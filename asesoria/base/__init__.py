@@ -1,14 +1,33 @@
 from flask import Flask, render_template
 from datetime import datetime
-from base.controllers import citas, usuarios
+from functools import lru_cache
+from base.controllers import api, citas, usuarios
+from base.config import (assets, cache_consultas, cache_fragmentos, compresion, instrumentacion, migraciones,
+                         mysqlconnection)
+from base.config.seguridad import configurar_bcrypt, hilos_por_defecto
+from base.models.tutor_model import DirectorioTutores
+from base.models.busqueda_model import IndicePlanes
+from base.models.backfill_model import backfill_travel_plans
+from base.models.travel_plan_model import reconciliar_participantes
 
 
 # importar controllers
 
 
 #definir un filtro de jinja2 para formatear fechas
+# Los modelos entregan date/datetime nativos y los filtros guardan el texto ya formateado por fecha:
+# en una lista de planes se repiten pocas fechas distintas
+_DIRECTIVAS_HORA = ('%H', '%I', '%M', '%S', '%p', '%f', '%X', '%c', '%z', '%Z')
+
 def format_date(value, format='%Y-%m-%d'):
     """Convierte una cadena de fecha en un objeto datetime y lo formatea."""
+    # Si el formato no muestra la hora, todas las horas de un mismo día comparten resultado
+    if isinstance(value, datetime) and not any(d in format for d in _DIRECTIVAS_HORA):
+        value = value.date()
+    return _format_date(value, format)
+
+@lru_cache(maxsize=4096)
+def _format_date(value, format='%Y-%m-%d'):
     if isinstance(value, str):
         try:
             value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
@@ -23,7 +42,12 @@ def format_travel_date(value):
     """Formatea fechas específicamente para el travel dashboard"""
     if not value:
         return 'N/A'
-    
+    if isinstance(value, datetime):
+        value = value.date()
+    return _format_travel_date(value)
+
+@lru_cache(maxsize=4096)
+def _format_travel_date(value):
     # Si es string en formato YYYY-MM-DD
     if isinstance(value, str):
         try:
@@ -32,23 +56,109 @@ def format_travel_date(value):
         except ValueError:
             return value
     
-    # Si es un objeto datetime
+    # Si es un objeto date o datetime
     if hasattr(value, 'strftime'):
         return value.strftime('%b %d %Y')
     
     return str(value)
 
 
-def create_app():
+def create_app(config=None):
     app = Flask (__name__)
     app.config.from_mapping(
         SECRET_KEY='dev',
         DEBUG=True,
+        # Motor de base de datos: 'mysql' o 'sqlite' (un archivo por base de datos en SQLITE_DIR,
+        # por defecto la carpeta instance/ de la aplicación; el esquema se crea al abrirlo la primera vez)
+        DB_BACKEND='mysql',
+        SQLITE_DIR=None,
+        # Pool de conexiones a MySQL
+        DB_POOL_MAX=10,
+        DB_POOL_TIMEOUT=5.0,
+        DB_POOL_MAX_LIFETIME=1800.0,
+        DB_POOL_PING_IDLE=30.0,
+        DB_UNIDAD_DE_TRABAJO=True,
+        # Consultas de lectura independientes en paralelo
+        DB_CONSULTAS_CONCURRENTES=True,
+        DB_HILOS_CONSULTAS=4,
+        # Caché de resultados de las consultas marcadas con cachear=True, invalidada por tabla al escribir.
+        # Almacén 'memoria' (uno por proceso) o 'sqlite' (archivo QUERY_CACHE_PATH compartido por los workers,
+        # por defecto instance/cache_consultas.sqlite3; la carpeta tiene que ser privada de la aplicación)
+        QUERY_CACHE_ENABLED=False,
+        QUERY_CACHE_BACKEND='memoria',
+        QUERY_CACHE_PATH=None,
+        QUERY_CACHE_MAX_BYTES=16 * 1024 * 1024,
+        QUERY_CACHE_TTL=60,
+        # Instrumentación de consultas
+        SLOW_QUERY_MS=200,
+        SQL_LOG_SAMPLE_RATE=0.0,
+        # Acceso a /metrics: redes permitidas (p. ej. ['127.0.0.1', '10.0.0.0/8']) y/o token para
+        # 'Authorization: Bearer <token>'. Sin ninguno de los dos, /metrics responde 403 a todos
+        METRICS_ALLOWED_IPS=(),
+        METRICS_TOKEN=None,
+        # Segundos entre comprobaciones de la versión del usuario guardado en la sesión
+        USUARIO_SNAPSHOT_TTL=300,
+        # Segundos entre recargas del directorio de tutores (para ver cambios de otros procesos)
+        TUTORES_REFRESH_SEGUNDOS=60,
+        # Segundos entre reconstrucciones del índice de búsqueda de planes (/citas/buscar)
+        BUSQUEDA_REFRESH_SEGUNDOS=300,
+        # Hilos de cada proceso del servidor WSGI (p. ej. gunicorn --threads)
+        WSGI_HILOS=8,
+        # bcrypt: costo y tope de hashes simultáneos por proceso (None: la mitad de WSGI_HILOS, sin pasar
+        # de los núcleos), y segundos que un login espera turno antes de pedir que se intente de nuevo
+        BCRYPT_ROUNDS=12,
+        BCRYPT_HILOS=None,
+        BCRYPT_TIEMPO_ESPERA=5.0,
+        # Caché de fragmentos de plantillas ({% cache %}) y de bytecode de Jinja (por defecto en instance/jinja;
+        # la carpeta debe ser del usuario de la aplicación y sin escritura para otros)
+        FRAGMENT_CACHE_MAX_BYTES=8 * 1024 * 1024,
+        FRAGMENT_CACHE_TTL=300,
+        JINJA_BYTECODE_CACHE_DIR=None,
+        # Cambiarlo al desplegar plantillas nuevas invalida todos los ETag
+        ETAG_VERSION='1',
+        # Compresión gzip/br de las respuestas HTML y JSON
+        COMPRESS_ENABLED=True,
+        COMPRESS_MIN_SIZE=500,
+        COMPRESS_GZIP_LEVEL=6,
+        COMPRESS_BROTLI_QUALITY=5,
+        COMPRESS_FLUSH_BYTES=4096,
     )
+    # Valores propios del despliegue (p. ej. create_app({'DB_BACKEND': 'sqlite'}))
+    app.config.update(config or {})
+
+    mysqlconnection.configurar_backend(app.config['DB_BACKEND'],
+                                       carpeta_sqlite=app.config['SQLITE_DIR'] or app.instance_path)
+    mysqlconnection.configurar_pool(max_conexiones=app.config['DB_POOL_MAX'],
+                                    tiempo_espera=app.config['DB_POOL_TIMEOUT'],
+                                    vida_maxima=app.config['DB_POOL_MAX_LIFETIME'],
+                                    ping_inactiva=app.config['DB_POOL_PING_IDLE'])
+    # Una conexión por petición y una transacción para todas sus escrituras
+    mysqlconnection.init_app(app)
+    mysqlconnection.configurar_concurrencia(activa=app.config['DB_CONSULTAS_CONCURRENTES'],
+                                            hilos=app.config['DB_HILOS_CONSULTAS'])
+    cache_consultas.init_app(app)
+    # Métricas por sentencia y por endpoint, expuestas en /metrics
+    instrumentacion.init_app(app)
+    DirectorioTutores.intervalo = app.config['TUTORES_REFRESH_SEGUNDOS']
+    IndicePlanes.intervalo = app.config['BUSQUEDA_REFRESH_SEGUNDOS']
+    configurar_bcrypt(rounds=app.config['BCRYPT_ROUNDS'],
+                      hilos=app.config['BCRYPT_HILOS'] or hilos_por_defecto(app.config['WSGI_HILOS']),
+                      tiempo_espera=app.config['BCRYPT_TIEMPO_ESPERA'])
+    cache_fragmentos.init_app(app)
+    # CSS versionado y precomprimido (flask build-assets) servido desde /assets
+    assets.init_app(app)
+    # Comprime las respuestas según Accept-Encoding, también las que se envían en streaming
+    compresion.init_app(app)
 
     # Registrar los Blueprints
     app.register_blueprint(usuarios.bp)
     app.register_blueprint(citas.bp)
+    app.register_blueprint(api.bp)
+
+    # Comandos de consola (flask --app server <comando>)
+    app.cli.add_command(migraciones.migrar)
+    app.cli.add_command(backfill_travel_plans)
+    app.cli.add_command(reconciliar_participantes)
 
     # Registrar los filtros de fecha en la aplicacion
     app.add_template_filter(format_date, 'format_date')
@@ -0,0 +1,130 @@
+# Pipeline de archivos estáticos
+# 'flask build-assets' une y minifica el CSS local, genera nombres con el hash del contenido
+# (app.3f2a9c1b0d.css) y variantes precomprimidas (.gz y, si está instalado brotli, .br).
+# Las plantillas usan asset_url('app.css'); los archivos se sirven desde /assets con
+# Cache-Control: immutable porque su nombre cambia cuando cambia el contenido.
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import click
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se generan las variantes .gz
+    brotli = None
+
+# Paquetes: nombre público -> archivos de base/static que lo forman, en orden
+BUNDLES = {
+    'app.css': ['style.css'],
+    'citas_simple.css': ['css/citas_simple.css'],
+    'descripcion_viaje.css': ['css/descripcion_viaje.css'],
+    'editar_cita.css': ['css/editar_cita.css'],
+}
+
+DIRECTORIO_SALIDA = 'dist'
+MANIFIESTO = 'manifest.json'
+UN_ANIO = 365 * 24 * 60 * 60
+
+bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+# Nombre público -> nombre con hash, leído de dist/manifest.json
+_manifiesto = {}
+
+_RE_COMENTARIOS = re.compile(r'/\*.*?\*/', re.S)
+_RE_ESPACIOS = re.compile(r'\s+')
+_RE_ALREDEDOR = re.compile(r'\s*([{};:,>])\s*')
+
+
+def minificar_css(css):
+    """Minificador sencillo: quita comentarios y espacios sobrantes."""
+    css = _RE_COMENTARIOS.sub('', css)
+    css = _RE_ESPACIOS.sub(' ', css)
+    css = _RE_ALREDEDOR.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def construir(directorio_static):
+    """Genera los paquetes en static/dist y devuelve el manifiesto."""
+    salida = os.path.join(directorio_static, DIRECTORIO_SALIDA)
+    os.makedirs(salida, exist_ok=True)
+    manifiesto = {}
+    for nombre, fuentes in BUNDLES.items():
+        partes = []
+        for fuente in fuentes:
+            with open(os.path.join(directorio_static, fuente), encoding='utf-8') as archivo:
+                partes.append(minificar_css(archivo.read()))
+        contenido = '\n'.join(partes).encode('utf-8')
+        base, extension = os.path.splitext(nombre)
+        nombre_hash = f"{base}.{hashlib.sha256(contenido).hexdigest()[:10]}{extension}"
+        ruta = os.path.join(salida, nombre_hash)
+        with open(ruta, 'wb') as archivo:
+            archivo.write(contenido)
+        # mtime=0 para que el .gz sea idéntico en cada build
+        with open(ruta + '.gz', 'wb') as archivo:
+            archivo.write(gzip.compress(contenido, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(ruta + '.br', 'wb') as archivo:
+                archivo.write(brotli.compress(contenido, quality=11))
+        manifiesto[nombre] = nombre_hash
+    with open(os.path.join(salida, MANIFIESTO), 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, indent=2, sort_keys=True)
+    return manifiesto
+
+
+def cargar_manifiesto(directorio_static):
+    ruta = os.path.join(directorio_static, DIRECTORIO_SALIDA, MANIFIESTO)
+    _manifiesto.clear()
+    if os.path.exists(ruta):
+        with open(ruta, encoding='utf-8') as archivo:
+            _manifiesto.update(json.load(archivo))
+
+
+def asset_url(nombre):
+    """Como url_for('static', ...), pero devuelve la versión con hash si se ejecutó el build."""
+    nombre_hash = _manifiesto.get(nombre)
+    if nombre_hash:
+        return url_for('assets.servir', filename=nombre_hash)
+    # Sin build (desarrollo): se sirve el archivo original
+    return url_for('static', filename=BUNDLES[nombre][0])
+
+
+@bp.route('/<path:filename>')
+def servir(filename):
+    """Sirve un archivo de static/dist, usando la variante precomprimida que acepte el navegador."""
+    directorio = os.path.join(current_app.static_folder, DIRECTORIO_SALIDA)
+    variante, codificacion = filename, None
+    for extension, nombre_codificacion in (('.br', 'br'), ('.gz', 'gzip')):
+        if (nombre_codificacion in request.accept_encodings
+                and os.path.isfile(os.path.join(directorio, filename + extension))):
+            variante, codificacion = filename + extension, nombre_codificacion
+            break
+    respuesta = send_from_directory(directorio, variante, max_age=UN_ANIO,
+                                    mimetype=mimetypes.guess_type(filename)[0])
+    if codificacion:
+        respuesta.headers['Content-Encoding'] = codificacion
+    respuesta.vary.add('Accept-Encoding')
+    respuesta.headers['Cache-Control'] = f'public, max-age={UN_ANIO}, immutable'
+    return respuesta
+
+
+@click.command('build-assets')
+def build_assets():
+    """Une, minifica y versiona el CSS en base/static/dist."""
+    manifiesto = construir(current_app.static_folder)
+    _manifiesto.clear()
+    _manifiesto.update(manifiesto)
+    for nombre, nombre_hash in sorted(manifiesto.items()):
+        click.echo(f"{nombre} -> {DIRECTORIO_SALIDA}/{nombre_hash}")
+
+
+def init_app(app):
+    """Registra /assets, el helper asset_url para las plantillas y el comando build-assets."""
+    cargar_manifiesto(app.static_folder)
+    app.register_blueprint(bp)
+    app.add_template_global(asset_url, 'asset_url')
+    app.cli.add_command(build_assets)
@@ -0,0 +1,527 @@
+# base/config/cache_consultas.py
+
+# Caché de resultados de consultas de lectura
+# Solo se cachean los SELECT que lo piden (query_db(query, data, cachear=True)) y solo si está activada
+# (QUERY_CACHE_ENABLED). La clave es la base de datos, el SQL normalizado y los parámetros; cada entrada
+# se etiqueta con las tablas que lee, y cualquier INSERT/UPDATE/DELETE que pase por query_db o query_many
+# borra las entradas de las tablas que escribe (y de las que dependen de ellas por ON DELETE CASCADE).
+#
+# Hay dos almacenes:
+#   - 'memoria': LRU por proceso, acotado por memoria y tiempo de vida. Con varios workers, lo que
+#     escribe uno no lo ven los demás hasta que caduca la entrada (QUERY_CACHE_TTL).
+#   - 'sqlite': un archivo local compartido por todos los workers del servidor; la invalidación de uno
+#     vale para todos. El archivo va en una carpeta privada de la aplicación (por defecto
+#     instance/cache_consultas.sqlite3), nunca en una compartida como /tmp: lo que contiene se sirve
+#     como resultado de las consultas.
+
+import base64
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as hora, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from base.config.seguridad import carpeta_privada, comprobar_privada
+
+# Configuración (se sobrescribe desde app.config en init_app)
+CONFIG = {
+    'activa': False,
+    'ttl': 60.0,    # Segundos de vida de una entrada
+}
+
+# Tablas cuyas filas se borran solas al borrar las de otra (ver ON DELETE CASCADE en migraciones/)
+CASCADAS = {
+    'usuarios': ('travel_plans', 'trip_schedules', 'citas', 'favoritos'),
+    'travel_plans': ('trip_schedules',),
+    'citas': ('favoritos',),
+}
+
+_RE_LECTURA = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)", re.I)
+_RE_ESCRITURA = re.compile(r"^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE(?:\s+IGNORE)?|DELETE\s+FROM"
+                           r"|ALTER\s+TABLE|TRUNCATE(?:\s+TABLE)?|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+`?(\w+)", re.I)
+_RE_BORRA = re.compile(r"^\s*(?:REPLACE|DELETE|TRUNCATE|DROP)\b", re.I)
+_RE_UPDATE_JOIN = re.compile(r"^\s*UPDATE\b(.*?)\bSET\b", re.I | re.S)
+# Funciones cuyo resultado cambia sin que cambie ninguna tabla: esas consultas no se cachean
+_RE_VOLATIL = re.compile(r"\b(?:NOW|CURDATE|CURTIME|CURRENT_DATE|CURRENT_TIME|CURRENT_TIMESTAMP|SYSDATE|"
+                         r"UTC_TIMESTAMP|RAND|RANDOM|UUID|LAST_INSERT_ID|FOUND_ROWS|CONNECTION_ID)\b", re.I)
+
+
+@lru_cache(maxsize=1024)
+def normalizar(query):
+    """SQL sin espacios repetidos ni ';' final (los literales entre comillas no se tocan)."""
+    if "'" in query or '"' in query:
+        return query.strip().rstrip(';').strip()
+    return ' '.join(query.split()).rstrip(';').strip()
+
+
+@lru_cache(maxsize=1024)
+def tablas_leidas(query):
+    """Tablas que lee un SELECT, o None si no se puede cachear (sin tablas o con funciones volátiles)."""
+    if _RE_VOLATIL.search(query):
+        return None
+    tablas = frozenset(t.lower() for t in _RE_LECTURA.findall(query))
+    return tablas or None
+
+
+@lru_cache(maxsize=1024)
+def tablas_escritas(query):
+    """Tablas que puede cambiar una sentencia, o None si no se sabe (se invalida toda la base de datos)."""
+    coincidencia = _RE_ESCRITURA.match(query)
+    if coincidencia is None:
+        return None
+    tablas = {coincidencia[1].lower()}
+    # UPDATE a JOIN b ... SET: el SET puede cambiar cualquiera de las tablas del JOIN
+    if (update := _RE_UPDATE_JOIN.match(query)) is not None:
+        tablas.update(t.lower() for t in re.findall(r"\bJOIN\s+`?(\w+)", update[1], re.I))
+    if _RE_BORRA.match(query):
+        for tabla in list(tablas):
+            tablas.update(CASCADAS.get(tabla, ()))
+    return frozenset(tablas)
+
+
+def _congelar(valor):
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _congelar(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    if isinstance(valor, (set, frozenset)):
+        return tuple(sorted(_congelar(v) for v in valor))
+    return valor
+
+
+# Todas las entradas llevan también la etiqueta de su base de datos y la global: invalidar una de
+# esas borra todas las de la base de datos o todas las de la caché
+TODAS = '*'
+
+
+def _etiquetas_tablas(db, tablas):
+    return tuple(sorted(f"{db}.{tabla}" for tabla in tablas))
+
+
+def _etiquetas(db, tablas):
+    return (TODAS, db) + _etiquetas_tablas(db, tablas)
+
+
+def _tamano(filas):
+    """Bytes aproximados de un resultado (la lista, cada fila y sus valores)."""
+    total = sys.getsizeof(filas)
+    for fila in filas:
+        total += sys.getsizeof(fila) + sum(sys.getsizeof(v) for v in fila.values())
+    return total
+
+
+# Tipos que devuelve PyMySQL y JSON no tiene: se guardan como {"$": tipo, "v": texto}
+_A_TEXTO = (
+    ('datetime', datetime, datetime.isoformat, datetime.fromisoformat),
+    ('date', date, date.isoformat, date.fromisoformat),
+    ('time', hora, hora.isoformat, hora.fromisoformat),
+    ('timedelta', timedelta, lambda v: repr(v.total_seconds()), lambda v: timedelta(seconds=float(v))),
+    ('decimal', Decimal, str, Decimal),
+    ('bytes', bytes, lambda v: base64.b64encode(v).decode('ascii'), base64.b64decode),
+)
+_DE_TEXTO = {nombre: convertir for nombre, _, _, convertir in _A_TEXTO}
+
+
+def _etiquetar(valor):
+    # datetime antes que date: es una subclase
+    for nombre, tipo, a_texto, _ in _A_TEXTO:
+        if isinstance(valor, tipo):
+            return {'$': nombre, 'v': a_texto(valor)}
+    raise TypeError(f"No se puede guardar en la caché un {type(valor).__name__}")
+
+
+def _desetiquetar(objeto):
+    if len(objeto) == 2 and '$' in objeto and 'v' in objeto:
+        return _DE_TEXTO[objeto['$']](objeto['v'])
+    return objeto
+
+
+def a_json(filas):
+    """Filas a bytes JSON, conservando fechas, Decimal y bytes."""
+    return json.dumps(filas, default=_etiquetar, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def de_json(valor):
+    """Filas guardadas con a_json()."""
+    return json.loads(valor, object_hook=_desetiquetar)
+
+
+def archivo_privado(ruta):
+    """Crea el archivo con permisos 0o600 (y su carpeta con 0o700) o comprueba que el que hay sea privado."""
+    carpeta_privada(os.path.dirname(os.path.abspath(ruta)))
+    try:
+        os.close(os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+    except FileExistsError:
+        pass
+    comprobar_privada(ruta)
+    return ruta
+
+
+class AlmacenMemoria:
+    """LRU del proceso acotado por memoria (bytes aproximados) y por tiempo de vida, con índice por tabla."""
+    nombre = 'memoria'
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._datos = OrderedDict()
+        self._por_etiqueta = {}
+        # Cuántas veces se invalidó cada etiqueta: una lectura que empezó antes de una invalidación
+        # no guarda su resultado (podría ser anterior a la escritura)
+        self._generaciones = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def version(self, etiquetas):
+        with self._lock:
+            return tuple(self._generaciones.get(e, 0) for e in etiquetas)
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or time.monotonic() > entrada[1]:
+                if entrada is not None:
+                    self._quitar(clave)
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            # Copia de las filas: quien las recibe puede modificarlas
+            return [dict(fila) for fila in entrada[0]]
+
+    def guardar(self, clave, filas, etiquetas, version, ttl):
+        filas = [dict(fila) for fila in filas]
+        tamano = _tamano(filas)
+        if tamano > self.max_bytes:
+            return
+        with self._lock:
+            if tuple(self._generaciones.get(e, 0) for e in etiquetas) != version:
+                return
+            if clave in self._datos:
+                self._quitar(clave)
+            self._datos[clave] = (filas, time.monotonic() + ttl, tamano, etiquetas)
+            for etiqueta in etiquetas:
+                self._por_etiqueta.setdefault(etiqueta, set()).add(clave)
+            self._bytes += tamano
+            # Expulsamos las menos usadas hasta entrar en el límite de memoria
+            while self._bytes > self.max_bytes:
+                self._quitar(next(iter(self._datos)))
+
+    def _quitar(self, clave):
+        _, _, tamano, etiquetas = self._datos.pop(clave)
+        self._bytes -= tamano
+        for etiqueta in etiquetas:
+            claves = self._por_etiqueta.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_etiqueta[etiqueta]
+
+    def invalidar(self, etiquetas):
+        with self._lock:
+            self.invalidaciones += 1
+            for etiqueta in etiquetas:
+                self._generaciones[etiqueta] = self._generaciones.get(etiqueta, 0) + 1
+                for clave in list(self._por_etiqueta.get(etiqueta, ())):
+                    self._quitar(clave)
+
+    def cerrar(self):
+        pass
+
+    def stats(self):
+        with self._lock:
+            return {'almacen': self.nombre, 'entradas': len(self._datos), 'bytes': self._bytes,
+                    'aciertos': self.aciertos, 'fallos': self.fallos, 'invalidaciones': self.invalidaciones}
+
+
+class AlmacenSQLite:
+    """
+    Caché en un archivo SQLite local que comparten todos los procesos del servidor. Las filas se guardan
+    en JSON; el archivo y su carpeta tienen que ser de la aplicación y nadie más puede escribirlos
+    (PermissionError si no).
+    """
+    nombre = 'sqlite'
+
+    # PRAGMA user_version del archivo: con otra versión (la 0 guardaba pickle) se descartan las tablas
+    VERSION_ESQUEMA = 2
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS entradas (
+          clave TEXT PRIMARY KEY,
+          valor BLOB NOT NULL,
+          expira REAL NOT NULL,
+          usada REAL NOT NULL,
+          bytes INTEGER NOT NULL);
+        CREATE INDEX IF NOT EXISTS idx_entradas_usada ON entradas (usada);
+        CREATE TABLE IF NOT EXISTS etiquetas (
+          etiqueta TEXT NOT NULL,
+          clave TEXT NOT NULL,
+          PRIMARY KEY (etiqueta, clave)) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_etiquetas_clave ON etiquetas (clave);
+        CREATE TABLE IF NOT EXISTS generaciones (
+          etiqueta TEXT PRIMARY KEY,
+          n INTEGER NOT NULL) WITHOUT ROWID;
+    """
+
+    def __init__(self, ruta, max_bytes=16 * 1024 * 1024, tiempo_espera=2.0):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.tiempo_espera = tiempo_espera
+        self._local = threading.local()
+        self._conexiones = []
+        self._lock = threading.Lock()
+        # Estadísticas de este proceso
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        archivo_privado(ruta)
+        self._crear_esquema(self._conexion())
+
+    def _conexion(self):
+        # Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=self.tiempo_espera, isolation_level=None,
+                                       check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode = WAL")
+            conexion.execute("PRAGMA synchronous = NORMAL")
+            self._local.conexion = conexion
+            with self._lock:
+                self._conexiones.append(conexion)
+        return conexion
+
+    def _crear_esquema(self, conexion):
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            if conexion.execute("PRAGMA user_version").fetchone()[0] != self.VERSION_ESQUEMA:
+                for tabla in ('entradas', 'etiquetas', 'generaciones'):
+                    conexion.execute(f"DROP TABLE IF EXISTS {tabla}")
+                for sentencia in self.ESQUEMA.split(';'):
+                    if sentencia.strip():
+                        conexion.execute(sentencia)
+                conexion.execute(f"PRAGMA user_version = {self.VERSION_ESQUEMA}")
+            conexion.execute("COMMIT")
+        except Exception:
+            conexion.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _clave(clave):
+        return hashlib.sha1(repr(clave).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _generaciones(conexion, etiquetas):
+        marcas = ','.join('?' * len(etiquetas))
+        filas = dict(conexion.execute(f"SELECT etiqueta, n FROM generaciones WHERE etiqueta IN ({marcas})",
+                                      etiquetas).fetchall())
+        return tuple(filas.get(e, 0) for e in etiquetas)
+
+    def version(self, etiquetas):
+        return self._generaciones(self._conexion(), etiquetas)
+
+    def obtener(self, clave):
+        clave = self._clave(clave)
+        ahora = time.time()
+        conexion = self._conexion()
+        fila = conexion.execute("SELECT valor, expira, usada FROM entradas WHERE clave = ?", (clave,)).fetchone()
+        if fila is None or ahora > fila[1]:
+            self.fallos += 1
+            return None
+        # La marca de uso (para expulsar las menos usadas) se actualiza como mucho una vez por segundo
+        if ahora - fila[2] > 1.0:
+            try:
+                conexion.execute("UPDATE entradas SET usada = ? WHERE clave = ?", (ahora, clave))
+            except sqlite3.OperationalError:
+                pass
+        self.aciertos += 1
+        return de_json(fila[0])
+
+    def guardar(self, clave, filas, etiquetas, version, ttl):
+        valor = a_json(filas)
+        if len(valor) > self.max_bytes:
+            return
+        clave = self._clave(clave)
+        ahora = time.time()
+        conexion = self._conexion()
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            # Otro proceso tiene el archivo ocupado: no vale la pena esperar para cachear
+            return
+        try:
+            if self._generaciones(conexion, etiquetas) != version:
+                conexion.execute("ROLLBACK")
+                return
+            conexion.execute("INSERT OR REPLACE INTO entradas (clave, valor, expira, usada, bytes) "
+                             "VALUES (?, ?, ?, ?, ?)", (clave, valor, ahora + ttl, ahora, len(valor)))
+            conexion.execute("DELETE FROM etiquetas WHERE clave = ?", (clave,))
+            conexion.executemany("INSERT INTO etiquetas (etiqueta, clave) VALUES (?, ?)",
+                                 [(etiqueta, clave) for etiqueta in etiquetas])
+            self._recortar(conexion, ahora)
+            conexion.execute("COMMIT")
+        except Exception:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def _recortar(self, conexion, ahora):
+        """Borra las caducadas y, si aún se pasa del límite, las menos usadas."""
+        total = conexion.execute("SELECT COALESCE(SUM(bytes), 0) FROM entradas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        sobrantes = [clave for clave, in conexion.execute("SELECT clave FROM entradas WHERE expira < ?", (ahora,))]
+        for clave, tamano in conexion.execute("SELECT clave, bytes FROM entradas WHERE expira >= ? "
+                                              "ORDER BY usada", (ahora,)).fetchall():
+            if total <= self.max_bytes:
+                break
+            sobrantes.append(clave)
+            total -= tamano
+        self._borrar(conexion, sobrantes)
+
+    @staticmethod
+    def _borrar(conexion, claves):
+        for i in range(0, len(claves), 500):
+            lote = claves[i:i + 500]
+            marcas = ','.join('?' * len(lote))
+            conexion.execute(f"DELETE FROM entradas WHERE clave IN ({marcas})", lote)
+            conexion.execute(f"DELETE FROM etiquetas WHERE clave IN ({marcas})", lote)
+
+    def invalidar(self, etiquetas):
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            conexion.executemany("INSERT INTO generaciones (etiqueta, n) VALUES (?, 1) "
+                                 "ON CONFLICT (etiqueta) DO UPDATE SET n = n + 1", [(e,) for e in etiquetas])
+            marcas = ','.join('?' * len(etiquetas))
+            claves = [clave for clave, in conexion.execute(f"SELECT DISTINCT clave FROM etiquetas "
+                                                          f"WHERE etiqueta IN ({marcas})", etiquetas)]
+            self._borrar(conexion, claves)
+            conexion.execute("COMMIT")
+        except Exception:
+            conexion.execute("ROLLBACK")
+            raise
+        self.invalidaciones += 1
+
+    def cerrar(self):
+        with self._lock:
+            conexiones, self._conexiones = self._conexiones, []
+        for conexion in conexiones:
+            conexion.close()
+        self._local = threading.local()
+
+    def stats(self):
+        fila = self._conexion().execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entradas").fetchone()
+        return {'almacen': self.nombre, 'entradas': fila[0], 'bytes': fila[1],
+                'aciertos': self.aciertos, 'fallos': self.fallos, 'invalidaciones': self.invalidaciones}
+
+
+ALMACENES = {'memoria': AlmacenMemoria, 'sqlite': AlmacenSQLite}
+
+# Almacén del proceso
+almacen = AlmacenMemoria()
+
+
+class Lectura:
+    """Un SELECT cacheable: su clave, sus etiquetas y la versión de las tablas antes de ejecutarlo."""
+    __slots__ = ('clave', 'etiquetas', 'version')
+
+    def __init__(self, clave, etiquetas, version):
+        self.clave = clave
+        self.etiquetas = etiquetas
+        self.version = version
+
+
+def preparar(db, query, data):
+    """La Lectura de una consulta, o None si no se puede cachear. Se llama antes de ejecutarla."""
+    tablas = tablas_leidas(query)
+    if tablas is None:
+        return None
+    try:
+        clave = (db, normalizar(query), _congelar(data))
+        hash(clave)
+    except TypeError:
+        return None
+    etiquetas = _etiquetas(db, tablas)
+    return Lectura(clave, etiquetas, almacen.version(etiquetas))
+
+
+def obtener(lectura):
+    """Filas guardadas para la lectura, o None."""
+    try:
+        return almacen.obtener(lectura.clave)
+    except Exception as e:
+        print("Something went wrong", e)
+        return None
+
+
+def guardar(lectura, filas):
+    """Guarda el resultado si ninguna de sus tablas se invalidó desde preparar()."""
+    try:
+        almacen.guardar(lectura.clave, filas, lectura.etiquetas, lectura.version, CONFIG['ttl'])
+    except Exception as e:
+        print("Something went wrong", e)
+
+
+def invalidar_escritura(db, query):
+    """Borra las entradas de las tablas que escribe la sentencia (todas las de la base de datos si no se sabe)."""
+    try:
+        tablas = tablas_escritas(query)
+        if tablas is None:
+            almacen.invalidar((db,))
+        else:
+            almacen.invalidar(_etiquetas_tablas(db, tablas))
+    except Exception as e:
+        # Si no se pudo invalidar se vacía todo: es preferible a servir datos viejos
+        print("Something went wrong", e)
+        limpiar()
+
+
+def invalidar_tablas(db, tablas):
+    """Borra las entradas que leen alguna de las tablas (p. ej. tras cambios hechos fuera de query_db)."""
+    almacen.invalidar(_etiquetas_tablas(db, tablas))
+
+
+def limpiar():
+    """Vacía la caché (p. ej. tras volver a crear una base de datos)."""
+    try:
+        almacen.invalidar((TODAS,))
+    except Exception as e:
+        print("Something went wrong", e)
+
+
+def configurar(activa=False, almacen_nombre='memoria', ttl=60.0, max_bytes=16 * 1024 * 1024, ruta=None):
+    """Activa la caché y elige su almacén (p. ej. desde app.config). El almacén 'sqlite' necesita la ruta."""
+    global almacen
+    if almacen_nombre not in ALMACENES:
+        raise ValueError(f"Almacén de caché de consultas desconocido: {almacen_nombre!r} "
+                         f"(opciones: {', '.join(ALMACENES)})")
+    if almacen_nombre == 'sqlite' and not ruta:
+        raise ValueError("El almacén 'sqlite' de la caché de consultas necesita la ruta del archivo")
+    CONFIG.update(activa=activa, ttl=ttl)
+    anterior = almacen
+    if almacen_nombre == 'sqlite':
+        almacen = AlmacenSQLite(ruta, max_bytes=max_bytes)
+    else:
+        almacen = AlmacenMemoria(max_bytes=max_bytes)
+    anterior.cerrar()
+
+
+def init_app(app):
+    """Lee la configuración de la caché de consultas."""
+    almacen_nombre = app.config.get('QUERY_CACHE_BACKEND', 'memoria')
+    ruta = app.config.get('QUERY_CACHE_PATH')
+    if almacen_nombre == 'sqlite' and not ruta:
+        os.makedirs(app.instance_path, mode=0o700, exist_ok=True)
+        ruta = os.path.join(app.instance_path, 'cache_consultas.sqlite3')
+    configurar(activa=app.config.get('QUERY_CACHE_ENABLED', False),
+               almacen_nombre=almacen_nombre,
+               ttl=app.config.get('QUERY_CACHE_TTL', CONFIG['ttl']),
+               max_bytes=app.config.get('QUERY_CACHE_MAX_BYTES', 16 * 1024 * 1024),
+               ruta=ruta)
@@ -0,0 +1,134 @@
+# Caché de fragmentos de plantillas Jinja
+# Guarda el HTML ya renderizado de bloques como las tarjetas de planes para no volver a renderizarlos
+# en cada vista. Uso en plantillas:
+#
+#   {% cache 'plan', asesoria.id, 'feed', asesoria.actualizado_en %} ... {% endcache %}
+#
+# Los dos primeros valores identifican al objeto (sirven para invalidar con invalidar('plan', id));
+# el resto completan la clave: cualquier cosa de la que dependa el HTML debe ir en ella.
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from base.config.seguridad import carpeta_privada
+
+
+class CacheFragmentos:
+    """LRU acotado por memoria (bytes aproximados) y por tiempo de vida, con índice por objeto."""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, ttl=300.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._por_objeto = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or time.monotonic() > entrada[1]:
+                if entrada is not None:
+                    self._quitar(clave)
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, clave, html):
+        tamano = sys.getsizeof(html)
+        if tamano > self.max_bytes:
+            return
+        with self._lock:
+            if clave in self._datos:
+                self._quitar(clave)
+            self._datos[clave] = (html, time.monotonic() + self.ttl, tamano)
+            self._por_objeto.setdefault(clave[:2], set()).add(clave)
+            self._bytes += tamano
+            # Expulsamos los menos usados hasta entrar en el límite de memoria
+            while self._bytes > self.max_bytes:
+                self._quitar(next(iter(self._datos)))
+
+    def _quitar(self, clave):
+        _, _, tamano = self._datos.pop(clave)
+        self._bytes -= tamano
+        claves = self._por_objeto.get(clave[:2])
+        if claves is not None:
+            claves.discard(clave)
+            if not claves:
+                del self._por_objeto[clave[:2]]
+
+    def invalidar(self, tipo, objeto_id):
+        """Elimina todos los fragmentos de un objeto (p. ej. invalidar('plan', 5))."""
+        with self._lock:
+            for clave in list(self._por_objeto.get((tipo, objeto_id), ())):
+                self._quitar(clave)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._por_objeto.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entradas': len(self._datos), 'bytes': self._bytes,
+                    'aciertos': self.aciertos, 'fallos': self.fallos}
+
+
+# Caché compartida por todo el proceso
+fragmentos = CacheFragmentos()
+
+
+def invalidar(tipo, objeto_id):
+    fragmentos.invalidar(tipo, objeto_id)
+
+
+class FragmentCacheExtension(Extension):
+    """Etiqueta {% cache ... %}{% endcache %} para Jinja."""
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        # El nombre de la plantilla también forma parte de la clave
+        args.insert(0, nodes.Const(parser.name))
+        return nodes.CallBlock(self.call_method('_renderizar', [nodes.List(args)]),
+                               [], [], body).set_lineno(lineno)
+
+    def _renderizar(self, args, caller):
+        nombre_plantilla, *valores = args
+        # Los dos primeros valores (tipo, id) van al principio para poder invalidar por objeto
+        clave = tuple(valores[:2]) + (nombre_plantilla,) + tuple(valores[2:])
+        html = fragmentos.obtener(clave)
+        if html is None:
+            html = str(caller())
+            fragmentos.guardar(clave, html)
+        return Markup(html)
+
+
+def init_app(app):
+    """Activa la etiqueta {% cache %} y la caché de bytecode de las plantillas."""
+    fragmentos.max_bytes = app.config.get('FRAGMENT_CACHE_MAX_BYTES', fragmentos.max_bytes)
+    fragmentos.ttl = app.config.get('FRAGMENT_CACHE_TTL', fragmentos.ttl)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+
+    # Las plantillas compiladas se guardan en disco: al arrancar otro worker no se vuelven a compilar.
+    # El bytecode se ejecuta al cargarlo: la carpeta (por defecto instance/jinja) debe ser privada de la
+    # aplicación, nunca una compartida como /tmp donde otro usuario podría dejar archivos
+    directorio = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if not directorio:
+        os.makedirs(app.instance_path, mode=0o700, exist_ok=True)
+        directorio = os.path.join(app.instance_path, 'jinja')
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(carpeta_privada(directorio))
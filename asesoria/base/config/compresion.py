@@ -0,0 +1,162 @@
+# Compresión de respuestas (gzip y, si está instalado brotli, br)
+# Middleware WSGI: elige la codificación según Accept-Encoding y comprime mientras la respuesta
+# sale, así que también funciona con stream_template: cada bloque grande se envía comprimido
+# sin esperar a que termine de renderizarse la página.
+
+import zlib
+from werkzeug.http import parse_accept_header
+from werkzeug.wsgi import ClosingIterator
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
+
+# Configuración (se sobrescribe desde app.config en init_app)
+COMPRESION = {
+    'activa': True,
+    'tamano_minimo': 500,       # Bytes; las respuestas más pequeñas (con Content-Length) no se comprimen
+    'nivel_gzip': 6,            # 1-9
+    'calidad_brotli': 5,        # 0-11; los niveles altos son para los archivos precomprimidos de /assets
+    'bytes_por_envio': 4096,    # En respuestas en streaming, bytes sin comprimir acumulados antes de enviar
+}
+
+TIPOS_COMPRIMIBLES = ('text/', 'application/json', 'application/x-ndjson', 'application/javascript', 'image/svg+xml')
+
+
+class _Gzip:
+    def __init__(self, nivel):
+        # wbits=31: formato gzip (cabecera y CRC), no zlib crudo
+        self._comp = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def comprimir(self, datos):
+        return self._comp.compress(datos)
+
+    def vaciar(self):
+        return self._comp.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminar(self):
+        return self._comp.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, calidad):
+        self._comp = brotli.Compressor(quality=calidad)
+
+    def comprimir(self, datos):
+        return self._comp.process(datos)
+
+    def vaciar(self):
+        return self._comp.flush()
+
+    def terminar(self):
+        return self._comp.finish()
+
+
+def negociar(accept_encoding):
+    """Codificación preferida por el cliente entre las que soportamos, o None."""
+    if not accept_encoding:
+        return None
+    disponibles = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return parse_accept_header(accept_encoding).best_match(disponibles)
+
+
+def _comprimible(status, headers):
+    if not status.startswith('200'):
+        return False
+    tipo = contenido = None
+    for nombre, valor in headers:
+        nombre = nombre.lower()
+        if nombre == 'content-encoding':
+            # Ya viene comprimida (p. ej. los .gz de /assets)
+            return False
+        if nombre == 'cache-control' and 'no-transform' in valor.lower():
+            return False
+        if nombre == 'content-type':
+            tipo = valor.lower()
+        elif nombre == 'content-length':
+            contenido = valor
+    if tipo is None or not tipo.startswith(TIPOS_COMPRIMIBLES):
+        return False
+    # Sin Content-Length es una respuesta en streaming: no sabemos su tamaño y se comprime
+    return contenido is None or int(contenido) >= COMPRESION['tamano_minimo']
+
+
+def _ajustar_headers(headers, codificacion):
+    nuevos = []
+    vary = []
+    for nombre, valor in headers:
+        clave = nombre.lower()
+        if clave == 'content-length':
+            continue
+        if clave == 'vary':
+            vary.append(valor)
+            continue
+        if clave == 'etag' and not valor.startswith('W/'):
+            # El cuerpo ya no es byte a byte el mismo: el validador pasa a ser débil
+            valor = 'W/' + valor
+        nuevos.append((nombre, valor))
+    if not any('accept-encoding' in v.lower() for v in vary):
+        vary.append('Accept-Encoding')
+    nuevos.append(('Vary', ', '.join(vary)))
+    nuevos.append(('Content-Encoding', codificacion))
+    return nuevos
+
+
+class CompresionMiddleware:
+    """Envuelve app.wsgi_app y comprime las respuestas de texto."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        codificacion = negociar(environ.get('HTTP_ACCEPT_ENCODING'))
+        if not COMPRESION['activa'] or codificacion is None or environ['REQUEST_METHOD'] == 'HEAD':
+            return self.app(environ, start_response)
+
+        respuesta = {}
+
+        def capturar_start_response(status, headers, exc_info=None):
+            respuesta.update(status=status, headers=headers, exc_info=exc_info)
+            # El cuerpo se escribe con el iterable que devolvemos, nunca con write()
+            return lambda datos: None
+
+        cuerpo = self.app(environ, capturar_start_response)
+        status, headers = respuesta['status'], respuesta['headers']
+        if not _comprimible(status, headers):
+            start_response(status, headers, respuesta['exc_info'])
+            return cuerpo
+
+        en_streaming = not any(nombre.lower() == 'content-length' for nombre, _ in headers)
+        start_response(status, _ajustar_headers(headers, codificacion), respuesta['exc_info'])
+        compresor = _Brotli(COMPRESION['calidad_brotli']) if codificacion == 'br' else _Gzip(COMPRESION['nivel_gzip'])
+        # Al cerrar se cierra también el iterable original (stream_with_context libera ahí el contexto)
+        cerrar = getattr(cuerpo, 'close', None)
+        return ClosingIterator(self._comprimir(cuerpo, compresor, en_streaming), [cerrar] if cerrar else None)
+
+    @staticmethod
+    def _comprimir(cuerpo, compresor, en_streaming):
+        pendientes = 0
+        for bloque in cuerpo:
+            if not bloque:
+                continue
+            datos = compresor.comprimir(bloque)
+            pendientes += len(bloque)
+            # stream_template produce muchos trozos pequeños: se agrupan antes de enviar
+            # para no perder compresión, pero sin esperar al final de la página
+            if en_streaming and pendientes >= COMPRESION['bytes_por_envio']:
+                datos += compresor.vaciar()
+                pendientes = 0
+            if datos:
+                yield datos
+        yield compresor.terminar()
+
+
+def init_app(app):
+    """Lee la configuración y envuelve la aplicación WSGI con el middleware."""
+    COMPRESION['activa'] = app.config.get('COMPRESS_ENABLED', COMPRESION['activa'])
+    COMPRESION['tamano_minimo'] = app.config.get('COMPRESS_MIN_SIZE', COMPRESION['tamano_minimo'])
+    COMPRESION['nivel_gzip'] = app.config.get('COMPRESS_GZIP_LEVEL', COMPRESION['nivel_gzip'])
+    COMPRESION['calidad_brotli'] = app.config.get('COMPRESS_BROTLI_QUALITY', COMPRESION['calidad_brotli'])
+    COMPRESION['bytes_por_envio'] = app.config.get('COMPRESS_FLUSH_BYTES', COMPRESION['bytes_por_envio'])
+    app.wsgi_app = CompresionMiddleware(app.wsgi_app)
@@ -0,0 +1,54 @@
+# Exportación en streaming (CSV y NDJSON)
+# Convierten un iterable de filas en bloques de texto que se envían con Response(stream_with_context(...)).
+# Solo se mantiene en memoria el bloque actual, así que el consumo no depende del tamaño de la exportación.
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+TIPOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def a_json(valor):
+    """default= de json.dumps para los tipos que devuelve PyMySQL."""
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, timedelta):
+        return valor.total_seconds()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"No se puede serializar {type(valor).__name__}")
+
+
+def csv_en_bloques(filas, columnas, filas_por_bloque=200):
+    """Genera el CSV (cabecera incluida) en bloques de 'filas_por_bloque' filas."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    pendientes = 0
+    for fila in filas:
+        escritor.writerow([fila.get(columna) for columna in columnas])
+        pendientes += 1
+        if pendientes >= filas_por_bloque:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pendientes = 0
+    yield buffer.getvalue()
+
+
+def ndjson_en_bloques(objetos, objetos_por_bloque=200):
+    """Genera un objeto JSON por línea, agrupando 'objetos_por_bloque' líneas por bloque."""
+    lineas = []
+    for objeto in objetos:
+        lineas.append(json.dumps(objeto, default=a_json, ensure_ascii=False, separators=(',', ':')))
+        if len(lineas) >= objetos_por_bloque:
+            yield '\n'.join(lineas) + '\n'
+            lineas = []
+    if lineas:
+        yield '\n'.join(lineas) + '\n'
@@ -0,0 +1,40 @@
+# Caché HTTP con validadores (ETag)
+# Las vistas decoradas con @condicional calculan primero una versión barata de lo que van a mostrar;
+# si coincide con el If-None-Match del navegador se responde 304 sin ejecutar las consultas pesadas
+# ni renderizar la plantilla.
+
+from functools import wraps
+from hashlib import sha1
+from flask import current_app, make_response, request, session
+
+
+def condicional(calcular_version):
+    """
+    Decorador de vistas GET. calcular_version recibe los mismos argumentos que la vista y devuelve
+    un texto que cambia cuando cambia la página, o None para atender la petición sin validador.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            # Con mensajes flash pendientes la página los mostraría: no se puede responder 304
+            if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                return vista(*args, **kwargs)
+            version = calcular_version(*args, **kwargs)
+            if version is None:
+                return vista(*args, **kwargs)
+
+            etag = sha1(f"{current_app.config.get('ETAG_VERSION', '1')}:{version}".encode()).hexdigest()
+            # Comparación débil: el middleware de compresión marca el ETag como W/ al comprimir
+            if request.if_none_match.contains_weak(etag):
+                respuesta = make_response('', 304)
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+            respuesta.set_etag(etag)
+            # La página depende del usuario: solo la guarda el navegador y siempre la revalida
+            respuesta.headers['Cache-Control'] = 'private, no-cache'
+            respuesta.vary.add('Cookie')
+            return respuesta
+        return envoltura
+    return decorador
@@ -0,0 +1,235 @@
+# Instrumentación de consultas SQL y de peticiones
+# Mide la latencia de cada sentencia, cuántas consultas y cuánto tiempo de base de datos
+# gasta cada endpoint, registra las consultas lentas y lo expone en /metrics (formato Prometheus).
+# /metrics muestra el SQL de todas las sentencias y el estado del pool: solo responde a las redes de
+# METRICS_ALLOWED_IPS o con el token de METRICS_TOKEN (Authorization: Bearer ...); sin ninguno, a nadie
+
+import hmac
+import ipaddress
+import logging
+import random
+import re
+import threading
+from functools import lru_cache
+from flask import Response, g, has_request_context, request
+
+logger = logging.getLogger('asesoria.sql')
+
+# Configuración (se sobrescribe desde app.config en init_app)
+CONFIG = {
+    'umbral_lenta_ms': 200.0,   # Las consultas que tardan más se registran como lentas
+    'muestreo_log': 0.0,        # Fracción de consultas que se imprimen con mogrify (0 = desactivado)
+    'max_sentencias': 500,      # Máximo de sentencias distintas con histograma propio
+    'token': None,              # Token de acceso a /metrics
+    'redes': (),                # Redes (ip_network) que pueden leer /metrics sin token
+}
+
+# Límites de los buckets de los histogramas, en segundos
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_RE_CADENA = re.compile(r"'(?:[^'\\]|\\.)*'")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PARAMETRO = re.compile(r"%\([^)]+\)s|%s")
+_RE_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalizar_sql(query):
+    """Quita literales, parámetros y espacios para agrupar sentencias equivalentes."""
+    sql = _RE_CADENA.sub('?', query)
+    sql = _RE_PARAMETRO.sub('?', sql)
+    sql = _RE_NUMERO.sub('?', sql)
+    sql = _RE_LISTA.sub('(?+)', sql)
+    return _RE_ESPACIOS.sub(' ', sql).strip().rstrip(';').strip()
+
+
+class Histograma:
+    """Histograma acumulativo de latencias, compatible con el formato de Prometheus."""
+    __slots__ = ('cuentas', 'suma', 'total')
+
+    def __init__(self):
+        self.cuentas = [0] * len(BUCKETS)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, segundos):
+        self.suma += segundos
+        self.total += 1
+        for i, limite in enumerate(BUCKETS):
+            if segundos <= limite:
+                self.cuentas[i] += 1
+                break
+
+
+class _Registro:
+    """Métricas acumuladas del proceso, protegidas por un lock."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sentencias = {}
+        self.lentas = 0
+        self.endpoints = {}
+        # Ejecuciones y segundos de cada sentencia registrada (base/config/sentencias.py), por nombre
+        self.ejecuciones = {}
+
+    def observar_sentencia(self, sql, segundos, nombre=None):
+        with self.lock:
+            if nombre is not None:
+                datos = self.ejecuciones.setdefault(nombre, [0, 0.0])
+                datos[0] += 1
+                datos[1] += segundos
+            histograma = self.sentencias.get(sql)
+            if histograma is None:
+                if len(self.sentencias) >= CONFIG['max_sentencias']:
+                    sql = 'otras'
+                histograma = self.sentencias.setdefault(sql, Histograma())
+            histograma.observar(segundos)
+            if segundos * 1000 >= CONFIG['umbral_lenta_ms']:
+                self.lentas += 1
+
+    def observar_peticion(self, endpoint, consultas, segundos_db):
+        with self.lock:
+            datos = self.endpoints.setdefault(endpoint, [0, 0, 0.0])
+            datos[0] += 1
+            datos[1] += consultas
+            datos[2] += segundos_db
+
+
+registro = _Registro()
+
+
+def debe_imprimir():
+    """Decide si esta consulta se imprime con mogrify, según la tasa de muestreo."""
+    tasa = CONFIG['muestreo_log']
+    return tasa > 0 and (tasa >= 1 or random.random() < tasa)
+
+
+def registrar_consulta(query, segundos):
+    """Registra una sentencia ejecutada: histograma, contadores de la petición y log de lentas."""
+    # Las sentencias registradas ya traen su SQL normalizado y cuentan sus ejecuciones por nombre
+    sql = getattr(query, 'normalizada', None) or normalizar_sql(query)
+    registro.observar_sentencia(sql, segundos, getattr(query, 'nombre', None))
+    if has_request_context():
+        g._db_consultas = g.get('_db_consultas', 0) + 1
+        g._db_segundos = g.get('_db_segundos', 0.0) + segundos
+    if segundos * 1000 >= CONFIG['umbral_lenta_ms']:
+        logger.warning("Consulta lenta (%.1f ms): %s", segundos * 1000, sql)
+
+
+def ejecuciones_por_sentencia():
+    """{nombre: (ejecuciones, segundos)} de todas las sentencias registradas, también las no usadas."""
+    # Importación local: sentencias usa normalizar_sql de este módulo
+    from base.config.sentencias import REGISTRO
+    with registro.lock:
+        datos = {nombre: tuple(valores) for nombre, valores in registro.ejecuciones.items()}
+    return {nombre: datos.get(nombre, (0, 0.0)) for nombre in sorted(REGISTRO)}
+
+
+def sentencias_ejecutadas():
+    """Sentencias ejecutadas por el proceso: una por cursor.execute (las respuestas de la caché no cuentan)."""
+    with registro.lock:
+        return sum(histograma.total for histograma in registro.sentencias.values())
+
+
+def _al_terminar_peticion(error=None):
+    endpoint = request.endpoint or 'desconocido'
+    registro.observar_peticion(endpoint, g.get('_db_consultas', 0), g.get('_db_segundos', 0.0))
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_prometheus():
+    # Importación local para evitar el ciclo con mysqlconnection
+    from base.config import cache_consultas
+    from base.config.mysqlconnection import pool_stats
+
+    lineas = []
+    with registro.lock:
+        lineas.append('# HELP asesoria_db_query_seconds Latencia de las sentencias SQL por sentencia normalizada.')
+        lineas.append('# TYPE asesoria_db_query_seconds histogram')
+        for sql, h in registro.sentencias.items():
+            etiqueta = _escapar(sql)
+            acumulado = 0
+            for limite, cuenta in zip(BUCKETS, h.cuentas):
+                acumulado += cuenta
+                lineas.append(f'asesoria_db_query_seconds_bucket{{sql="{etiqueta}",le="{limite}"}} {acumulado}')
+            lineas.append(f'asesoria_db_query_seconds_bucket{{sql="{etiqueta}",le="+Inf"}} {h.total}')
+            lineas.append(f'asesoria_db_query_seconds_sum{{sql="{etiqueta}"}} {h.suma}')
+            lineas.append(f'asesoria_db_query_seconds_count{{sql="{etiqueta}"}} {h.total}')
+
+        lineas.append('# HELP asesoria_db_slow_queries_total Sentencias por encima del umbral de consulta lenta.')
+        lineas.append('# TYPE asesoria_db_slow_queries_total counter')
+        lineas.append(f'asesoria_db_slow_queries_total {registro.lentas}')
+
+        contadores = (
+            ('asesoria_http_requests_total', 'Peticiones atendidas por endpoint.', 0),
+            ('asesoria_http_db_queries_total', 'Consultas SQL ejecutadas por endpoint.', 1),
+            ('asesoria_http_db_seconds_total', 'Tiempo de base de datos por endpoint.', 2),
+        )
+        for nombre, ayuda, indice in contadores:
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} counter')
+            for endpoint, datos in registro.endpoints.items():
+                lineas.append(f'{nombre}{{endpoint="{_escapar(endpoint)}"}} {datos[indice]}')
+
+    lineas.append('# HELP asesoria_db_statement_executions_total Ejecuciones de cada sentencia registrada.')
+    lineas.append('# TYPE asesoria_db_statement_executions_total counter')
+    por_sentencia = ejecuciones_por_sentencia()
+    for nombre, (ejecuciones, _) in por_sentencia.items():
+        lineas.append(f'asesoria_db_statement_executions_total{{sentencia="{_escapar(nombre)}"}} {ejecuciones}')
+    lineas.append('# TYPE asesoria_db_statement_seconds_total counter')
+    for nombre, (_, segundos) in por_sentencia.items():
+        lineas.append(f'asesoria_db_statement_seconds_total{{sentencia="{_escapar(nombre)}"}} {segundos}')
+
+    estadisticas = pool_stats()
+    for clave, tipo in (('en_uso', 'gauge'), ('libres', 'gauge'), ('esperas', 'counter'),
+                        ('tiempo_espera_total', 'counter'), ('agotados', 'counter')):
+        nombre = f'asesoria_db_pool_{clave}'
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        for stats in estadisticas:
+            lineas.append(f'{nombre}{{db="{_escapar(stats["db"])}"}} {stats[clave]}')
+
+    if cache_consultas.CONFIG['activa']:
+        stats = cache_consultas.almacen.stats()
+        for clave, tipo in (('aciertos', 'counter'), ('fallos', 'counter'), ('invalidaciones', 'counter'),
+                            ('entradas', 'gauge'), ('bytes', 'gauge')):
+            nombre = f'asesoria_db_cache_{clave}'
+            lineas.append(f'# TYPE {nombre} {tipo}')
+            lineas.append(f'{nombre}{{almacen="{stats["almacen"]}"}} {stats[clave]}')
+    return '\n'.join(lineas) + '\n'
+
+
+def acceso_permitido():
+    """True si la petición trae el token de /metrics o viene de una de las redes permitidas."""
+    token = CONFIG['token']
+    autorizacion = request.headers.get('Authorization', '')
+    if token and autorizacion.startswith('Bearer '):
+        if hmac.compare_digest(autorizacion[len('Bearer '):].encode(), token.encode()):
+            return True
+    try:
+        ip = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(ip in red for red in CONFIG['redes'])
+
+
+def metrics():
+    """Vista de /metrics en formato de texto de Prometheus."""
+    if not acceso_permitido():
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(_formatear_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    """Lee la configuración, registra los contadores por endpoint y la ruta /metrics."""
+    CONFIG['umbral_lenta_ms'] = app.config.get('SLOW_QUERY_MS', CONFIG['umbral_lenta_ms'])
+    CONFIG['muestreo_log'] = app.config.get('SQL_LOG_SAMPLE_RATE', CONFIG['muestreo_log'])
+    CONFIG['token'] = app.config.get('METRICS_TOKEN') or None
+    # Una dirección sola vale como red (127.0.0.1 = 127.0.0.1/32); una red mal escrita falla al arrancar
+    CONFIG['redes'] = tuple(ipaddress.ip_network(red, strict=False)
+                            for red in app.config.get('METRICS_ALLOWED_IPS', ()))
+    app.teardown_request(_al_terminar_peticion)
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,266 @@
+# base/config/migraciones.py
+
+# Migraciones versionadas del esquema
+# Cada archivo migraciones/NNNN_nombre.sql es una versión; las aplicadas se registran en la tabla
+# schema_migraciones y 'flask migrar' aplica las que faltan, en orden. Los scripts se escriben para
+# MySQL y en SQLite se traducen (sqliteconnection.traducir_ddl); el pool SQLite migra solo al abrirse.
+# Aplicar es idempotente: una sentencia que ya estaba hecha (columna o índice que existe, p. ej. en una
+# base de datos creada a mano con los .sql sueltos de antes) se omite en lugar de fallar, así que una
+# migración cortada a la mitad se puede repetir. Los índices se crean en línea (ALGORITHM=INPLACE,
+# LOCK=NONE) y con lock_wait_timeout corto: si MySQL no puede crearlos sin bloquear la tabla, falla.
+
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+import click
+import pymysql
+from base.config import sqliteconnection
+
+CARPETA_MIGRACIONES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                   'migraciones')
+
+TABLA_VERSIONES = """
+    CREATE TABLE IF NOT EXISTS schema_migraciones (
+      version INT NOT NULL,
+      nombre VARCHAR(255) NOT NULL,
+      checksum CHAR(64) NOT NULL,
+      aplicada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+      PRIMARY KEY (version)
+    ) ENGINE = InnoDB
+"""
+
+# Errores de MySQL que indican que la sentencia ya estaba aplicada: tabla, columna, índice o clave
+# foránea que ya existe, o columna/índice que ya se borró. MySQL descarta la sentencia entera, así
+# que cada ALTER TABLE de una migración hace un solo cambio (una columna o un índice)
+YA_APLICADA = {1050, 1060, 1061, 1091, 1826}
+
+# Segundos que una sentencia DDL espera el bloqueo de metadatos de la tabla. Mientras espera, MySQL
+# encola detrás todas las consultas a esa tabla: es mejor fallar pronto y reintentar más tarde
+ESPERA_BLOQUEO = 5
+
+_RE_ARCHIVO = re.compile(r"^(\d{4})_(\w+)\.sql$")
+_RE_AGREGA_INDICE = re.compile(r"^ALTER\s+TABLE\b.*\bADD\s+(UNIQUE\s+)?(INDEX|KEY)\b", re.I | re.S)
+_RE_CREA_INDICE = re.compile(r"^CREATE\s+(UNIQUE\s+)?INDEX\b", re.I)
+_RE_ALGORITMO = re.compile(r"\bALGORITHM\s*=", re.I)
+_RE_USE = re.compile(r"^USE\b", re.I)
+
+
+class ErrorMigracion(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Migracion:
+    version: int
+    nombre: str
+    ruta: str
+
+    @property
+    def sql(self):
+        with open(self.ruta, encoding='utf-8') as archivo:
+            return archivo.read()
+
+    @property
+    def checksum(self):
+        # Sin distinguir finales de línea: el mismo archivo en Windows y en Linux da lo mismo
+        return hashlib.sha256(self.sql.replace('\r\n', '\n').encode('utf-8')).hexdigest()
+
+    def __str__(self):
+        return f"{self.version:04d}_{self.nombre}"
+
+
+def listar(carpeta=CARPETA_MIGRACIONES):
+    """Migraciones de la carpeta, por versión."""
+    migraciones = []
+    for archivo in os.listdir(carpeta):
+        coincidencia = _RE_ARCHIVO.match(archivo)
+        if coincidencia:
+            migraciones.append(Migracion(int(coincidencia[1]), coincidencia[2], os.path.join(carpeta, archivo)))
+    migraciones.sort(key=lambda m: m.version)
+    for anterior, siguiente in zip(migraciones, migraciones[1:]):
+        if anterior.version == siguiente.version:
+            raise ErrorMigracion(f"Dos migraciones con la versión {siguiente.version:04d}: {anterior} y {siguiente}")
+    return migraciones
+
+
+def pendientes(aplicadas, hasta=None, carpeta=CARPETA_MIGRACIONES):
+    """Migraciones que faltan (aplicadas: {version: checksum}), hasta la versión indicada."""
+    return [m for m in listar(carpeta) if m.version not in aplicadas and (hasta is None or m.version <= hasta)]
+
+
+def modificadas(aplicadas, carpeta=CARPETA_MIGRACIONES):
+    """Migraciones aplicadas cuyo archivo cambió después (no se vuelven a aplicar: hay que escribir otra)."""
+    return [m for m in listar(carpeta) if m.version in aplicadas and aplicadas[m.version] != m.checksum]
+
+
+def en_linea(sentencia):
+    """La sentencia con ALGORITHM=INPLACE, LOCK=NONE si crea un índice y no indica cómo hacerlo."""
+    if _RE_ALGORITMO.search(sentencia):
+        return sentencia
+    if _RE_AGREGA_INDICE.match(sentencia):
+        return f"{sentencia},\n  ALGORITHM = INPLACE, LOCK = NONE"
+    if _RE_CREA_INDICE.match(sentencia):
+        return f"{sentencia} ALGORITHM = INPLACE LOCK = NONE"
+    return sentencia
+
+
+def _leer_aplicadas(cursor):
+    cursor.execute("SELECT version, checksum FROM schema_migraciones ORDER BY version")
+    return {fila['version']: fila['checksum'] for fila in cursor.fetchall()}
+
+
+def _avisar_modificadas(aplicadas, eco):
+    for migracion in modificadas(aplicadas):
+        eco(f"Aviso: {migracion} cambió después de aplicarse")
+
+
+# ---------------------------------------------------------------------------------------------------
+# MySQL
+# ---------------------------------------------------------------------------------------------------
+
+def _conectar_mysql(config, db):
+    conexion = pymysql.connect(cursorclass=pymysql.cursors.DictCursor, autocommit=True, **config)
+    with conexion.cursor() as cursor:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{db}` DEFAULT CHARACTER SET utf8mb4 "
+                       f"COLLATE utf8mb4_0900_ai_ci")
+        cursor.execute(f"USE `{db}`")
+    return conexion
+
+
+def estado_mysql(config, db):
+    """{version: checksum} de las migraciones aplicadas en la base de datos MySQL."""
+    conexion = _conectar_mysql(config, db)
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute(TABLA_VERSIONES)
+            return _leer_aplicadas(cursor)
+    finally:
+        conexion.close()
+
+
+def migrar_mysql(config, db, hasta=None, eco=print, espera_bloqueo=ESPERA_BLOQUEO):
+    """Aplica en MySQL las migraciones pendientes. Devuelve las que se aplicaron."""
+    conexion = _conectar_mysql(config, db)
+    try:
+        with conexion.cursor() as cursor:
+            # Si dos procesos migran a la vez, el segundo espera a que termine el primero
+            cursor.execute("SELECT GET_LOCK(%s, 60) AS obtenido", (f'migraciones_{db}',))
+            if not cursor.fetchone()['obtenido']:
+                raise ErrorMigracion("Otro proceso lleva más de 60 s aplicando migraciones")
+            cursor.execute(f"SET SESSION lock_wait_timeout = {int(espera_bloqueo)}")
+            cursor.execute(TABLA_VERSIONES)
+            aplicadas = _leer_aplicadas(cursor)
+            _avisar_modificadas(aplicadas, eco)
+            hechas = []
+            for migracion in pendientes(aplicadas, hasta):
+                # El DDL de MySQL no es transaccional: cada sentencia queda hecha al ejecutarse
+                omitidas = 0
+                for sentencia in sqliteconnection.sentencias(migracion.sql):
+                    if _RE_USE.match(sentencia):
+                        continue
+                    try:
+                        cursor.execute(en_linea(sentencia))
+                    except pymysql.MySQLError as e:
+                        if e.args and e.args[0] in YA_APLICADA:
+                            omitidas += 1
+                            continue
+                        raise ErrorMigracion(f"{migracion}: {e}\n{sentencia}") from e
+                cursor.execute("INSERT INTO schema_migraciones (version, nombre, checksum) "
+                               "VALUES (%s, %s, %s)", (migracion.version, migracion.nombre, migracion.checksum))
+                hechas.append(migracion)
+                eco(f"Aplicada {migracion}" + (f" ({omitidas} sentencia(s) ya estaban hechas)" if omitidas else ""))
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (f'migraciones_{db}',))
+            return hechas
+    finally:
+        conexion.close()
+
+
+# ---------------------------------------------------------------------------------------------------
+# SQLite
+# ---------------------------------------------------------------------------------------------------
+
+def estado_sqlite(ruta):
+    """{version: checksum} de las migraciones aplicadas en el archivo SQLite."""
+    conexion = sqliteconnection.ConexionSQLite(ruta)
+    try:
+        conexion.begin()
+        sqliteconnection.ejecutar_ddl(conexion, TABLA_VERSIONES)
+        conexion.commit()
+        with conexion.cursor() as cursor:
+            return _leer_aplicadas(cursor)
+    finally:
+        conexion.close()
+
+
+def migrar_sqlite(ruta, hasta=None, eco=None):
+    """
+    Aplica en el archivo SQLite las migraciones pendientes. En SQLite el DDL es transaccional:
+    cada migración se aplica entera, junto con su fila en schema_migraciones, o no se aplica.
+    """
+    eco = eco or (lambda mensaje: None)
+    conexion = sqliteconnection.ConexionSQLite(ruta)
+    hechas = []
+    try:
+        while True:
+            # BEGIN IMMEDIATE: otro proceso que migra a la vez espera y después ve las versiones nuevas
+            conexion.begin()
+            sqliteconnection.ejecutar_ddl(conexion, TABLA_VERSIONES)
+            sqliteconnection.quitar_disparadores(conexion)
+            with conexion.cursor() as cursor:
+                aplicadas = _leer_aplicadas(cursor)
+                faltan = pendientes(aplicadas, hasta)
+                if not faltan:
+                    conexion.commit()
+                    break
+                migracion = faltan[0]
+                try:
+                    omitidas = sqliteconnection.ejecutar_ddl(conexion, migracion.sql)
+                    cursor.execute("INSERT INTO schema_migraciones (version, nombre, checksum) "
+                                   "VALUES (%s, %s, %s)", (migracion.version, migracion.nombre, migracion.checksum))
+                    conexion.commit()
+                except Exception as e:
+                    conexion.rollback()
+                    raise ErrorMigracion(f"{migracion}: {e}") from e
+            hechas.append(migracion)
+            eco(f"Aplicada {migracion}" + (f" ({omitidas} sentencia(s) ya estaban hechas)" if omitidas else ""))
+        if hechas:
+            _avisar_modificadas(estado_sqlite(ruta), eco)
+        return hechas
+    finally:
+        conexion.close()
+
+
+# ---------------------------------------------------------------------------------------------------
+# Comando
+# ---------------------------------------------------------------------------------------------------
+
+@click.command('migrar')
+@click.option('--db', default='proyecto_crud', show_default=True, help="Base de datos a migrar.")
+@click.option('--hasta', type=int, default=None, help="Última versión a aplicar (por defecto todas).")
+@click.option('--estado', is_flag=True, help="Solo muestra las migraciones aplicadas y las pendientes.")
+def migrar(db, hasta, estado):
+    """Aplica las migraciones pendientes de la carpeta migraciones/ (se puede repetir)."""
+    # Importado aquí: mysqlconnection usa este módulo para migrar los archivos SQLite
+    from base.config.mysqlconnection import BACKEND, DB_CONFIG
+    sqlite = BACKEND['nombre'] == 'sqlite'
+    ruta = os.path.join(BACKEND['carpeta_sqlite'], f'{db}.sqlite3')
+    if sqlite:
+        os.makedirs(BACKEND['carpeta_sqlite'], exist_ok=True)
+    try:
+        if estado:
+            aplicadas = estado_sqlite(ruta) if sqlite else estado_mysql(DB_CONFIG, db)
+            for migracion in listar():
+                marca = 'aplicada ' if migracion.version in aplicadas else 'pendiente'
+                if aplicadas.get(migracion.version, migracion.checksum) != migracion.checksum:
+                    marca = 'MODIFICADA'
+                click.echo(f"{marca}  {migracion}")
+            return
+        if sqlite:
+            hechas = migrar_sqlite(ruta, hasta, click.echo)
+        else:
+            hechas = migrar_mysql(DB_CONFIG, db, hasta, click.echo)
+    except ErrorMigracion as e:
+        raise click.ClickException(str(e)) from None
+    click.echo(f"Listo: {len(hechas)} migración(es) aplicadas" if hechas else "El esquema está al día")
+
@@ -1,56 +1,616 @@
 # Importamos la librería pymysql para interactuar con MySQL
 import pymysql.cursors
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import g, has_app_context
+from base.config import cache_consultas, migraciones, sqliteconnection
+from base.config.instrumentacion import debe_imprimir, registrar_consulta
+from base.config.sentencias import Sentencia
 
-# Esta clase proporciona una instancia para conectarse a la base de datos MySQL
+# Configuración de la conexión, se pueden ajustar el usuario, la contraseña y otros parámetros según sea necesario
+DB_CONFIG = {
+    'host': 'localhost',
+    'port': 3306,            # Puerto de la base de datos
+    'user': 'root',          # Nombre de usuario de la base de datos
+    'password': 'root',      # Contraseña del usuario de la base de datos
+    'charset': 'utf8mb4',    # Codificación de caracteres
+}
+
+# Parámetros del pool de conexiones (uno por base de datos)
+POOL_CONFIG = {
+    'max_conexiones': 10,     # Máximo de conexiones abiertas a la vez
+    'tiempo_espera': 5.0,     # Segundos que se espera una conexión libre antes de fallar
+    'vida_maxima': 1800.0,    # Segundos tras los cuales una conexión se recicla
+    'ping_inactiva': 30.0,    # Si una conexión lleva más de esto sin usarse, se verifica con ping
+}
+
+# Motor de base de datos: 'mysql' (servidor) o 'sqlite' (un archivo <db>.sqlite3 local, ver sqliteconnection.py)
+BACKENDS = ('mysql', 'sqlite')
+BACKEND = {
+    'nombre': 'mysql',
+    'carpeta_sqlite': 'instance',   # Carpeta de los archivos SQLite
+}
+
+
+class PoolAgotado(Exception):
+    """Se lanza cuando no hay conexiones libres dentro del tiempo de espera."""
+    pass
+
+
+class _ConexionPool:
+    """Conexión física gestionada por el pool, con sus marcas de tiempo."""
+    __slots__ = ('connection', 'creada_en', 'usada_en')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.creada_en = time.monotonic()
+        self.usada_en = self.creada_en
+
+
+class ConnectionPool:
+    """
+    Pool acotado y seguro entre hilos de conexiones pymysql para una base de datos.
+    Las conexiones se piden con checkout() y se devuelven con checkin().
+    """
+
+    def __init__(self, db, max_conexiones=10, tiempo_espera=5.0, vida_maxima=1800.0, ping_inactiva=30.0):
+        self.db = db
+        self.max_conexiones = max_conexiones
+        self.tiempo_espera = tiempo_espera
+        self.vida_maxima = vida_maxima
+        self.ping_inactiva = ping_inactiva
+        self._libres = deque()
+        self._abiertas = 0
+        self._cond = threading.Condition(threading.Lock())
+        # Estadísticas del pool
+        self._checkouts = 0
+        self._creadas = 0
+        self._recicladas = 0
+        self._pings_fallidos = 0
+        self._esperas = 0
+        self._tiempo_espera_total = 0.0
+        self._agotados = 0
+
+    def _conectar(self):
+        # Se abre una conexión nueva con la configuración global
+        connection = pymysql.connect(db=self.db,
+                                     # Los resultados se devuelven como diccionarios
+                                     cursorclass=pymysql.cursors.DictCursor,
+                                     autocommit=True,  # Realiza automáticamente un commit después de cada consulta
+                                     # Sin CLIENT.MULTI_STATEMENTS: cada execute acepta una sola sentencia
+                                     **DB_CONFIG)
+        return _ConexionPool(connection)
+
+    @staticmethod
+    def _cerrar(item):
+        try:
+            item.connection.close()
+        except Exception:
+            pass
+
+    def checkout(self, esperar=True):
+        """
+        Obtiene una conexión del pool, esperando si todas están en uso.
+        Con esperar=False lanza PoolAgotado enseguida si no hay ninguna disponible.
+        """
+        inicio = None
+        with self._cond:
+            while True:
+                if self._libres:
+                    item = self._libres.pop()
+                    break
+                if self._abiertas < self.max_conexiones:
+                    # Reservamos el hueco antes de conectar fuera del lock
+                    self._abiertas += 1
+                    item = None
+                    break
+                if not esperar:
+                    raise PoolAgotado(f"No hay conexiones libres para '{self.db}'")
+                if inicio is None:
+                    inicio = time.monotonic()
+                    self._esperas += 1
+                restante = self.tiempo_espera - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._agotados += 1
+                    self._tiempo_espera_total += time.monotonic() - inicio
+                    raise PoolAgotado(f"No hay conexiones libres para '{self.db}' tras {self.tiempo_espera}s")
+                self._cond.wait(restante)
+            if inicio is not None:
+                self._tiempo_espera_total += time.monotonic() - inicio
+            self._checkouts += 1
+
+        if item is not None:
+            item = self._validar(item)
+        if item is None:
+            try:
+                item = self._conectar()
+            except Exception:
+                # Liberamos el hueco reservado si no se pudo conectar
+                with self._cond:
+                    self._abiertas -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._creadas += 1
+        return item
+
+    def _validar(self, item):
+        """Recicla conexiones viejas y hace ping a las que llevan tiempo inactivas."""
+        ahora = time.monotonic()
+        if ahora - item.creada_en > self.vida_maxima:
+            self._cerrar(item)
+            with self._cond:
+                self._recicladas += 1
+            return None
+        if ahora - item.usada_en > self.ping_inactiva:
+            try:
+                item.connection.ping(reconnect=False)
+            except Exception:
+                self._cerrar(item)
+                with self._cond:
+                    self._pings_fallidos += 1
+                return None
+        return item
+
+    def checkin(self, item, descartar=False):
+        """Devuelve una conexión al pool. Si descartar es True se cierra."""
+        if not descartar and not item.connection.open:
+            descartar = True
+        if descartar:
+            self._cerrar(item)
+        else:
+            item.usada_en = time.monotonic()
+        with self._cond:
+            if descartar:
+                self._abiertas -= 1
+            else:
+                self._libres.append(item)
+            self._cond.notify()
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres del pool."""
+        with self._cond:
+            libres = list(self._libres)
+            self._libres.clear()
+            self._abiertas -= len(libres)
+            self._cond.notify_all()
+        for item in libres:
+            self._cerrar(item)
+
+    def stats(self):
+        """Estadísticas del pool: en uso, libres, esperas y tiempo esperado."""
+        with self._cond:
+            libres = len(self._libres)
+            return {
+                'db': self.db,
+                'max': self.max_conexiones,
+                'abiertas': self._abiertas,
+                'en_uso': self._abiertas - libres,
+                'libres': libres,
+                'checkouts': self._checkouts,
+                'creadas': self._creadas,
+                'recicladas': self._recicladas,
+                'pings_fallidos': self._pings_fallidos,
+                'esperas': self._esperas,
+                'tiempo_espera_total': self._tiempo_espera_total,
+                'agotados': self._agotados,
+            }
+
+
+# Un pool por nombre de base de datos, compartido por todo el proceso
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db):
+    pool = _pools.get(db)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db)
+            if pool is None:
+                if BACKEND['nombre'] == 'sqlite':
+                    pool = sqliteconnection.PoolSQLite(db, BACKEND['carpeta_sqlite'],
+                                                       tiempo_espera=POOL_CONFIG['tiempo_espera'])
+                    # El archivo se crea y se pone al día solo con las migraciones pendientes
+                    migraciones.migrar_sqlite(pool.ruta)
+                else:
+                    pool = ConnectionPool(db, **POOL_CONFIG)
+                _pools[db] = pool
+    return pool
+
+
+def _cerrar_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.cerrar()
+
+
+def configurar_pool(**opciones):
+    """Ajusta los parámetros de los pools (p. ej. desde app.config). Los pools existentes se cierran."""
+    POOL_CONFIG.update(opciones)
+    _cerrar_pools()
+
+
+def configurar_backend(nombre='mysql', carpeta_sqlite=None):
+    """Elige el motor de base de datos (p. ej. desde app.config). Los pools existentes se cierran."""
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend de base de datos desconocido: {nombre!r} (opciones: {', '.join(BACKENDS)})")
+    BACKEND['nombre'] = nombre
+    if carpeta_sqlite:
+        BACKEND['carpeta_sqlite'] = carpeta_sqlite
+    _cerrar_pools()
+
+
+def pool_stats():
+    """Estadísticas de todos los pools del proceso."""
+    return [pool.stats() for pool in list(_pools.values())]
+
+
+class UnidadDeTrabajo:
+    """
+    Conexión ligada al contexto de Flask (flask.g) que reutilizan todas las consultas
+    de una petición. Las escrituras se agrupan en una sola transacción que se confirma
+    al final de la petición en lugar de hacer commit tras cada sentencia.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.item = None
+        self.en_transaccion = False
+        self.descartar = False
+        # Sentencias de escritura de la transacción: al confirmarla se invalidan otra vez sus tablas en la
+        # caché de consultas (otra petición pudo cachear los datos de antes mientras no estaba confirmada)
+        self.escrituras = []
+
+    def conexion(self):
+        if self.item is None:
+            self.item = self.pool.checkout()
+        return self.item.connection
+
+    def iniciar_transaccion(self):
+        # La transacción empieza con la primera escritura, las lecturas previas van en autocommit
+        if not self.en_transaccion:
+            self.conexion().begin()
+            self.en_transaccion = True
 
+    def confirmar(self):
+        if self.en_transaccion:
+            self.en_transaccion = False
+            self.item.connection.commit()
+            escrituras, self.escrituras = self.escrituras, []
+            for query in dict.fromkeys(escrituras):
+                cache_consultas.invalidar_escritura(self.pool.db, query)
 
+    def deshacer(self):
+        if self.en_transaccion:
+            self.en_transaccion = False
+            self.escrituras = []
+            try:
+                self.item.connection.rollback()
+            except Exception as e:
+                print("Something went wrong", e)
+                self.descartar = True
+
+    def liberar(self, error=None):
+        """Confirma (o deshace si hubo error) y devuelve la conexión al pool."""
+        if self.item is None:
+            return
+        try:
+            if error is None and not self.descartar:
+                self.confirmar()
+            else:
+                self.deshacer()
+        except Exception as e:
+            print("Something went wrong", e)
+            self.descartar = True
+        finally:
+            self.pool.checkin(self.item, descartar=self.descartar)
+            self.item = None
+
+
+# Se puede desactivar la unidad de trabajo por petición (p. ej. desde app.config)
+UNIDAD_DE_TRABAJO = {'activa': True}
+
+
+def _unidad_de_trabajo(pool):
+    """Devuelve la unidad de trabajo del contexto actual para el pool, o None fuera de Flask."""
+    if not UNIDAD_DE_TRABAJO['activa'] or not has_app_context():
+        return None
+    unidades = g.get('_db_unidades')
+    if unidades is None:
+        unidades = g._db_unidades = {}
+    unidad = unidades.get(pool.db)
+    if unidad is None or unidad.pool is not pool:
+        unidad = unidades[pool.db] = UnidadDeTrabajo(pool)
+    return unidad
+
+
+def confirmar_transaccion():
+    """Confirma ya las escrituras pendientes del contexto actual (útil en comandos largos)."""
+    if has_app_context():
+        for unidad in g.get('_db_unidades', {}).values():
+            unidad.confirmar()
+
+
+def deshacer_transaccion():
+    """Deshace las escrituras pendientes del contexto actual (p. ej. si falla una operación en lote)."""
+    if has_app_context():
+        for unidad in g.get('_db_unidades', {}).values():
+            unidad.deshacer()
+
+
+def _confirmar_al_responder(response):
+    # Confirmamos antes de enviar la respuesta: si el commit falla, la petición falla
+    confirmar_transaccion()
+    return response
+
+
+def _liberar_al_terminar(error=None):
+    unidades = g.pop('_db_unidades', None)
+    if unidades:
+        for unidad in unidades.values():
+            unidad.liberar(error)
+
+
+def init_app(app):
+    """Registra los hooks que confirman y liberan la conexión de cada petición."""
+    UNIDAD_DE_TRABAJO['activa'] = app.config.get('DB_UNIDAD_DE_TRABAJO', True)
+    app.after_request(_confirmar_al_responder)
+    app.teardown_appcontext(_liberar_al_terminar)
+
+
+# Ejecución concurrente de consultas de lectura independientes (ver MySQLConnection.query_concurrent)
+CONCURRENCIA = {
+    'activa': True,   # Si es False todas las consultas se ejecutan en serie
+    'hilos': 4,       # Hilos del proceso dedicados a consultas concurrentes
+}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _obtener_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=CONCURRENCIA['hilos'],
+                                               thread_name_prefix='consultas')
+    return _executor
+
+
+def configurar_concurrencia(activa=True, hilos=4):
+    """Ajusta la ejecución concurrente (p. ej. desde app.config)."""
+    global _executor
+    CONCURRENCIA.update(activa=activa, hilos=hilos)
+    with _executor_lock:
+        anterior, _executor = _executor, None
+    if anterior is not None:
+        anterior.shutdown(wait=False)
+
+
+# Esta clase proporciona una instancia para conectarse a la base de datos MySQL
 class MySQLConnection:
     # Método constructor que recibe el nombre de la base de datos como parámetro
     def __init__(self, db):
-        # Configuración de la conexión, se pueden ajustar el usuario, la contraseña y otros parámetros según sea necesario
-        connection = pymysql.connect(host='localhost',
-                                     port=3306,  # Puerto de la base de datos
-                                    user='root',       # Nombre de usuario de la base de datos
-                                    password='root',  # Contraseña del usuario de la base de datos
-                                    db=db,  # Nombre de la base de datos (usará el argumento recibido)
-                                    charset='utf8mb4',  # Codificación de caracteres
-                                    # Los resultados se devuelven como diccionarios
-                                    cursorclass=pymysql.cursors.DictCursor,
-                                    autocommit=True)   # Realiza automáticamente un commit después de cada consulta
-        # Se almacena la conexión establecida en un atributo de la clase
-        self.connection = connection
+        # No se abre ninguna conexión aquí: se usa la de la petición o una del pool en cada consulta
+        self.pool = get_pool(db)
+        # Última excepción de query_db (que devuelve False en lugar de lanzarla)
+        self.error = None
 
     # Método para ejecutar consultas SQL en la base de datos
-    # Recibe una consulta SQL (query) y opcionalmente datos (data) para consultas parametrizadas
-    def query_db(self, query, data=None):
-        with self.connection.cursor() as cursor:
-            try:
-                # Si deseas depurar, imprime la consulta generada con mogrify
-                if data:
+    # Recibe una consulta SQL (query), de preferencia una Sentencia registrada (ver sentencias.py), y
+    # opcionalmente datos (data) para consultas parametrizadas
+    # Con cachear=True un SELECT puede responderse desde la caché de consultas (si está activada, ver
+    # cache_consultas.py); las escrituras siempre invalidan las entradas de las tablas que cambian
+    def query_db(self, query, data=None, cachear=False):
+        if isinstance(query, Sentencia):
+            # El tipo se declaró con la sentencia
+            es_insert, es_select = query.es_insert, query.es_select
+            cachear = cachear or query.cachear
+        else:
+            # SQL suelto: decide la primera palabra (un UPDATE con una subconsulta sigue siendo una escritura)
+            verbo = query.lstrip()[:7].lower()
+            es_insert = verbo.startswith(('insert', 'replace'))
+            es_select = verbo.startswith(('select', 'with'))
+        unidad = _unidad_de_trabajo(self.pool)
+        lectura = None
+        # Con escrituras sin confirmar la petición ve datos que los demás no: ni lee ni guarda en la caché
+        if (cachear and es_select and cache_consultas.CONFIG['activa']
+                and (unidad is None or not unidad.en_transaccion)):
+            lectura = cache_consultas.preparar(self.pool.db, query, data)
+            if lectura is not None:
+                result = cache_consultas.obtener(lectura)
+                if result is not None:
+                    return result
+        try:
+            if unidad is not None:
+                connection = unidad.conexion()
+                if not es_select:
+                    unidad.iniciar_transaccion()
+            else:
+                item = self.pool.checkout()
+                connection = item.connection
+        except Exception as e:
+            print("Something went wrong", e)
+            return False
+        descartar = False
+        try:
+            with connection.cursor() as cursor:
+                # Para depurar se imprime la consulta generada con mogrify (opt-in y muestreado, SQL_LOG_SAMPLE_RATE)
+                if data and debe_imprimir():
                     print("Running Query:", cursor.mogrify(query, data))
 
                 # Ejecutamos la consulta directamente
+                inicio = time.perf_counter()
                 cursor.execute(query, data)
 
                 # Si la consulta es un INSERT, se devuelve el ID de la última fila insertada
-                if query.lower().find("insert") >= 0:
-                    self.connection.commit()
+                if es_insert:
+                    # Dentro de una petición el commit se hace al final, con todas las escrituras juntas
+                    if unidad is None:
+                        connection.commit()
+                    registrar_consulta(query, time.perf_counter() - inicio)
+                    self._invalidar_cache(query, unidad)
                     return cursor.lastrowid
 
                 # Si es una consulta SELECT, devolvemos el resultado como una lista de diccionarios
-                elif query.lower().find("select") >= 0:
+                elif es_select:
                     result = cursor.fetchall()
+                    registrar_consulta(query, time.perf_counter() - inicio)
+                    if lectura is not None:
+                        cache_consultas.guardar(lectura, result)
                     return result
 
-                # Para consultas UPDATE o DELETE, confirmamos la transacción
+                # Para consultas UPDATE o DELETE, confirmamos la transacción y devolvemos las filas afectadas
                 else:
-                    self.connection.commit()
+                    if unidad is None:
+                        connection.commit()
+                    registrar_consulta(query, time.perf_counter() - inicio)
+                    self._invalidar_cache(query, unidad)
+                    return cursor.rowcount
+        except Exception as e:
+            print("Something went wrong", e)
+            self.error = e
+            # Si se perdió la conexión no la devolvemos al pool
+            descartar = isinstance(e, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+            if descartar and unidad is not None:
+                unidad.descartar = True
+            return False
+        finally:
+            # La conexión vuelve al pool en lugar de quedar abierta para siempre
+            if unidad is None:
+                self.pool.checkin(item, descartar=descartar)
+
+    # Borra de la caché de consultas las entradas de las tablas que escribió la sentencia. Dentro de
+    # una petición se vuelve a hacer al confirmar la transacción
+    def _invalidar_cache(self, query, unidad):
+        cache_consultas.invalidar_escritura(self.pool.db, query)
+        if unidad is not None:
+            unidad.escrituras.append(query)
+
+    # Método para ejecutar la misma sentencia de escritura con muchas filas de datos (executemany)
+    # Los INSERT ... VALUES se envían como un solo INSERT de varias filas. Devuelve las filas afectadas
+    def query_many(self, query, filas):
+        if not filas:
+            return 0
+        unidad = _unidad_de_trabajo(self.pool)
+        try:
+            if unidad is not None:
+                connection = unidad.conexion()
+                unidad.iniciar_transaccion()
+            else:
+                item = self.pool.checkout()
+                connection = item.connection
+        except Exception as e:
+            print("Something went wrong", e)
+            return False
+        descartar = False
+        try:
+            with connection.cursor() as cursor:
+                inicio = time.perf_counter()
+                afectadas = cursor.executemany(query, filas)
+                if unidad is None:
+                    connection.commit()
+                registrar_consulta(query, time.perf_counter() - inicio)
+                self._invalidar_cache(query, unidad)
+                return afectadas
+        except Exception as e:
+            print("Something went wrong", e)
+            descartar = isinstance(e, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+            if descartar and unidad is not None:
+                unidad.descartar = True
+            return False
+        finally:
+            if unidad is None:
+                self.pool.checkin(item, descartar=descartar)
+
+    # Método para recorrer un SELECT grande sin cargarlo entero en memoria
+    # Usa un cursor sin buffer (SSDictCursor): las filas se leen del servidor a medida que se consumen,
+    # de 'tamano' en 'tamano'. Devuelve un generador de filas, o de convertir(fila) si se indica
+    # (p. ej. convertir=Citas). La conexión es propia del pool y no la de la petición, porque queda
+    # ocupada hasta terminar de leer: no ve escrituras sin confirmar de la petición actual.
+    def query_stream(self, query, data=None, convertir=None, tamano=500):
+        item = self.pool.checkout()
+        descartar = True
+        try:
+            cursor = item.connection.cursor(pymysql.cursors.SSDictCursor)
+            if data and debe_imprimir():
+                print("Running Query:", cursor.mogrify(query, data))
+            inicio = time.perf_counter()
+            cursor.execute(query, data)
+            registrar_consulta(query, time.perf_counter() - inicio)
+            while True:
+                filas = cursor.fetchmany(tamano)
+                if not filas:
+                    break
+                for fila in filas:
+                    yield convertir(fila) if convertir else fila
+            cursor.close()
+            descartar = False
+        except Exception as e:
+            print("Something went wrong", e)
+            raise
+        finally:
+            # Si el consumidor se detuvo antes (o hubo un error) quedan filas sin leer en el servidor:
+            # en lugar de leerlas todas para cerrar el cursor se descarta la conexión
+            self.pool.checkin(item, descartar=descartar)
+
+    # Ejecuta un SELECT en una conexión propia del pool, fuera de la petición (lo usan los hilos de query_concurrent)
+    # Devuelve (filas, segundos). Si no hay conexiones libres lanza PoolAgotado sin esperar
+    def _select_aislado(self, query, data):
+        item = self.pool.checkout(esperar=False)
+        descartar = False
+        try:
+            with item.connection.cursor() as cursor:
+                inicio = time.perf_counter()
+                cursor.execute(query, data)
+                filas = cursor.fetchall()
+                return filas, time.perf_counter() - inicio
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            descartar = True
+            raise
+        finally:
+            self.pool.checkin(item, descartar=descartar)
+
+    # Método para ejecutar varias consultas SELECT independientes a la vez, cada una en su conexión del pool
+    # Recibe una lista de tuplas (query, data) y devuelve los resultados en el mismo orden, igual que
+    # llamar a query_db una por una (que sigue siendo el camino de respaldo)
+    def query_concurrent(self, consultas):
+        unidad = _unidad_de_trabajo(self.pool)
+        # En serie si está desactivado, si hay una sola consulta o si la petición tiene escrituras sin
+        # confirmar (otras conexiones no las verían)
+        if (not CONCURRENCIA['activa'] or len(consultas) < 2
+                or (unidad is not None and unidad.en_transaccion)):
+            return [self.query_db(query, data) for query, data in consultas]
+
+        executor = _obtener_executor()
+        futuros = [executor.submit(self._select_aislado, query, data) for query, data in consultas]
+        resultados = []
+        for (query, data), futuro in zip(consultas, futuros):
+            try:
+                filas, segundos = futuro.result()
+            except PoolAgotado:
+                # Sin conexiones libres: esta consulta va por el camino normal
+                resultados.append(self.query_db(query, data))
+                continue
             except Exception as e:
                 print("Something went wrong", e)
-                return False
-            finally:
-                # No cierres la conexión aquí, solo asegúrate de que el cursor se libere correctamente.
-                pass
+                resultados.append(False)
+                continue
+            # Las métricas se registran en el hilo de la petición para que cuenten en su endpoint
+            registrar_consulta(query, segundos)
+            resultados.append(filas)
+        return resultados
+
+def es_duplicado(error):
+    """True si el error es una violación de clave única (MySQL 1062 Duplicate entry o su equivalente en SQLite)."""
+    if isinstance(error, pymysql.err.IntegrityError):
+        return error.args[0] == 1062
+    return sqliteconnection.es_duplicado(error)
 
 def connectToMySQL(db):
-    return MySQLConnection(db)
\ No newline at end of file
+    return MySQLConnection(db)
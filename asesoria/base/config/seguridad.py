@@ -0,0 +1,109 @@
+# Hash de contraseñas con bcrypt, con un tope de hashes simultáneos por proceso
+# El hash se calcula en el hilo de la petición (bcrypt libera el GIL mientras calcula): el tope no
+# descarga trabajo a otro hilo, solo limita cuántos hilos del servidor pueden estar calculando a la vez.
+# Así una ráfaga de logins no ocupa todos los hilos del worker ni todos los núcleos, y el resto de las
+# páginas se sigue sirviendo. Una petición que no consigue turno en BCRYPT['tiempo_espera'] segundos
+# recibe BcryptOcupado (el formulario muestra "intenta de nuevo") en lugar de esperar indefinidamente.
+
+import os
+import stat
+import threading
+from contextlib import contextmanager
+from bcrypt import hashpw, gensalt, checkpw
+
+# Configuración (se sobrescribe desde app.config con configurar_bcrypt)
+BCRYPT = {
+    'rounds': 12,           # Factor de costo; si cambia, las contraseñas se re-hashean al iniciar sesión
+    'hilos': 2,             # Hashes simultáneos como máximo (por proceso)
+    'tiempo_espera': 5.0,   # Segundos máximos esperando turno para calcular un hash
+}
+
+_turnos = threading.BoundedSemaphore(BCRYPT['hilos'])
+
+
+class BcryptOcupado(Exception):
+    """Se lanza cuando no hay turno para calcular un hash dentro del tiempo de espera."""
+    pass
+
+
+def hilos_por_defecto(hilos_servidor):
+    """Tope de hashes simultáneos para un worker con hilos_servidor hilos: la mitad, sin pasar de los núcleos."""
+    return max(1, min(os.cpu_count() or 1, hilos_servidor // 2))
+
+
+def configurar_bcrypt(rounds=12, hilos=2, tiempo_espera=5.0):
+    global _turnos
+    BCRYPT.update(rounds=rounds, hilos=hilos, tiempo_espera=tiempo_espera)
+    # Los hashes en curso devuelven su turno al semáforo anterior
+    _turnos = threading.BoundedSemaphore(hilos)
+
+
+@contextmanager
+def _turno():
+    turnos = _turnos
+    if not turnos.acquire(timeout=BCRYPT['tiempo_espera']):
+        raise BcryptOcupado(f"Sin turno para bcrypt tras {BCRYPT['tiempo_espera']}s")
+    try:
+        yield
+    finally:
+        turnos.release()
+
+
+def _hash(password, rounds):
+    return hashpw(password.encode('utf-8'), gensalt(rounds)).decode('utf-8')
+
+
+def _verificar(password, password_hash):
+    try:
+        return checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        # Hash con formato inválido
+        return False
+
+
+def hash_password(password):
+    """Devuelve el hash bcrypt de la contraseña con el costo configurado. Puede lanzar BcryptOcupado."""
+    with _turno():
+        return _hash(password, BCRYPT['rounds'])
+
+
+def verificar_password(password, password_hash):
+    """Comprueba la contraseña contra su hash bcrypt. Puede lanzar BcryptOcupado."""
+    with _turno():
+        return _verificar(password, password_hash)
+
+
+def costo_hash(password_hash):
+    """Factor de costo de un hash bcrypt ($2b$12$...), o None si no se reconoce."""
+    partes = password_hash.split('$')
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+def necesita_rehash(password_hash):
+    """True si el hash se hizo con un costo distinto del configurado."""
+    return costo_hash(password_hash) != BCRYPT['rounds']
+
+
+# Carpetas de cachés en disco (bytecode de Jinja, caché de consultas): lo que se lee de ellas se ejecuta
+# o se carga en la aplicación, así que no pueden ser de otro usuario ni admitir escritura de otros
+
+def comprobar_privada(ruta):
+    """Lanza PermissionError si la ruta es un enlace, es de otro usuario o la pueden escribir el grupo u otros."""
+    info = os.lstat(ruta)
+    if stat.S_ISLNK(info.st_mode):
+        raise PermissionError(f"{ruta} es un enlace simbólico")
+    # En Windows no hay uid ni bits de grupo/otros: rigen los permisos de la carpeta del usuario
+    if hasattr(os, 'getuid'):
+        if info.st_uid != os.getuid():
+            raise PermissionError(f"{ruta} es de otro usuario (uid {info.st_uid})")
+        if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise PermissionError(f"{ruta} admite escritura del grupo u otros usuarios")
+
+
+def carpeta_privada(ruta):
+    """Crea la carpeta con permisos 0o700 si no existe, comprueba que sea privada y la devuelve."""
+    os.makedirs(ruta, mode=0o700, exist_ok=True)
+    comprobar_privada(ruta)
+    return ruta
@@ -0,0 +1,79 @@
+# base/config/sentencias.py
+
+# Registro de sentencias SQL con nombre
+# Cada consulta de los modelos se declara una sola vez, con su tipo y sus parámetros:
+#
+#   QUERY_POR_ID = sentencia('planes.por_id', """SELECT ... WHERE tp.id = %(id)s;""", LECTURA, ('id',))
+#
+# Una Sentencia es un str, así que se pasa tal cual a query_db, query_many, query_stream o query_concurrent,
+# pero ya trae resuelto lo que antes se deducía del texto en cada llamada: si es una lectura, una
+# escritura o un INSERT que devuelve el id, y el SQL normalizado para las métricas. Al declararla se
+# comprueba que el tipo corresponda a la sentencia y que los parámetros declarados sean los del texto:
+# un %(nombre)s mal escrito falla al importar el modelo y no en la primera petición que lo usa.
+#
+# Sentencias preparadas: PyMySQL interpola los parámetros en el cliente (no implementa el protocolo
+# binario de COM_STMT_PREPARE), así que en MySQL cada ejecución se envía como texto. En SQLite la
+# traducción del SQL se hace una vez por sentencia (sqliteconnection.traducir) y sqlite3 guarda en cada
+# conexión la sentencia ya compilada (cached_statements): cada sentencia registrada se compila una
+# vez por conexión y las siguientes ejecuciones solo enlazan los parámetros.
+
+import re
+from base.config.instrumentacion import normalizar_sql
+
+# Tipos de sentencia
+LECTURA = 'lectura'         # SELECT: query_db devuelve las filas
+ESCRITURA = 'escritura'     # UPDATE, DELETE, INSERT ... SELECT: query_db devuelve las filas afectadas
+INSERCION = 'insercion'     # INSERT de una fila: query_db devuelve el id insertado
+TIPOS = (LECTURA, ESCRITURA, INSERCION)
+
+_RE_PARAMETRO = re.compile(r"%\((\w+)\)s")
+_RE_LECTURA = re.compile(r"^\s*(SELECT|WITH)\b", re.I)
+_RE_INSERCION = re.compile(r"^\s*(INSERT|REPLACE)\b", re.I)
+
+# Todas las sentencias declaradas, por nombre
+REGISTRO = {}
+
+
+class Sentencia(str):
+    """Texto SQL con su nombre, su tipo y sus parámetros, ya validados y con el SQL normalizado."""
+
+    def __new__(cls, nombre, sql, tipo, parametros=(), cachear=False):
+        return super().__new__(cls, sql)
+
+    def __init__(self, nombre, sql, tipo, parametros=(), cachear=False):
+        if tipo not in TIPOS:
+            raise ValueError(f"Sentencia {nombre}: tipo desconocido {tipo!r} (opciones: {', '.join(TIPOS)})")
+        if tipo == LECTURA and not _RE_LECTURA.match(sql):
+            raise ValueError(f"Sentencia {nombre}: una lectura debe empezar por SELECT o WITH")
+        if tipo == INSERCION and not _RE_INSERCION.match(sql):
+            raise ValueError(f"Sentencia {nombre}: una inserción debe empezar por INSERT o REPLACE")
+        if tipo == ESCRITURA and _RE_LECTURA.match(sql):
+            raise ValueError(f"Sentencia {nombre}: un SELECT no es una escritura")
+        en_texto = set(_RE_PARAMETRO.findall(sql))
+        if en_texto != set(parametros):
+            raise ValueError(f"Sentencia {nombre}: los parámetros declarados {sorted(parametros)} "
+                             f"no son los del texto {sorted(en_texto)}")
+        if cachear and tipo != LECTURA:
+            raise ValueError(f"Sentencia {nombre}: solo las lecturas se pueden cachear")
+        self.nombre = nombre
+        self.tipo = tipo
+        self.parametros = tuple(parametros)
+        # Con cachear=True query_db la responde desde la caché de consultas (si está activada)
+        self.cachear = cachear
+        self.es_select = tipo == LECTURA
+        self.es_insert = tipo == INSERCION
+        # Etiqueta de la sentencia en las métricas
+        self.normalizada = normalizar_sql(sql)
+
+    def __repr__(self):
+        return f"<Sentencia {self.nombre} ({self.tipo})>"
+
+
+def sentencia(nombre, sql, tipo, parametros=(), cachear=False):
+    """Declara una sentencia y la agrega al registro. Los nombres son únicos."""
+    nueva = Sentencia(nombre, sql, tipo, parametros, cachear)
+    anterior = REGISTRO.get(nombre)
+    if anterior is not None and str(anterior) != str(nueva):
+        raise ValueError(f"Ya hay otra sentencia llamada {nombre}")
+    REGISTRO[nombre] = nueva
+    return nueva
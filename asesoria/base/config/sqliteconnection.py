@@ -0,0 +1,672 @@
+# Backend SQLite embebido, para desplegar toda la aplicación en un solo equipo
+# Ofrece la misma interfaz que las conexiones pymysql que usa MySQLConnection: cursor() con filas como
+# diccionarios, begin/commit/rollback, lastrowid/rowcount y mogrify. Así los modelos no cambian: las
+# sentencias escritas para MySQL se traducen al vuelo (y la traducción se guarda en caché) y el
+# esquema se crea y actualiza con las mismas migraciones .sql que se ejecutan en MySQL (migraciones.py).
+# Cada hilo tiene una conexión propia que comparten todas sus consultas; el archivo está en modo WAL,
+# así las lecturas de otros hilos no se bloquean mientras una petición escribe.
+
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+import weakref
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import count
+
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',   # Con WAL es seguro ante caídas del proceso y evita un fsync por commit
+    'PRAGMA foreign_keys = ON',      # Los ON DELETE CASCADE de InnoDB
+)
+
+
+# Conversión de tipos: DATE y DATETIME llegan como date/datetime, igual que con PyMySQL
+def _a_fecha(valor):
+    try:
+        return date.fromisoformat(valor.decode())
+    except ValueError:
+        return valor.decode()
+
+
+def _a_fecha_hora(valor):
+    try:
+        return datetime.fromisoformat(valor.decode())
+    except ValueError:
+        return valor.decode()
+
+
+sqlite3.register_converter('DATE', _a_fecha)
+sqlite3.register_converter('DATETIME', _a_fecha_hora)
+sqlite3.register_converter('TIMESTAMP', _a_fecha_hora)
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(' '))
+sqlite3.register_adapter(date, lambda valor: valor.isoformat())
+
+
+# ---------------------------------------------------------------------------------------------------
+# Traducción de sentencias de MySQL a SQLite
+# ---------------------------------------------------------------------------------------------------
+
+_RE_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_RE_MARCA = re.compile(r"\x00(\d+)\x00")
+_RE_PARAMETRO = re.compile(r"%\((\w+)\)s|%s|%%")
+_RE_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b", re.I)
+_RE_DUPLICADO = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b(.*?)(;?\s*)$", re.I | re.S)
+_RE_ASIGNACION_NULA = re.compile(r"^\s*`?(\w+)`?\s*=\s*`?(\w+)`?\s*$")
+_RE_VALUES = re.compile(r"\bVALUES\s*\(\s*`?(\w+)`?\s*\)", re.I)
+_RE_CONCAT = re.compile(r"\bCONCAT\s*\(", re.I)
+_RE_LIMIT = re.compile(r"\bLIMIT\s+([\w:?]+)\s*,\s*([\w:?]+)", re.I)
+_RE_BLOQUEO = re.compile(r"\s+(?:FOR\s+UPDATE|LOCK\s+IN\s+SHARE\s+MODE)\b", re.I)
+_RE_UPDATE = re.compile(r"^\s*UPDATE\s+`?(\w+)`?\s+SET\s", re.I)
+_RE_FIN_SET = re.compile(r"[()]|\b(?:WHERE|ORDER\s+BY|LIMIT|RETURNING)\b|;", re.I)
+FUNCIONES = (
+    (re.compile(r"\bNOW\s*\(\s*\)|\bCURRENT_TIMESTAMP\s*\(\s*\)", re.I), "datetime('now', 'localtime')"),
+    (re.compile(r"\bCURDATE\s*\(\s*\)", re.I), "date('now', 'localtime')"),
+    (re.compile(r"\bUTC_TIMESTAMP\s*\(\s*\)", re.I), "datetime('now')"),
+)
+
+
+def _proteger_literales(sql):
+    """Cambia las cadenas por marcas para que las sustituciones no las toquen."""
+    literales = []
+
+    def guardar(m):
+        literales.append(m.group(0))
+        return f"\x00{len(literales) - 1}\x00"
+    return _RE_LITERAL.sub(guardar, sql), literales
+
+
+def _restaurar_literales(sql, literales):
+    return _RE_MARCA.sub(lambda m: literales[int(m.group(1))], sql)
+
+
+def _cerrar_parentesis(texto, abre):
+    """Posición del paréntesis que cierra el que está en 'abre'."""
+    nivel = 0
+    for i in range(abre, len(texto)):
+        if texto[i] == '(':
+            nivel += 1
+        elif texto[i] == ')':
+            nivel -= 1
+            if nivel == 0:
+                return i
+    raise ValueError(f"Paréntesis sin cerrar en: {texto[abre:abre + 60]}")
+
+
+def _partir(texto, separador=','):
+    """Parte por el separador en el nivel superior (fuera de paréntesis)."""
+    partes, nivel, inicio = [], 0, 0
+    for i, c in enumerate(texto):
+        if c == '(':
+            nivel += 1
+        elif c == ')':
+            nivel -= 1
+        elif c == separador and nivel == 0:
+            partes.append(texto[inicio:i])
+            inicio = i + 1
+    partes.append(texto[inicio:])
+    return [p.strip() for p in partes if p.strip()]
+
+
+def _traducir_concat(sql):
+    # CONCAT(a, b, c) -> (a || b || c), también anidados
+    while True:
+        m = _RE_CONCAT.search(sql)
+        if m is None:
+            return sql
+        abre = m.end() - 1
+        cierra = _cerrar_parentesis(sql, abre)
+        argumentos = _partir(sql[abre + 1:cierra])
+        sql = sql[:m.start()] + '(' + ' || '.join(argumentos) + ')' + sql[cierra + 1:]
+
+
+def _traducir_duplicado(m):
+    asignaciones = _partir(m.group(1))
+    # "col = col" es la forma de MySQL de no hacer nada si la fila ya existe
+    if all((a := _RE_ASIGNACION_NULA.match(x)) and a.group(1) == a.group(2) for x in asignaciones):
+        return 'ON CONFLICT DO NOTHING' + m.group(2)
+    asignaciones = [_RE_VALUES.sub(r'excluded.\1', x) for x in asignaciones]
+    return 'ON CONFLICT DO UPDATE SET ' + ', '.join(asignaciones) + m.group(2)
+
+
+def _marcar_actualizacion(sql, m, al_actualizar):
+    # ON UPDATE CURRENT_TIMESTAMP de MySQL: la columna toma la hora actual si la sentencia no la asigna
+    # y cambió algún valor de la fila. "SET col = col" la nombra, así que la deja como estaba
+    tabla = m.group(1).lower()
+    columnas = [columna for t, columna in al_actualizar if t == tabla]
+    if not columnas:
+        return sql
+    nivel, fin = 0, len(sql)
+    for s in _RE_FIN_SET.finditer(sql, m.end()):
+        if s.group(0) == '(':
+            nivel += 1
+        elif s.group(0) == ')':
+            nivel -= 1
+        elif nivel == 0:
+            fin = s.start()
+            break
+    asignaciones = [parte.split('=', 1) for parte in _partir(sql[m.end():fin])]
+    asignadas = {_nombre(columna).rsplit('.', 1)[-1].lower() for columna, _ in asignaciones}
+    # SQLite evalúa todas las expresiones del SET con los valores anteriores de la fila;
+    # COLLATE BINARY: cambiar solo mayúsculas también es un cambio (las columnas de texto son NOCASE)
+    cambios = ' OR '.join(f"{columna.strip()} IS NOT ({valor.strip()}) COLLATE BINARY"
+                          for columna, valor in asignaciones)
+    extra = ''.join(f", {columna} = CASE WHEN {cambios} THEN datetime('now', 'localtime') ELSE {columna} END"
+                    for columna in columnas if columna.lower() not in asignadas)
+    cuerpo = sql[:fin]
+    recortado = cuerpo.rstrip()
+    return recortado + extra + cuerpo[len(recortado):] + sql[fin:]
+
+
+@lru_cache(maxsize=1024)
+def traducir(query, con_parametros=True, al_actualizar=()):
+    """
+    Traduce una sentencia escrita para MySQL/PyMySQL a SQLite: parámetros %(nombre)s -> :nombre
+    (y %s -> ?1, ?2...), CONCAT, INSERT IGNORE, ON DUPLICATE KEY UPDATE, LIMIT a, b, NOW()/CURDATE()
+    y FOR UPDATE. LIKE y NOT LIKE no cambian: se resuelven con la función like() de la conexión.
+    al_actualizar son las columnas (tabla, columna) con ON UPDATE CURRENT_TIMESTAMP: los UPDATE de
+    esas tablas que no las asignan las actualizan.
+    """
+    sql, literales = _proteger_literales(query)
+    if con_parametros:
+        # Como PyMySQL, '%%' solo es un '%' escapado cuando la consulta lleva parámetros. Los %s se
+        # numeran: ON UPDATE puede repetir una expresión del SET con sus parámetros
+        posicion = count(1)
+        sql = _RE_PARAMETRO.sub(lambda m: ':' + m.group(1) if m.group(1) else
+                                (f'?{next(posicion)}' if m.group(0) == '%s' else '%'), sql)
+        literales = [literal.replace('%%', '%') for literal in literales]
+    sql = _RE_INSERT_IGNORE.sub('INSERT OR IGNORE', sql)
+    sql = _RE_DUPLICADO.sub(_traducir_duplicado, sql)
+    sql = _traducir_concat(sql)
+    sql = _RE_LIMIT.sub(r'LIMIT \2 OFFSET \1', sql)
+    sql = _RE_BLOQUEO.sub('', sql)
+    for patron, reemplazo in FUNCIONES:
+        sql = patron.sub(reemplazo, sql)
+    if al_actualizar and (m := _RE_UPDATE.match(sql)):
+        sql = _marcar_actualizacion(sql, m, al_actualizar)
+    return _restaurar_literales(sql, literales)
+
+
+def _expandir_listas(sql, data):
+    # PyMySQL convierte una tupla en "(1, 2, 3)" (para IN %(ids)s); en SQLite cada valor es un parámetro
+    data = dict(data)
+    for nombre, valor in list(data.items()):
+        if isinstance(valor, (list, tuple, set, frozenset)):
+            del data[nombre]
+            nombres = []
+            for i, elemento in enumerate(valor):
+                data[f'{nombre}__{i}'] = elemento
+                nombres.append(f':{nombre}__{i}')
+            sql = re.sub(rf':{nombre}\b', '(' + ', '.join(nombres) + ')', sql)
+    return sql, data
+
+
+def preparar(query, data=None, al_actualizar=()):
+    """Sentencia traducida y parámetros listos para sqlite3."""
+    sql = traducir(query, data is not None, al_actualizar)
+    if data is None:
+        return sql, ()
+    if isinstance(data, dict):
+        if any(isinstance(v, (list, tuple, set, frozenset)) for v in data.values()):
+            return _expandir_listas(sql, data)
+    return sql, data
+
+
+# LIKE con la semántica de MySQL (intercalación utf8mb4_0900_ai_ci): sin distinguir mayúsculas ni
+# acentos y con '\' como carácter de escape por defecto
+def _plegar(texto):
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c)).casefold()
+
+
+@lru_cache(maxsize=256)
+def _patron_like(patron, escape):
+    partes = []
+    i = 0
+    while i < len(patron):
+        c = patron[i]
+        if c == escape and i + 1 < len(patron):
+            i += 1
+            partes.append(re.escape(patron[i]))
+        elif c == '%':
+            partes.append('.*')
+        elif c == '_':
+            partes.append('.')
+        else:
+            partes.append(re.escape(c))
+        i += 1
+    return re.compile(''.join(partes), re.S)
+
+
+def _like(patron, valor, escape='\\'):
+    if patron is None or valor is None:
+        return None
+    return _patron_like(_plegar(str(patron)), escape).fullmatch(_plegar(str(valor))) is not None
+
+
+# ---------------------------------------------------------------------------------------------------
+# Conexión y cursor con la interfaz de PyMySQL
+# ---------------------------------------------------------------------------------------------------
+
+def _literal(valor):
+    if valor is None:
+        return 'NULL'
+    if isinstance(valor, (int, float)):
+        return str(valor)
+    return "'" + str(sqlite3.adapt(valor) if isinstance(valor, (date, datetime)) else valor).replace("'", "''") + "'"
+
+
+class CursorSQLite:
+    """Cursor de sqlite3 que devuelve las filas como diccionarios (como el DictCursor de PyMySQL)."""
+
+    def __init__(self, cursor, conexion=None):
+        self._cursor = cursor
+        self._conexion = conexion
+        self._columnas = None
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _al_actualizar(self, query):
+        if self._conexion is None or not _RE_UPDATE.match(query):
+            return ()
+        return self._conexion.al_actualizar()
+
+    def execute(self, query, data=None):
+        sql, parametros = preparar(query, data, self._al_actualizar(query))
+        self._cursor.execute(sql, parametros)
+        self._columnas = None
+        self.rowcount = self._cursor.rowcount
+        # Como en MySQL, un INSERT IGNORE que no insertó nada devuelve 0
+        self.lastrowid = self._cursor.lastrowid if self.rowcount > 0 else 0
+        return self.rowcount
+
+    def executemany(self, query, filas):
+        self._cursor.executemany(traducir(query, True, self._al_actualizar(query)), filas)
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def mogrify(self, query, data=None):
+        """La sentencia traducida con los parámetros interpolados (solo para mostrarla)."""
+        sql, parametros = preparar(query, data, self._al_actualizar(query))
+        if isinstance(parametros, dict):
+            return re.sub(r':(\w+)', lambda m: _literal(parametros[m.group(1)]) if m.group(1) in parametros
+                          else m.group(0), sql)
+        return re.sub(r'\?(\d+)', lambda m: _literal(parametros[int(m.group(1)) - 1]), sql)
+
+    def _diccionarios(self, filas):
+        if self._columnas is None:
+            self._columnas = [d[0] for d in self._cursor.description or ()]
+        columnas = self._columnas
+        return [dict(zip(columnas, fila)) for fila in filas]
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        return self._diccionarios([fila])[0] if fila is not None else None
+
+    def fetchmany(self, tamano=None):
+        return self._diccionarios(self._cursor.fetchmany(tamano or self._cursor.arraysize))
+
+    def fetchall(self):
+        return self._diccionarios(self._cursor.fetchall())
+
+    def nextset(self):
+        return None
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionSQLite:
+    """Conexión a un archivo SQLite con la parte de la interfaz de pymysql.Connection que se usa."""
+
+    def __init__(self, ruta, tiempo_espera=5.0):
+        # isolation_level=None: autocommit salvo entre begin() y commit(), igual que con PyMySQL
+        self._conn = sqlite3.connect(ruta, timeout=tiempo_espera, isolation_level=None,
+                                     detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False,
+                                     cached_statements=512)
+        for pragma in PRAGMAS:
+            self._conn.execute(pragma)
+        self._conn.create_function('like', 2, _like, deterministic=True)
+        self._conn.create_function('like', 3, _like, deterministic=True)
+        self._al_actualizar = ()
+        self._version_esquema = None
+        self.open = True
+
+    def cursor(self, cursorclass=None):
+        # Los cursores de sqlite3 ya leen las filas a medida que se piden (sirven también para query_stream)
+        return CursorSQLite(self._conn.cursor(), self)
+
+    def al_actualizar(self):
+        """
+        Columnas (tabla, columna) con ON UPDATE CURRENT_TIMESTAMP, de schema_al_actualizar. Se vuelven
+        a leer cuando cambia el esquema (una migración aplicada por otro proceso, p. ej.).
+        """
+        version = self._conn.execute('PRAGMA schema_version').fetchone()[0]
+        if version != self._version_esquema:
+            try:
+                filas = self._conn.execute(f'SELECT tabla, columna FROM {TABLA_AL_ACTUALIZAR}').fetchall()
+            except sqlite3.OperationalError:
+                filas = []
+            self._al_actualizar = tuple(sorted((tabla.lower(), columna) for tabla, columna in filas))
+            self._version_esquema = version
+        return self._al_actualizar
+
+    def begin(self):
+        # IMMEDIATE toma el bloqueo de escritura al empezar: dos transacciones no se bloquean a mitad
+        self._conn.execute('BEGIN IMMEDIATE')
+
+    def commit(self):
+        if self._conn.in_transaction:
+            self._conn.execute('COMMIT')
+
+    def rollback(self):
+        if self._conn.in_transaction:
+            self._conn.execute('ROLLBACK')
+
+    def ping(self, reconnect=False):
+        self._conn.execute('SELECT 1')
+
+    def close(self):
+        if self.open:
+            self.open = False
+            self._conn.close()
+
+
+class _ConexionHilo:
+    __slots__ = ('connection',)
+
+    def __init__(self, connection):
+        self.connection = connection
+
+
+class PoolSQLite:
+    """
+    Equivalente de ConnectionPool para SQLite (checkout/checkin/cerrar/stats): en lugar de un pool
+    acotado, cada hilo abre una conexión la primera vez y la conserva. Abrir una conexión a un archivo
+    local es barato, pero así también se conserva la caché de sentencias preparadas de sqlite3.
+    """
+
+    def __init__(self, db, carpeta, tiempo_espera=5.0):
+        self.db = db
+        os.makedirs(carpeta, exist_ok=True)
+        self.ruta = os.path.join(carpeta, f'{db}.sqlite3')
+        self.tiempo_espera = tiempo_espera
+        self._local = threading.local()
+        self._todas = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._creadas = 0
+
+    def checkout(self, esperar=True):
+        item = getattr(self._local, 'item', None)
+        if item is None or not item.connection.open:
+            item = self._local.item = _ConexionHilo(ConexionSQLite(self.ruta, self.tiempo_espera))
+            with self._lock:
+                self._todas.add(item.connection)
+                self._creadas += 1
+        with self._lock:
+            self._checkouts += 1
+        return item
+
+    def checkin(self, item, descartar=False):
+        # La conexión sigue siendo del hilo: otra consulta del mismo hilo puede estar usándola, así que
+        # no se cierra aunque se pida descartarla (en SQLite no queda en un estado inservible)
+        if not item.connection.open and getattr(self._local, 'item', None) is item:
+            self._local.item = None
+
+    def cerrar(self):
+        """Cierra las conexiones de todos los hilos (cada hilo abre otra si vuelve a consultar)."""
+        with self._lock:
+            conexiones = list(self._todas)
+            self._todas.clear()
+        for conexion in conexiones:
+            try:
+                conexion.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._lock:
+            abiertas = len(self._todas)
+            return {
+                'db': self.db,
+                'max': None,
+                'abiertas': abiertas,
+                'en_uso': abiertas,
+                'libres': 0,
+                'checkouts': self._checkouts,
+                'creadas': self._creadas,
+                'recicladas': 0,
+                'pings_fallidos': 0,
+                'esperas': 0,
+                'tiempo_espera_total': 0.0,
+                'agotados': 0,
+            }
+
+
+def es_duplicado(error):
+    """True si el error es una violación de clave única de SQLite."""
+    return isinstance(error, sqlite3.IntegrityError) and str(error).startswith('UNIQUE constraint failed')
+
+
+# ---------------------------------------------------------------------------------------------------
+# Esquema: traducción de los scripts DDL de MySQL
+# ---------------------------------------------------------------------------------------------------
+
+_RE_IGNORAR = re.compile(r"^(SET|USE|SELECT|(CREATE|DROP)\s+(SCHEMA|DATABASE))\b", re.I)
+_RE_ESQUEMA = re.compile(r"`\w+`\s*\.\s*(?=`)")
+_RE_INDICE = re.compile(r"^(?:ADD\s+)?(UNIQUE\s+)?(?:INDEX|KEY)\s+`?(\w+)`?\s*(\(.*\))", re.I | re.S)
+_RE_TIPO_ENTERO = re.compile(r"\b(?:TINY|SMALL|MEDIUM|BIG)?INT(?:EGER)?\b(\s*\(\d+\))?(\s+UNSIGNED)?", re.I)
+_RE_TIPO_TEXTO = re.compile(r"\b(?:VAR)?CHAR\s*\(\d+\)|\b(?:TINY|MEDIUM|LONG)?TEXT\b", re.I)
+_RE_AL_ACTUALIZAR = re.compile(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP(\s*\(\s*\))?", re.I)
+_RE_AHORA_POR_DEFECTO = re.compile(r"\bDEFAULT\s+CURRENT_TIMESTAMP(\s*\(\s*\))?", re.I)
+# SQLite no tiene ON UPDATE CURRENT_TIMESTAMP: las migraciones registran aquí esas columnas y la traducción
+# de cada UPDATE las asigna (ver _marcar_actualizacion). Un disparador no sirve: no distingue
+# "SET col = col" de no asignarla y su lista de columnas no incluye las que se agregan después
+TABLA_AL_ACTUALIZAR = 'schema_al_actualizar'
+_RE_DISPARADOR_ANTIGUO = re.compile(r"AFTER\s+UPDATE\s+ON\s+(\w+)\b.*?\bSET\s+(\w+)\s*=", re.I | re.S)
+_RE_SOBRANTES = re.compile(r"\s+(AUTO_INCREMENT|VISIBLE|INVISIBLE|FIRST|AFTER\s+`?\w+`?|COMMENT\s+\x00\d+\x00"
+                           r"|CHARACTER\s+SET\s+\w+|COLLATE\s+\w+)(?!\w)", re.I)
+
+
+def sentencias(script):
+    """Parte un script SQL en sentencias, sin comentarios."""
+    resultado, actual, i = [], [], 0
+    while i < len(script):
+        c = script[i]
+        if c in "'\"`":
+            fin = i + 1
+            while fin < len(script) and script[fin] != c:
+                fin += 2 if script[fin] == '\\' else 1
+            actual.append(script[i:fin + 1])
+            i = fin + 1
+            continue
+        if script.startswith('--', i) or c == '#':
+            i = script.find('\n', i)
+            i = len(script) if i < 0 else i
+            continue
+        if script.startswith('/*', i):
+            i = script.find('*/', i)
+            i = len(script) if i < 0 else i + 2
+            continue
+        if c == ';':
+            resultado.append(''.join(actual).strip())
+            actual = []
+        else:
+            actual.append(c)
+        i += 1
+    resultado.append(''.join(actual).strip())
+    return [s for s in resultado if s]
+
+
+def _columna(definicion):
+    """Definición de columna de MySQL en SQLite; devuelve (sql, se_actualiza_sola)."""
+    definicion, literales = _proteger_literales(definicion)
+    al_actualizar = bool(_RE_AL_ACTUALIZAR.search(definicion))
+    definicion = _RE_AL_ACTUALIZAR.sub('', definicion)
+    definicion = _RE_AHORA_POR_DEFECTO.sub("DEFAULT (datetime('now', 'localtime'))", definicion)
+    definicion = _RE_SOBRANTES.sub('', definicion)
+    definicion = _RE_TIPO_ENTERO.sub('INTEGER', definicion, count=1)
+    # Las comparaciones de texto de MySQL (…_ci) no distinguen mayúsculas
+    definicion = _RE_TIPO_TEXTO.sub('TEXT COLLATE NOCASE', definicion, count=1)
+    return _restaurar_literales(definicion, literales), al_actualizar
+
+
+def _nombre(texto):
+    return texto.strip().strip('`')
+
+
+def _indice(tabla, m):
+    columnas = re.sub(r"\s+(VISIBLE|INVISIBLE)\b", '', m.group(3), flags=re.I)
+    # Los prefijos de índice (col(20)) no existen en SQLite
+    columnas = re.sub(r"(`?\w+`?)\s*\(\d+\)", r'\1', columnas)
+    unico = 'UNIQUE ' if m.group(1) else ''
+    return f"CREATE {unico}INDEX IF NOT EXISTS {m.group(2)} ON {tabla} {columnas}"
+
+
+def _al_actualizar(tabla, columna, agregar=True):
+    # Alta (o baja) de una columna ON UPDATE CURRENT_TIMESTAMP en schema_al_actualizar
+    crear = (f"CREATE TABLE IF NOT EXISTS {TABLA_AL_ACTUALIZAR} "
+             f"(tabla TEXT NOT NULL, columna TEXT NOT NULL, PRIMARY KEY (tabla, columna))")
+    if agregar:
+        return [crear, f"INSERT OR IGNORE INTO {TABLA_AL_ACTUALIZAR} (tabla, columna) VALUES ('{tabla}', '{columna}')"]
+    return [crear, f"DELETE FROM {TABLA_AL_ACTUALIZAR} WHERE tabla = '{tabla}' AND columna = '{columna}'"]
+
+
+def _crear_tabla(sentencia):
+    m = re.match(r"CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?(`?\w+`?)\s*", sentencia, re.I)
+    tabla = _nombre(m.group(2))
+    abre = m.end()
+    cuerpo = sentencia[abre + 1:_cerrar_parentesis(sentencia, abre)]
+
+    columnas, definiciones, restricciones, extra = [], [], [], []
+    clave_primaria = None
+    autoincremental = None
+    actualizables = []
+    for parte in _partir(cuerpo):
+        mayus = parte.upper()
+        if mayus.startswith('PRIMARY KEY'):
+            clave_primaria = [_nombre(c) for c in _partir(parte[parte.index('(') + 1:parte.rindex(')')])]
+        elif (indice := _RE_INDICE.match(parte)) or mayus.startswith('UNIQUE'):
+            if indice is None:
+                indice = _RE_INDICE.match(re.sub(r"^UNIQUE\s+", 'UNIQUE INDEX ', parte, flags=re.I))
+            extra.append(_indice(tabla, indice))
+        elif re.match(r"(FULLTEXT|SPATIAL)\b", mayus):
+            continue
+        elif re.match(r"(CONSTRAINT|FOREIGN\s+KEY|CHECK)\b", mayus):
+            restricciones.append(_RE_ESQUEMA.sub('', parte))
+        else:
+            nombre = _nombre(parte.split()[0])
+            if 'AUTO_INCREMENT' in mayus:
+                autoincremental = nombre
+            sql, al_actualizar = _columna(parte)
+            columnas.append(nombre)
+            definiciones.append(sql)
+            if al_actualizar:
+                actualizables.append(nombre)
+
+    if clave_primaria == [autoincremental]:
+        # La clave AUTO_INCREMENT pasa a ser el rowid (AUTOINCREMENT: no se reutilizan ids borrados)
+        i = columnas.index(autoincremental)
+        definiciones[i] = f"{columnas[i]} INTEGER PRIMARY KEY AUTOINCREMENT"
+    elif clave_primaria:
+        restricciones.insert(0, f"PRIMARY KEY ({', '.join(clave_primaria)})")
+
+    si_no_existe = 'IF NOT EXISTS ' if m.group(1) else ''
+    crear = f"CREATE TABLE {si_no_existe}{tabla} (\n  " + ',\n  '.join(definiciones + restricciones) + "\n)"
+    return [crear] + extra + [s for c in actualizables for s in _al_actualizar(tabla, c)]
+
+
+def _alterar_tabla(sentencia):
+    m = re.match(r"ALTER\s+TABLE\s+(`?\w+`?)\s+", sentencia, re.I)
+    tabla = _nombre(m.group(1))
+    resultado = []
+    for parte in _partir(sentencia[m.end():]):
+        mayus = parte.upper()
+        if mayus.startswith(('ALGORITHM', 'LOCK')):
+            continue
+        if indice := _RE_INDICE.match(parte):
+            resultado.append(_indice(tabla, indice))
+        elif mayus.startswith('ADD UNIQUE'):
+            resultado.append(_indice(tabla, _RE_INDICE.match(re.sub(r"^ADD\s+UNIQUE\s+", 'UNIQUE INDEX ', parte,
+                                                                     flags=re.I))))
+        elif mayus.startswith('ADD'):
+            definicion = re.sub(r"^ADD\s+(COLUMN\s+)?", '', parte, flags=re.I)
+            if definicion.upper().startswith(('CONSTRAINT', 'FOREIGN KEY')):
+                # SQLite no puede agregar claves foráneas a una tabla existente
+                continue
+            sql, al_actualizar = _columna(definicion)
+            resultado.append(f"ALTER TABLE {tabla} ADD COLUMN {sql}")
+            if al_actualizar:
+                resultado.extend(_al_actualizar(tabla, _nombre(definicion.split()[0])))
+        elif m_indice := re.match(r"DROP\s+(?:INDEX|KEY)\s+`?(\w+)`?$", parte, re.I):
+            resultado.append(f"DROP INDEX IF EXISTS {m_indice.group(1)}")
+        elif mayus.startswith('DROP'):
+            columna = _nombre(re.sub(r"^DROP\s+(COLUMN\s+)?", '', parte, flags=re.I))
+            resultado.append(f"ALTER TABLE {tabla} DROP COLUMN {columna}")
+            resultado.extend(_al_actualizar(tabla, columna, agregar=False))
+        else:
+            raise ValueError(f"ALTER TABLE no soportado en SQLite: {parte}")
+    return resultado
+
+
+def traducir_ddl(script):
+    """Sentencias SQLite equivalentes a un script .sql escrito para MySQL."""
+    resultado = []
+    for sentencia in sentencias(script):
+        if _RE_IGNORAR.match(sentencia):
+            continue
+        sentencia = _RE_ESQUEMA.sub('', sentencia)
+        mayus = sentencia.upper()
+        if re.match(r"CREATE\s+TABLE\b", mayus):
+            resultado.extend(_crear_tabla(sentencia))
+        elif re.match(r"ALTER\s+TABLE\b", mayus):
+            resultado.extend(_alterar_tabla(sentencia))
+        else:
+            resultado.append(traducir(sentencia, con_parametros=False))
+    return resultado
+
+
+# Errores de una sentencia que ya estaba aplicada (como 1060/1061 en MySQL): se omite
+_RE_YA_APLICADA = re.compile(r"^(duplicate column name|(table|index|trigger) \S+ already exists)", re.I)
+
+
+def ejecutar_ddl(conexion, script):
+    """
+    Ejecuta un script .sql escrito para MySQL dentro de la transacción abierta de la conexión.
+    Las sentencias ya aplicadas (columna, tabla o índice existente) se omiten; devuelve cuántas.
+    """
+    omitidas = 0
+    for sentencia in traducir_ddl(script):
+        try:
+            conexion._conn.execute(sentencia)
+        except sqlite3.OperationalError as e:
+            if not _RE_YA_APLICADA.match(str(e)):
+                raise
+            omitidas += 1
+    return omitidas
+
+
+def quitar_disparadores(conexion):
+    """
+    Los archivos creados con versiones anteriores emulaban ON UPDATE CURRENT_TIMESTAMP con
+    disparadores (<tabla>_<columna>_al_actualizar): se cambian por filas de schema_al_actualizar.
+    Se ejecuta dentro de la transacción abierta de la conexión; devuelve cuántos quitó.
+    """
+    disparadores = conexion._conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' "
+                                          "AND name LIKE '%al_actualizar'").fetchall()
+    quitados = 0
+    for nombre, sql in disparadores:
+        if m := _RE_DISPARADOR_ANTIGUO.search(sql):
+            for sentencia in _al_actualizar(m.group(1), m.group(2)):
+                conexion._conn.execute(sentencia)
+            conexion._conn.execute(f'DROP TRIGGER "{nombre}"')
+            quitados += 1
+    return quitados
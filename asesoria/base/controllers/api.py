@@ -0,0 +1,205 @@
+# API JSON (v1) para los clientes móviles y SPA
+# Expone las mismas operaciones de TravelPlan/Usuario que las páginas de /citas, sin renderizar
+# plantillas. La sesión es la misma cookie que usa la web (se inicia en /usuarios/procesar_login).
+#
+#   ?fields=id,destination   solo devuelve esos campos (selección dispersa)
+#   ?cursor=...&limite=20    paginación del feed por cursor (ver TravelPlan.obtener_feed)
+
+import json
+from flask import Blueprint, Response, get_flashed_messages, request, session
+from base.config.exportar import a_json
+from base.models.travel_plan_model import TravelPlan
+from base.models.usuario_model import Usuario
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Campos que se pueden pedir de cada recurso (nunca la contraseña)
+CAMPOS_PLAN = ('id', 'destination', 'description', 'travel_start_date', 'travel_end_date', 'plan',
+               'is_active', 'autor_id', 'autor_nombre', 'autor_apellido', 'participantes_count', 'creado_en',
+               'actualizado_en')
+CAMPOS_USUARIO = ('id', 'nombre', 'apellido')
+CAMPOS_PARTICIPANTE = ('nombre', 'apellido', 'fecha_union')
+
+LIMITE_FEED = 50
+MAX_IDS_LOTE = 100
+
+
+class ErrorApi(Exception):
+    def __init__(self, mensaje, status=400, **extra):
+        super().__init__(mensaje)
+        self.status = status
+        self.extra = extra
+
+
+@bp.errorhandler(ErrorApi)
+def manejar_error(error):
+    return responder({'error': str(error), **error.extra}, error.status)
+
+
+def responder(datos, status=200):
+    """JSON compacto; las fechas van en ISO 8601."""
+    cuerpo = json.dumps(datos, default=a_json, ensure_ascii=False, separators=(',', ':'))
+    return Response(cuerpo, status=status, mimetype='application/json')
+
+
+def usuario_actual():
+    if 'usuario_id' not in session:
+        raise ErrorApi("No autenticado", 401)
+    return session['usuario_id']
+
+
+def campos_pedidos(permitidos, extra=()):
+    """Campos de ?fields= (todos si no se indica). Los desconocidos son un error 400."""
+    valor = request.args.get('fields')
+    if not valor:
+        return permitidos + tuple(extra)
+    campos = tuple(dict.fromkeys(c.strip() for c in valor.split(',') if c.strip()))
+    desconocidos = [c for c in campos if c not in permitidos and c not in extra]
+    if desconocidos:
+        raise ErrorApi("Campos desconocidos", 400, campos=desconocidos)
+    return campos
+
+
+def serializar(objeto, campos):
+    datos = {campo: getattr(objeto, campo) for campo in campos if hasattr(objeto, campo)}
+    if 'is_active' in datos:
+        datos['is_active'] = bool(datos['is_active'])
+    return datos
+
+
+def entero(nombre, defecto, minimo, maximo):
+    try:
+        valor = int(request.args.get(nombre, defecto))
+    except ValueError:
+        raise ErrorApi(f"'{nombre}' debe ser un número") from None
+    return max(minimo, min(valor, maximo))
+
+
+@bp.route('/usuario')
+def usuario():
+    usuario_actual()
+    usuario = Usuario.desde_sesion()
+    if usuario is None:
+        raise ErrorApi("No autenticado", 401)
+    return responder(serializar(usuario, campos_pedidos(CAMPOS_USUARIO)))
+
+
+@bp.route('/planes')
+def feed():
+    """Planes de otros usuarios a los que aún no se unió, paginados por cursor."""
+    usuario_id = usuario_actual()
+    campos = campos_pedidos(CAMPOS_PLAN)
+    limite = entero('limite', 10, 1, LIMITE_FEED)
+    planes, siguiente = TravelPlan.obtener_feed(usuario_id, request.args.get('cursor'), limite)
+    return responder({'planes': [serializar(plan, campos) for plan in planes], 'siguiente_cursor': siguiente})
+
+
+@bp.route('/planes/mios')
+def mis_planes():
+    usuario_id = usuario_actual()
+    campos = campos_pedidos(CAMPOS_PLAN, extra=('es_propio', 'joined_at'))
+    planes = TravelPlan.obtener_trip_schedules(usuario_id)
+    return responder({'planes': [serializar(plan, campos) for plan in planes]})
+
+
+@bp.route('/planes/<int:plan_id>')
+def detalle(plan_id):
+    usuario_actual()
+    campos = campos_pedidos(CAMPOS_PLAN, extra=('participantes',))
+    if 'participantes' in campos:
+        plan, participantes = TravelPlan.obtener_detalle(plan_id)
+    else:
+        plan, participantes = TravelPlan.obtener_por_id(plan_id), None
+    if not plan:
+        raise ErrorApi("Plan no encontrado", 404)
+    datos = serializar(plan, campos)
+    if participantes is not None:
+        datos['participantes'] = [{campo: fila.get(campo) for campo in CAMPOS_PARTICIPANTE}
+                                  for fila in participantes]
+    return responder(datos)
+
+
+@bp.route('/planes/lote')
+def lote():
+    """Varios planes en una sola consulta: ?ids=1,2,3. Los que no existen se listan en 'no_encontrados'."""
+    usuario_actual()
+    campos = campos_pedidos(CAMPOS_PLAN)
+    try:
+        ids = list(dict.fromkeys(int(i) for i in request.args.get('ids', '').split(',') if i.strip()))
+    except ValueError:
+        raise ErrorApi("'ids' debe ser una lista de números separados por comas") from None
+    if not ids:
+        raise ErrorApi("Falta 'ids'")
+    if len(ids) > MAX_IDS_LOTE:
+        raise ErrorApi(f"Como máximo {MAX_IDS_LOTE} ids por petición")
+    planes = TravelPlan.obtener_por_ids(ids)
+    return responder({
+        'planes': [serializar(planes[i], campos) for i in ids if i in planes],
+        'no_encontrados': [i for i in ids if i not in planes],
+    })
+
+
+@bp.route('/planes', methods=['POST'])
+def crear():
+    usuario_id = usuario_actual()
+    datos = request.get_json(silent=True) or {}
+    formulario = {clave: str(datos.get(clave, '')) for clave in ('destination', 'plan', 'travel_start_date', 'duracion_horas')}
+    # Misma validación que el formulario web; sus mensajes flash se devuelven como errores
+    if not TravelPlan.validar_plan_viaje(formulario):
+        raise ErrorApi("Datos inválidos", 400, errores=get_flashed_messages(category_filter=['error']))
+    plan_id = TravelPlan.crear_plan_viaje({
+        'destination': formulario['destination'],
+        'travel_start_date': formulario['travel_start_date'],
+        'travel_end_date': formulario['travel_start_date'],
+        'plan': formulario['plan'],
+        'autor_id': usuario_id,
+    })
+    if not plan_id:
+        raise ErrorApi("No se pudo crear el plan", 500)
+    return responder({'id': plan_id}, 201)
+
+
+@bp.route('/planes/<int:plan_id>', methods=['DELETE'])
+def eliminar(plan_id):
+    usuario_id = usuario_actual()
+    # El autor se comprueba en el propio DELETE
+    borrados = TravelPlan.eliminar_planes(usuario_id, [plan_id])
+    if borrados is False:
+        raise ErrorApi("No se pudo eliminar el plan", 500)
+    if not borrados:
+        raise ErrorApi("Plan no encontrado", 404)
+    return Response(status=204)
+
+
+def exigir_plan(plan_id, mensaje_error):
+    """404 si el plan no existe (se consulta solo cuando la escritura no cambió nada)."""
+    existe = TravelPlan.existe(plan_id)
+    if existe is None:
+        raise ErrorApi(mensaje_error, 500)
+    if not existe:
+        raise ErrorApi("Plan no encontrado", 404)
+
+
+@bp.route('/planes/<int:plan_id>/participacion', methods=['PUT'])
+def unirse(plan_id):
+    usuario_id = usuario_actual()
+    resultado = TravelPlan.unirse_a_plan(usuario_id, plan_id)
+    # Sin fila nueva: ya estaba unido o el plan no existe (SQLite rechaza la clave foránea y el
+    # INSERT IGNORE de MySQL la convierte en un aviso)
+    if not resultado:
+        exigir_plan(plan_id, "No se pudo unir al plan")
+        if resultado is False:
+            raise ErrorApi("No se pudo unir al plan", 500)
+    return Response(status=204)
+
+
+@bp.route('/planes/<int:plan_id>/participacion', methods=['DELETE'])
+def cancelar_participacion(plan_id):
+    usuario_id = usuario_actual()
+    resultado = TravelPlan.cancelar_participacion(usuario_id, plan_id)
+    if resultado is False:
+        raise ErrorApi("No se pudo cancelar la participación", 500)
+    # No estaba unido: no es un error, salvo que el plan no exista
+    if not resultado:
+        exigir_plan(plan_id, "No se pudo cancelar la participación")
+    return Response(status=204)
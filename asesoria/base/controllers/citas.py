@@ -1,30 +1,73 @@
 from base.models.travel_plan_model import TravelPlan
 from base.models.usuario_model import Usuario
-from flask import render_template, redirect, request, session, Blueprint, flash
+from base.models.dashboard_model import DashboardCitas
+from base.models.tutor_model import DirectorioTutores
+from base.config.http_cache import condicional
+from base.config.exportar import TIPOS, csv_en_bloques, ndjson_en_bloques
+from flask import render_template, redirect, request, session, Blueprint, flash, make_response, stream_template, Response, stream_with_context, abort
 
 bp = Blueprint('citas', __name__, url_prefix='/citas')
 
+def version_pagina_plan(plan_id):
+    """Validador de las páginas de un plan: el plan y sus participantes, quién lo ve y los tutores"""
+    usuario = Usuario.desde_sesion()
+    if usuario is None:
+        return None
+    # Los tutores según la base de datos, no un contador del proceso: el ETag es el mismo en todos los
+    # workers. Su versión llega con la del plan, en la misma consulta
+    version_plan = TravelPlan.obtener_version(plan_id)
+    if version_plan is None:
+        return None
+    return f"{plan_id}|{version_plan}|{usuario.id}|{usuario.version}"
+
 @bp.route('/')
 def citas_simple():
     if 'usuario_id' not in session:
         return redirect('/')
     
-    usuario = Usuario.obtener_por_id(session['usuario_id'])
-    
-    # Obtener las asesorías (planes de viaje) del usuario actual
-    mis_asesorias = TravelPlan.obtener_por_autor(session['usuario_id'])
+    # Usuario, asesorías propias, de otros y tutores con la conexión de la petición
+    dashboard = DashboardCitas.cargar(session['usuario_id'], usuario=Usuario.desde_sesion())
     
-    # Obtener todas las asesorías de otros usuarios
-    todas_las_asesorias = TravelPlan.obtener_planes_otros_usuarios(session['usuario_id'])
+    # Los datos ya están cargados: la página se envía a medida que se renderiza
+    return stream_template('citas_simple.html', **dashboard.contexto())
+
+@bp.route('/feed')
+def feed_asesorias():
+    if 'usuario_id' not in session:
+        return redirect('/')
     
-    # Obtener tutores disponibles para el modal
-    tutores_disponibles = Usuario.obtener_todos_excepto(session['usuario_id'])
+    # Siguiente página del feed de asesorías de otros usuarios (botón "Cargar más")
+    planes, siguiente_cursor = TravelPlan.obtener_feed(session['usuario_id'], request.args.get('cursor'))
+    TravelPlan.cargar_participantes(planes)
+    respuesta = make_response(render_template('asesorias_feed.html',
+                                              usuario=Usuario.desde_sesion(),
+                                              todas_las_asesorias=planes))
+    if siguiente_cursor:
+        respuesta.headers['X-Siguiente-Cursor'] = siguiente_cursor
+    return respuesta
+
+# Resultados por página de /citas/buscar y largo máximo del texto buscado
+RESULTADOS_POR_PAGINA = 10
+MAX_LARGO_BUSQUEDA = 100
+
+@bp.route('/buscar')
+def buscar_planes():
+    if 'usuario_id' not in session:
+        return redirect('/')
     
-    return render_template('citas_simple.html', 
-                         usuario=usuario,
-                         mis_asesorias=mis_asesorias,
-                         todas_las_asesorias=todas_las_asesorias,
-                         tutores=tutores_disponibles)
+    # Tarjetas de los planes que coinciden, por relevancia; la última palabra cuenta como prefijo
+    # (sirve para sugerir mientras se escribe). ?q=texto&pagina=N
+    texto = request.args.get('q', '')[:MAX_LARGO_BUSQUEDA]
+    pagina = request.args.get('pagina', 1, type=int) or 1
+    planes, total = TravelPlan.buscar(texto, pagina, RESULTADOS_POR_PAGINA)
+    TravelPlan.cargar_participantes(planes)
+    respuesta = make_response(render_template('asesorias_feed.html',
+                                              usuario=Usuario.desde_sesion(),
+                                              todas_las_asesorias=planes))
+    respuesta.headers['X-Total-Resultados'] = str(total)
+    if pagina * RESULTADOS_POR_PAGINA < total:
+        respuesta.headers['X-Siguiente-Pagina'] = str(pagina + 1)
+    return respuesta
 
 @bp.route('/crear_plan', methods=['POST'])
 def crear_plan_viaje():
@@ -53,20 +96,21 @@ def crear_plan_viaje():
     return redirect('/citas')
 
 @bp.route('/descripcion/<int:plan_id>')
+@condicional(version_pagina_plan)
 def descripcion_viaje(plan_id):
     if 'usuario_id' not in session:
         flash("Debes iniciar sesión para ver esta asesoría", 'error')
         return redirect('/')
     
-    usuario = Usuario.obtener_por_id(session['usuario_id'])
-    plan = TravelPlan.obtener_por_id(plan_id)
+    usuario = Usuario.desde_sesion()
+    # El plan y sus participantes se consultan a la vez
+    plan, usuarios_unidos = TravelPlan.obtener_detalle(plan_id)
     
     if not plan:
         flash("La asesoría solicitada no fue encontrada", 'error')
         return redirect('/citas')
     
-    usuarios_unidos = TravelPlan.obtener_usuarios_unidos_al_plan(plan_id)
-    tutores_disponibles = Usuario.obtener_todos_excepto(plan.autor_id)
+    tutores_disponibles = DirectorioTutores.excepto(plan.autor_id)
     
     return render_template('descripcion_viaje.html', 
                          usuario=usuario, 
@@ -101,15 +145,136 @@ def eliminar_plan(plan_id):
     flash("Plan de viaje eliminado", 'warning')
     return redirect('/citas')
 
+def ids_del_formulario(campo):
+    """Ids enviados en el formulario: varios campos con el mismo nombre y/o separados por comas"""
+    ids = []
+    for valor in request.form.getlist(campo):
+        for parte in valor.split(','):
+            # isdecimal y no isdigit: '²' o '①' son dígitos pero int() no los acepta
+            if parte.strip().isdecimal():
+                ids.append(int(parte))
+    return list(dict.fromkeys(ids))
+
+# Operaciones en lote: un POST con la lista de ids, todo en una transacción
+
+@bp.route('/lote/unirse', methods=['POST'])
+def unirse_a_planes():
+    if 'usuario_id' not in session:
+        return redirect('/')
+    
+    plan_ids = ids_del_formulario('plan_ids')
+    resultado = TravelPlan.unirse_a_planes(session['usuario_id'], plan_ids)
+    if resultado is False:
+        flash("No se pudo completar la inscripción, no se hizo ningún cambio", 'error')
+    else:
+        flash(f"Te uniste a {resultado} asesoría(s) 🎒", 'success')
+    return redirect('/citas')
+
+@bp.route('/lote/cancelar_participacion', methods=['POST'])
+def cancelar_participaciones():
+    if 'usuario_id' not in session:
+        return redirect('/')
+    
+    plan_ids = ids_del_formulario('plan_ids')
+    resultado = TravelPlan.cancelar_participaciones(session['usuario_id'], plan_ids)
+    if resultado is False:
+        flash("No se pudo cancelar la participación, no se hizo ningún cambio", 'error')
+    else:
+        flash(f"Cancelaste tu participación en {resultado} asesoría(s)", 'info')
+    return redirect('/citas')
+
+@bp.route('/lote/eliminar_plan', methods=['POST'])
+def eliminar_planes():
+    if 'usuario_id' not in session:
+        return redirect('/')
+    
+    # Solo se borran los planes del usuario (el autor se comprueba en el propio DELETE)
+    plan_ids = ids_del_formulario('plan_ids')
+    resultado = TravelPlan.eliminar_planes(session['usuario_id'], plan_ids)
+    if resultado is False:
+        flash("No se pudieron eliminar las asesorías, no se hizo ningún cambio", 'error')
+    else:
+        flash(f"{resultado} asesoría(s) eliminada(s)", 'warning')
+    return redirect('/citas')
+
+@bp.route('/lote/participantes/<int:plan_id>', methods=['POST'])
+def gestionar_participantes(plan_id):
+    if 'usuario_id' not in session:
+        return redirect('/')
+    
+    plan = TravelPlan.obtener_por_id(plan_id)
+    
+    # Solo el autor del plan puede inscribir o quitar a otros usuarios
+    if not plan or plan.autor_id != session['usuario_id']:
+        flash("No tienes permisos para gestionar esta asesoría", 'error')
+        return redirect('/citas')
+    
+    agregar = ids_del_formulario('agregar_ids')
+    quitar = ids_del_formulario('quitar_ids')
+    agregados = TravelPlan.agregar_participantes(plan_id, agregar, autor_id=plan.autor_id)
+    quitados = TravelPlan.quitar_participantes(plan_id, quitar) if agregados is not False else False
+    if agregados is False or quitados is False:
+        flash("No se pudieron actualizar los participantes, no se hizo ningún cambio", 'error')
+    else:
+        flash(f"Participantes actualizados: {agregados} inscrito(s), {quitados} quitado(s)", 'success')
+    return redirect(f'/citas/descripcion/{plan_id}')
+
+# Exportaciones en streaming: las filas se leen de la base de datos y se envían en bloques
+
+COLUMNAS_EXPORTAR = ['id', 'destination', 'description', 'travel_start_date', 'travel_end_date', 'plan',
+                     'is_active', 'creado_en', 'participante_id', 'participante_nombre',
+                     'participante_apellido', 'fecha_union']
+COLUMNAS_PARTICIPANTES = ['nombre', 'apellido', 'fecha_union']
+
+def respuesta_exportacion(bloques, formato, nombre):
+    return Response(stream_with_context(bloques), mimetype=TIPOS[formato],
+                    headers={'Content-Disposition': f'attachment; filename="{nombre}.{formato}"'})
+
+@bp.route('/exportar/<formato>')
+def exportar_planes(formato):
+    if 'usuario_id' not in session:
+        return redirect('/')
+    if formato not in TIPOS:
+        abort(404)
+    
+    filas = TravelPlan.iterar_exportacion(session['usuario_id'])
+    if formato == 'csv':
+        # Una línea por plan y participante (los planes sin participantes salen con esas columnas vacías)
+        bloques = csv_en_bloques(filas, COLUMNAS_EXPORTAR)
+    else:
+        # Un plan por línea con la lista de sus participantes
+        bloques = ndjson_en_bloques(TravelPlan.agrupar_exportacion(filas))
+    return respuesta_exportacion(bloques, formato, 'asesorias')
+
+@bp.route('/exportar/participantes/<int:plan_id>/<formato>')
+def exportar_participantes(plan_id, formato):
+    if 'usuario_id' not in session:
+        return redirect('/')
+    if formato not in TIPOS:
+        abort(404)
+    
+    plan = TravelPlan.obtener_por_id(plan_id)
+    if not plan or plan.autor_id != session['usuario_id']:
+        flash("No tienes permisos para exportar esta asesoría", 'error')
+        return redirect('/citas')
+    
+    filas = TravelPlan.iterar_usuarios_unidos_al_plan(plan_id)
+    if formato == 'csv':
+        bloques = csv_en_bloques(filas, COLUMNAS_PARTICIPANTES)
+    else:
+        bloques = ndjson_en_bloques(filas)
+    return respuesta_exportacion(bloques, formato, f'participantes_{plan_id}')
+
 @bp.route('/perfil')
 def ver_perfil():
     if 'usuario_id' not in session:
         return redirect('/')
     
-    usuario = Usuario.obtener_por_id(session['usuario_id'])
+    usuario = Usuario.desde_sesion()
     return render_template('perfil.html', usuario=usuario)
 
 @bp.route('/editar/<int:plan_id>')
+@condicional(version_pagina_plan)
 def editar_asesoria(plan_id):
     if 'usuario_id' not in session:
         return redirect('/')
@@ -121,8 +286,8 @@ def editar_asesoria(plan_id):
         flash("No tienes permisos para editar esta asesoría", 'error')
         return redirect('/citas')
     
-    usuario = Usuario.obtener_por_id(session['usuario_id'])
-    tutores_disponibles = Usuario.obtener_todos_excepto(session['usuario_id'])
+    usuario = Usuario.desde_sesion()
+    tutores_disponibles = DirectorioTutores.excepto(session['usuario_id'])
     return render_template('editar_cita.html', usuario=usuario, plan=plan, tutores=tutores_disponibles)
 
 @bp.route('/actualizar/<int:plan_id>', methods=['POST'])
@@ -162,8 +327,8 @@ def solicitar_asesoria():
     if 'usuario_id' not in session:
         return redirect('/')
     
-    usuario = Usuario.obtener_por_id(session['usuario_id'])
-    tutores_disponibles = Usuario.obtener_todos_excepto(session['usuario_id'])
+    usuario = Usuario.desde_sesion()
+    tutores_disponibles = DirectorioTutores.excepto(session['usuario_id'])
     return render_template('solicitar_asesoria.html', usuario=usuario, tutores=tutores_disponibles)
 
 @bp.route('/cambiar_tutor/<int:plan_id>', methods=['POST'])
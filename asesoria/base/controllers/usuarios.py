@@ -1,6 +1,6 @@
 from flask import render_template, redirect, request, session, Blueprint, flash
-from base.models.usuario_model import Usuario
-from bcrypt import hashpw, gensalt
+from base.models.usuario_model import MENSAJE_OCUPADO, Usuario
+from base.config.seguridad import BcryptOcupado, hash_password
 
 
 bp = Blueprint('usuarios', __name__, url_prefix='/usuarios')
@@ -11,24 +11,33 @@ def procesar_registro():
     if not Usuario.validar_registro(request.form):
         return redirect('/')
    
-    password_hash = hashpw(request.form['password'].encode('utf-8'), gensalt())
+    try:
+        password = hash_password(request.form['password'])
+    except BcryptOcupado:
+        flash(MENSAJE_OCUPADO, 'registro')
+        return redirect('/')
     data ={
         **request.form,
-        'password' : password_hash.decode('utf-8')
+        'password' : password
     }
    
     usuario_id = Usuario.guardar_usuario(data)
-    session['usuario_id'] = usuario_id
+    if not usuario_id:
+        # Email ya registrado (o error al guardar): el mensaje ya se mostró con flash
+        return redirect('/')
+    # Se guarda en la sesión un resumen del usuario para no consultarlo en cada página
+    Usuario.guardar_en_sesion(Usuario.obtener_por_id(usuario_id))
     flash("¡Bienvenido a tu viaje de crecimiento personal! 🌟", 'exito')
     return redirect('/citas')
 
 @bp.route('/procesar_login', methods=['POST'])
 def procesar_login():
-    if not Usuario.validar_login(request.form):
+    # Una sola consulta: busca el usuario y verifica la contraseña
+    usuario_db = Usuario.autenticar(request.form)
+    if not usuario_db:
         return redirect('/')
    
-    usuario_db = Usuario.obtener_por_email(request.form)
-    session['usuario_id'] = usuario_db.id
+    Usuario.guardar_en_sesion(usuario_db)
     flash(f"¡Qué alegría verte de nuevo, {usuario_db.nombre}! Continúa tu viaje 🎒", 'exito')
     return redirect('/citas')
 
@@ -0,0 +1,132 @@
+# base/models/backfill_model.py
+
+# Copia de los datos antiguos (citas/favoritos) a las tablas nuevas (travel_plans/trip_schedules)
+# Se recorre citas por id en lotes cortos: cada lote es una transacción pequeña, sin bloqueos largos,
+# y si el proceso se corta se reanuda desde el último legacy_cita_id copiado.
+# Uso: flask --app server backfill-travel-plans --lote 500
+
+import re
+import time
+import click
+from base.config.mysqlconnection import connectToMySQL, confirmar_transaccion
+from base.config.sentencias import ESCRITURA, LECTURA, sentencia
+
+# Formato con el que se guardaban los planes en citas: "🌍 destino | inicio a fin | plan"
+PLAN_EN_CITA = re.compile(
+    r'^(?P<cancelado>\[CANCELADO\] )?🌍 (?P<destination>.*?) \| '
+    r'(?P<inicio>\d{4}-\d{2}-\d{2}) a (?P<fin>\d{4}-\d{2}-\d{2}) \| (?P<plan>.*)$',
+    re.DOTALL)
+
+
+class BackfillTravelPlans:
+    db = "proyecto_crud"
+
+    @classmethod
+    def convertir_cita(cls, row):
+        """Convierte una fila de citas en los datos de un travel_plan."""
+        texto = row.get('cita') or ''
+        coincidencia = PLAN_EN_CITA.match(texto)
+        if coincidencia:
+            destination = coincidencia['destination']
+            inicio, fin = coincidencia['inicio'], coincidencia['fin']
+            plan = coincidencia['plan']
+            is_active = not coincidencia['cancelado']
+            description = ''
+        else:
+            # Reflexiones antiguas sin formato de plan: mismas etiquetas que mostraba la vista,
+            # pero con la fecha de creación en lugar de la fecha actual
+            destination = f"Destino #{row['id']}"
+            inicio = fin = row['creado_en'].strftime('%Y-%m-%d')
+            plan = texto
+            is_active = not texto.startswith('[CANCELADO]')
+            description = "Plan migrado desde reflexión"
+        return {
+            'destination': destination[:255],
+            'description': description,
+            'travel_start_date': inicio,
+            'travel_end_date': fin,
+            'plan': plan,
+            'autor_id': row['autor_id'],
+            'is_active': is_active,
+            'legacy_cita_id': row['id'],
+            'creado_en': row['creado_en'],
+            'actualizado_en': row['actualizado_en'],
+        }
+
+    QUERY_ULTIMO_COPIADO = sentencia('backfill.ultimo_copiado', """
+        SELECT COALESCE(MAX(legacy_cita_id), 0) AS ultimo FROM travel_plans;
+    """, LECTURA)
+
+    QUERY_LOTE_CITAS = sentencia('backfill.lote_citas', """
+        SELECT id, cita, autor_id, creado_en, actualizado_en
+        FROM citas WHERE id > %(desde)s ORDER BY id LIMIT %(tamano)s;
+    """, LECTURA, ('desde', 'tamano'))
+
+    QUERY_COPIAR_PLANES = sentencia('backfill.copiar_planes', """
+        INSERT IGNORE INTO travel_plans
+            (destination, description, travel_start_date, travel_end_date, plan, autor_id,
+             is_active, legacy_cita_id, creado_en, actualizado_en)
+        VALUES (%(destination)s, %(description)s, %(travel_start_date)s, %(travel_end_date)s, %(plan)s,
+                %(autor_id)s, %(is_active)s, %(legacy_cita_id)s, %(creado_en)s, %(actualizado_en)s);
+    """, ESCRITURA, ('destination', 'description', 'travel_start_date', 'travel_end_date', 'plan', 'autor_id',
+                     'is_active', 'legacy_cita_id', 'creado_en', 'actualizado_en'))
+
+    QUERY_COPIAR_FAVORITOS = sentencia('backfill.copiar_favoritos', """
+        INSERT IGNORE INTO trip_schedules (travel_plan_id, usuario_id, joined_at)
+        SELECT tp.id, f.usuario_id, f.creado_en
+        FROM favoritos f
+        JOIN travel_plans tp ON tp.legacy_cita_id = f.cita_id
+        WHERE f.cita_id > %(desde)s AND f.cita_id <= %(hasta)s;
+    """, ESCRITURA, ('desde', 'hasta'))
+
+    @classmethod
+    def ultimo_copiado(cls):
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_ULTIMO_COPIADO)
+        if resultado is False:
+            raise click.ClickException("No se pudo leer travel_plans. ¿Se aplicaron las migraciones (flask migrar)?")
+        return resultado[0]['ultimo']
+
+    @classmethod
+    def copiar_lote(cls, desde, tamano):
+        """Copia las citas con id > desde (hasta 'tamano') y sus favoritos. Devuelve el último id copiado."""
+        filas = connectToMySQL(cls.db).query_db(cls.QUERY_LOTE_CITAS, {'desde': desde, 'tamano': tamano})
+        if filas is False:
+            raise click.ClickException("No se pudo leer la tabla citas")
+        if not filas:
+            return None
+
+        planes = [cls.convertir_cita(row) for row in filas]
+        if connectToMySQL(cls.db).query_many(cls.QUERY_COPIAR_PLANES, planes) is False:
+            raise click.ClickException(f"Falló la copia de las citas {filas[0]['id']}-{filas[-1]['id']}")
+
+        hasta = filas[-1]['id']
+        if connectToMySQL(cls.db).query_db(cls.QUERY_COPIAR_FAVORITOS, {'desde': desde, 'hasta': hasta}) is False:
+            raise click.ClickException(f"Falló la copia de los favoritos de las citas {desde + 1}-{hasta}")
+        return hasta
+
+    @classmethod
+    def ejecutar(cls, tamano=500, pausa=0.0):
+        desde = cls.ultimo_copiado()
+        if desde:
+            click.echo(f"Reanudando después de la cita {desde}")
+        copiadas = 0
+        while True:
+            hasta = cls.copiar_lote(desde, tamano)
+            if hasta is None:
+                break
+            # Cada lote se confirma por separado: si falla el siguiente, este ya quedó copiado
+            confirmar_transaccion()
+            copiadas += 1
+            click.echo(f"Copiadas las citas {desde + 1}-{hasta}")
+            desde = hasta
+            if pausa:
+                time.sleep(pausa)
+        click.echo(f"Listo: {copiadas} lote(s) copiados")
+
+
+@click.command('backfill-travel-plans')
+@click.option('--lote', default=500, show_default=True, help="Citas copiadas por transacción.")
+@click.option('--pausa', default=0.0, show_default=True, help="Segundos de espera entre lotes.")
+def backfill_travel_plans(lote, pausa):
+    """Copia citas/favoritos a travel_plans/trip_schedules (se puede reanudar)."""
+    BackfillTravelPlans.ejecutar(lote, pausa)
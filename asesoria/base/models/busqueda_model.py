@@ -0,0 +1,271 @@
+# base/models/busqueda_model.py
+
+# Búsqueda de planes con un índice invertido en memoria
+# Cada término (sin tildes ni mayúsculas) apunta a los planes que lo contienen, así una búsqueda
+# no recorre la tabla travel_plans con LIKE '%...%'. El índice se construye una vez por proceso,
+# lo mantienen al día crear_plan_viaje/actualizar_plan/eliminar_plan y se reconstruye cada
+# 'intervalo' segundos para ver los cambios hechos por otros procesos. Funciona igual con MySQL y SQLite.
+
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+import pymysql
+from base.config.mysqlconnection import PoolAgotado, connectToMySQL
+from base.config.sentencias import LECTURA, sentencia
+
+logger = logging.getLogger('asesoria.busqueda')
+
+# Errores de la base de datos al leer los planes: se sigue buscando en el índice anterior y no se
+# vuelve a intentar hasta pasados 'espera_error' segundos. Cualquier otro error es un fallo del código
+ERRORES_BD = (pymysql.MySQLError, sqlite3.Error, PoolAgotado)
+
+# Peso de cada columna en la relevancia: el tema pesa más que las notas y la descripción
+PESOS = {'destination': 3.0, 'plan': 2.0, 'description': 1.0}
+
+# Palabras demasiado comunes en español para distinguir un plan de otro
+PALABRAS_VACIAS = frozenset("""
+    a al algo con de del el en es la las lo los mas me mi mis muy no o para pero por que se sin
+    su sus un una unas unos y ya yo tu te
+""".split())
+
+# Saturación de la frecuencia de un término (como BM25): repetir una palabra suma cada vez menos
+K_FRECUENCIA = 1.2
+# Un término que solo coincide por prefijo vale menos que la palabra completa
+FACTOR_PREFIJO = 0.6
+# Máximo de términos en los que se expande un prefijo (con una o dos letras coinciden muchos)
+MAX_EXPANSION = 64
+
+_RE_PALABRA = re.compile(r"\w+")
+
+
+def plegar(texto):
+    """Texto sin tildes ni mayúsculas (como la collation utf8mb4_0900_ai_ci de MySQL)."""
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+
+
+def raiz(palabra):
+    """Quita la 's' final del plural (viajes -> viaje), igual al indexar y al buscar."""
+    return palabra[:-1] if len(palabra) > 3 and palabra.endswith('s') else palabra
+
+
+def tokenizar(texto, conservar_ultima=False):
+    """
+    Términos de un texto, en orden y sin palabras vacías. Con conservar_ultima la última palabra se
+    conserva aunque sea vacía: mientras se escribe puede ser el principio de otra ("la" -> "laboratorio").
+    """
+    if not texto:
+        return []
+    palabras = _RE_PALABRA.findall(plegar(texto))
+    terminos = [raiz(p) for p in palabras if p not in PALABRAS_VACIAS]
+    if conservar_ultima and palabras and palabras[-1] in PALABRAS_VACIAS:
+        terminos.append(palabras[-1])
+    return terminos
+
+
+class _Indice:
+    """Índice invertido: término -> {plan_id: peso}, con los términos ordenados para buscar prefijos."""
+    __slots__ = ('postings', 'terminos', 'documentos')
+
+    def __init__(self):
+        self.postings = {}
+        self.terminos = []
+        # plan_id -> {columna: términos}, para actualizar o quitar un plan sin releerlo
+        self.documentos = {}
+
+    def agregar(self, plan_id, campos):
+        """Indexa (o vuelve a indexar) las columnas indicadas de un plan; las demás se conservan."""
+        anteriores = self.documentos.get(plan_id)
+        if anteriores is not None:
+            self._retirar(plan_id, anteriores)
+            campos = dict(anteriores, **campos)
+        self.documentos[plan_id] = campos
+        frecuencias = {}
+        for campo, terminos in campos.items():
+            for termino in terminos:
+                frecuencias[termino] = frecuencias.get(termino, 0.0) + PESOS[campo]
+        for termino, frecuencia in frecuencias.items():
+            planes = self.postings.get(termino)
+            if planes is None:
+                planes = self.postings[termino] = {}
+                pos = bisect_left(self.terminos, termino)
+                self.terminos.insert(pos, termino)
+            planes[plan_id] = frecuencia * (K_FRECUENCIA + 1) / (frecuencia + K_FRECUENCIA)
+
+    def quitar(self, plan_id):
+        campos = self.documentos.pop(plan_id, None)
+        if campos is not None:
+            self._retirar(plan_id, campos)
+
+    def _retirar(self, plan_id, campos):
+        for termino in {t for terminos in campos.values() for t in terminos}:
+            planes = self.postings.get(termino)
+            if planes is None:
+                continue
+            planes.pop(plan_id, None)
+            if not planes:
+                del self.postings[termino]
+                pos = bisect_left(self.terminos, termino)
+                if pos < len(self.terminos) and self.terminos[pos] == termino:
+                    del self.terminos[pos]
+
+    def con_prefijo(self, prefijo):
+        """Términos que empiezan por el prefijo (el propio prefijo primero si es un término)."""
+        resultado = []
+        pos = bisect_left(self.terminos, prefijo)
+        while pos < len(self.terminos) and len(resultado) < MAX_EXPANSION:
+            termino = self.terminos[pos]
+            if not termino.startswith(prefijo):
+                break
+            resultado.append(termino)
+            pos += 1
+        return resultado
+
+    def buscar(self, terminos, prefijo_final=True):
+        """
+        Planes que contienen todos los términos, ordenados por relevancia (y los más nuevos primero).
+        Con prefijo_final el último término también coincide con las palabras que empiezan por él.
+        """
+        total = len(self.documentos) or 1
+        puntajes = None
+        for i, termino in enumerate(terminos):
+            if prefijo_final and i == len(terminos) - 1:
+                candidatos = self.con_prefijo(termino)
+            else:
+                candidatos = [termino] if termino in self.postings else []
+            parcial = {}
+            for candidato in candidatos:
+                planes = self.postings[candidato]
+                idf = math.log(1 + total / len(planes))
+                factor = 1.0 if candidato == termino else FACTOR_PREFIJO
+                for plan_id, peso in planes.items():
+                    puntaje = peso * idf * factor
+                    if puntaje > parcial.get(plan_id, 0.0):
+                        parcial[plan_id] = puntaje
+            if puntajes is None:
+                puntajes = parcial
+            else:
+                puntajes = {plan_id: p + parcial[plan_id] for plan_id, p in puntajes.items() if plan_id in parcial}
+            if not puntajes:
+                return []
+        return sorted(puntajes or (), key=lambda plan_id: (-puntajes[plan_id], -plan_id))
+
+
+class IndicePlanes:
+    """
+    Índice de búsqueda de los planes del proceso. Se carga la primera vez que se busca, se actualiza
+    al crear, editar o borrar planes y se reconstruye cada 'intervalo' segundos.
+    """
+    db = "proyecto_crud"
+    intervalo = 300.0
+    espera_error = 30.0
+
+    _indice = None
+    _cargado_en = 0.0
+    _reintentar_en = 0.0
+    # _lock protege el índice; _lock_carga evita dos reconstrucciones a la vez
+    _lock = threading.Lock()
+    _lock_carga = threading.Lock()
+    # Cambios hechos mientras se reconstruye: se aplican también al índice nuevo
+    _cambios = None
+
+    QUERY_TEXTOS = sentencia('busqueda.textos', "SELECT id, destination, description, plan FROM travel_plans;",
+                             LECTURA)
+
+    @classmethod
+    def _construir(cls):
+        indice = _Indice()
+        try:
+            for row in connectToMySQL(cls.db).query_stream(cls.QUERY_TEXTOS):
+                indice.agregar(row['id'], {campo: tokenizar(row[campo]) for campo in PESOS})
+        except ERRORES_BD as e:
+            logger.warning("No se pudo construir el índice de búsqueda (se reintenta en %.0f s): %s",
+                           cls.espera_error, e)
+            return None
+        return indice
+
+    @classmethod
+    def _al_dia(cls):
+        ahora = time.monotonic()
+        return (cls._indice is not None and ahora - cls._cargado_en < cls.intervalo) or ahora < cls._reintentar_en
+
+    @classmethod
+    def _vigente(cls):
+        if cls._al_dia():
+            return cls._indice or _Indice()
+        with cls._lock_carga:
+            if cls._al_dia():
+                return cls._indice or _Indice()
+            with cls._lock:
+                cls._cambios = []
+            try:
+                nuevo = cls._construir()
+            except Exception:
+                with cls._lock:
+                    cls._cambios = None
+                raise
+            with cls._lock:
+                cambios, cls._cambios = cls._cambios, None
+                if nuevo is None:
+                    # Si la base de datos falla seguimos buscando en el índice anterior
+                    cls._reintentar_en = time.monotonic() + cls.espera_error
+                    return cls._indice or _Indice()
+                for plan_id, campos in cambios:
+                    if campos is None:
+                        nuevo.quitar(plan_id)
+                    else:
+                        nuevo.agregar(plan_id, campos)
+                cls._indice = nuevo
+                cls._cargado_en = time.monotonic()
+            return nuevo
+
+    @classmethod
+    def _aplicar(cls, plan_id, campos):
+        with cls._lock:
+            if cls._cambios is not None:
+                cls._cambios.append((plan_id, campos))
+            if cls._indice is not None:
+                if campos is None:
+                    cls._indice.quitar(plan_id)
+                else:
+                    cls._indice.agregar(plan_id, campos)
+
+    @classmethod
+    def indexar(cls, plan_id, **columnas):
+        """Indexa un plan nuevo o las columnas que cambiaron de uno existente (destination, plan, description)."""
+        cls._aplicar(plan_id, {campo: tokenizar(texto) for campo, texto in columnas.items() if campo in PESOS})
+
+    @classmethod
+    def quitar(cls, plan_id):
+        """Saca un plan borrado del índice."""
+        cls._aplicar(plan_id, None)
+
+    @classmethod
+    def buscar(cls, texto, pagina=1, por_pagina=10):
+        """
+        Ids de los planes de la página pedida, por relevancia, y el total de resultados.
+        La última palabra se busca también como prefijo (para sugerir mientras se escribe).
+        """
+        if not texto:
+            return [], 0
+        # Si el texto termina en espacio la última palabra ya está completa
+        prefijo_final = not texto[-1].isspace()
+        terminos = tokenizar(texto, conservar_ultima=prefijo_final)
+        if not terminos:
+            return [], 0
+        indice = cls._vigente()
+        with cls._lock:
+            ids = indice.buscar(terminos, prefijo_final)
+        inicio = (max(pagina, 1) - 1) * por_pagina
+        return ids[inicio:inicio + por_pagina], len(ids)
+
+    @classmethod
+    def invalidar(cls):
+        """Obliga a reconstruir el índice en la próxima búsqueda (p. ej. tras copiar datos en bloque)."""
+        cls._cargado_en = 0.0
+        cls._reintentar_en = 0.0
@@ -4,16 +4,21 @@
 #Encapsulamos la logica de las citas y favoritos en la base de datos
 
 from base.config.mysqlconnection import connectToMySQL
+from base.config.sentencias import ESCRITURA, INSERCION, LECTURA, sentencia
+from base.models.hidratacion import ModeloFila
 from flask import flash
 
-class Citas:
+class Citas(ModeloFila):
+    QUERY_POR_AUTOR = sentencia('citas.por_autor', "SELECT * FROM citas WHERE autor_id = %(autor_id)s;",
+                                LECTURA, ('autor_id',))
+
     @classmethod
     def obtener_por_autor(cls, autor_id):
-        query = "SELECT * FROM citas WHERE autor_id = %(autor_id)s;"
         data = {'autor_id': autor_id}
-        resultado = connectToMySQL(cls.db).query_db(query, data)
-        return [cls(row) for row in resultado]
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_POR_AUTOR, data)
+        return cls.desde_filas(resultado)
     db = "proyecto_crud"
+    __slots__ = ('id', 'cita', 'autor_id', 'creado_en', 'actualizado_en')
 
     def __init__(self, data):
         self.id = data['id']
@@ -22,40 +27,48 @@ class Citas:
         self.creado_en = data['creado_en']
         self.actualizado_en = data['actualizado_en']
 
+    QUERY_GUARDAR = sentencia('citas.guardar', "INSERT INTO citas(cita, autor_id) VALUES (%(cita)s, %(autor_id)s);",
+                              INSERCION, ('cita', 'autor_id'))
+    QUERY_POR_ID = sentencia('citas.por_id', "SELECT * FROM citas WHERE id = %(id)s;", LECTURA, ('id',))
+    # Se responde desde la caché de consultas si está activada
+    QUERY_TODAS = sentencia('citas.todas', "SELECT * FROM citas;", LECTURA, cachear=True)
+    QUERY_ACTUALIZAR = sentencia('citas.actualizar', "UPDATE citas SET cita = %(cita)s WHERE id = %(id)s;",
+                                 ESCRITURA, ('cita', 'id'))
+    QUERY_ELIMINAR = sentencia('citas.eliminar', "DELETE FROM citas WHERE id = %(id)s;", ESCRITURA, ('id',))
+
     @classmethod
     def guardar_cita(cls, data):
-        query = "INSERT INTO citas(cita, autor_id) VALUES (%(cita)s, %(autor_id)s);"
-        resultado = connectToMySQL(cls.db).query_db(query, data)
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_GUARDAR, data)
         return resultado
 
     @classmethod
     def obtener_por_id(cls, cita_id):
-        query = "SELECT * FROM citas WHERE id = %(id)s;"
         data = {'id': cita_id}
-        resultado = connectToMySQL(cls.db).query_db(query, data)
-        if not resultado:
-            return None
-        return cls(resultado[0])
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_POR_ID, data)
+        return cls.desde_fila(resultado[0] if resultado else None)
 
     @classmethod
     def obtener_todas(cls):
-        query = "SELECT * FROM citas;"
-        resultado = connectToMySQL(cls.db).query_db(query)
-        citas = []
-        for row in resultado:
-            citas.append(cls(row))
-        return citas
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_TODAS)
+        return cls.desde_filas(resultado)
+
+    @classmethod
+    def iterar_todas(cls):
+        # Como obtener_todas, pero construye cada cita a medida que llega del servidor
+        return connectToMySQL(cls.db).query_stream(cls.QUERY_TODAS, convertir=cls)
+
+    @classmethod
+    def iterar_por_autor(cls, autor_id):
+        return connectToMySQL(cls.db).query_stream(cls.QUERY_POR_AUTOR, {'autor_id': autor_id}, convertir=cls)
 
     @classmethod
     def actualizar_cita(cls, data):
-        query = "UPDATE citas SET cita = %(cita)s WHERE id = %(id)s;"
-        resultado = connectToMySQL(cls.db).query_db(query, data)
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_ACTUALIZAR, data)
 
     @classmethod
     def eliminar_cita(cls, cita_id):
-        query = "DELETE FROM citas WHERE id = %(id)s;"
         data = {'id': cita_id}
-        return connectToMySQL(cls.db).query_db(query, data)
+        return connectToMySQL(cls.db).query_db(cls.QUERY_ELIMINAR, data)
 
     @classmethod
     def validar_cita(cls, cita):
@@ -66,31 +79,38 @@ class Citas:
         return is_valid
 
     # FAVORITOS
+    QUERY_AGREGAR_FAVORITO = sentencia('citas.agregar_favorito',
+                                       "INSERT INTO favoritos (usuario_id, cita_id) VALUES (%(usuario_id)s, %(cita_id)s);",
+                                       INSERCION, ('usuario_id', 'cita_id'))
+    QUERY_QUITAR_FAVORITO = sentencia('citas.quitar_favorito',
+                                      "DELETE FROM favoritos WHERE usuario_id = %(usuario_id)s AND cita_id = %(cita_id)s;",
+                                      ESCRITURA, ('usuario_id', 'cita_id'))
+    QUERY_FAVORITAS = sentencia('citas.favoritas', ("SELECT c.* FROM citas c "
+                                                    "JOIN favoritos f ON c.id = f.cita_id "
+                                                    "WHERE f.usuario_id = %(usuario_id)s;"),
+                                LECTURA, ('usuario_id',))
+    QUERY_NO_FAVORITAS = sentencia('citas.no_favoritas', ("SELECT * FROM citas WHERE id NOT IN "
+                                                          "(SELECT cita_id FROM favoritos WHERE usuario_id = %(usuario_id)s)"),
+                                   LECTURA, ('usuario_id',))
+
     @classmethod
     def agregar_favorito(cls, usuario_id, cita_id):
-        query = "INSERT INTO favoritos (usuario_id, cita_id) VALUES (%(usuario_id)s, %(cita_id)s);"
         data = {'usuario_id': usuario_id, 'cita_id': cita_id}
-        return connectToMySQL(cls.db).query_db(query, data)
+        return connectToMySQL(cls.db).query_db(cls.QUERY_AGREGAR_FAVORITO, data)
 
     @classmethod
     def quitar_favorito(cls, usuario_id, cita_id):
-        query = "DELETE FROM favoritos WHERE usuario_id = %(usuario_id)s AND cita_id = %(cita_id)s;"
         data = {'usuario_id': usuario_id, 'cita_id': cita_id}
-        return connectToMySQL(cls.db).query_db(query, data)
+        return connectToMySQL(cls.db).query_db(cls.QUERY_QUITAR_FAVORITO, data)
 
     @classmethod
     def obtener_favoritas_usuario(cls, usuario_id):
-        query = ("SELECT c.* FROM citas c "
-                 "JOIN favoritos f ON c.id = f.cita_id "
-                 "WHERE f.usuario_id = %(usuario_id)s;")
         data = {'usuario_id': usuario_id}
-        resultado = connectToMySQL(cls.db).query_db(query, data)
-        return [cls(row) for row in resultado]
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_FAVORITAS, data)
+        return cls.desde_filas(resultado)
 
     @classmethod
     def obtener_no_favoritas_usuario(cls, usuario_id):
-        query = ("SELECT * FROM citas WHERE id NOT IN "
-                 "(SELECT cita_id FROM favoritos WHERE usuario_id = %(usuario_id)s)")
         data = {'usuario_id': usuario_id}
-        resultado = connectToMySQL(cls.db).query_db(query, data)
-        return [cls(row) for row in resultado]
\ No newline at end of file
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_NO_FAVORITAS, data)
+        return cls.desde_filas(resultado)
\ No newline at end of file
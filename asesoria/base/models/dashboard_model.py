@@ -0,0 +1,101 @@
+# base/models/dashboard_model.py
+
+# Cargador de datos del dashboard (/citas/)
+# Los planes del usuario y la primera página del feed salen de una sola sentencia (UNION ALL); el
+# usuario viene del snapshot de la sesión y los tutores del directorio en memoria de tutor_model. Los
+# avatares de participantes de todas las tarjetas se piden después con una sola consulta más
+
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Union
+from base.config.mysqlconnection import connectToMySQL
+from base.config.sentencias import LECTURA, sentencia
+from base.models.travel_plan_model import TravelPlan
+from base.models.usuario_model import Usuario, UsuarioSesion
+from base.models.tutor_model import DirectorioTutores, Tutor
+
+
+@dataclass
+class DashboardCitas:
+    """Modelo de vista de citas_simple.html."""
+    usuario: Optional[Union[Usuario, UsuarioSesion]]
+    mis_asesorias: List[TravelPlan] = field(default_factory=list)
+    todas_las_asesorias: List[TravelPlan] = field(default_factory=list)
+    tutores: Iterable[Tutor] = field(default_factory=list)
+    # Cursor para pedir la siguiente página del feed ("Cargar más"), None si no hay más
+    siguiente_cursor: Optional[str] = None
+
+    db = "proyecto_crud"
+
+    # planes.por_autor y la primera página de planes.feed en una sentencia; 'origen' dice de cuál viene
+    # cada fila. El feed va en una tabla derivada para poder llevar su propio ORDER BY ... LIMIT
+    # (MySQL y SQLite)
+    QUERY_PLANES = sentencia('dashboard.planes', """
+        SELECT tp.*, u.nombre as autor_nombre, u.apellido as autor_apellido, 'propio' AS origen
+        FROM travel_plans tp
+        JOIN usuarios u ON tp.autor_id = u.id
+        WHERE tp.autor_id = %(usuario_id)s
+        UNION ALL
+        SELECT feed.* FROM (
+            SELECT tp.*, u.nombre as autor_nombre, u.apellido as autor_apellido, 'feed' AS origen
+            FROM travel_plans tp
+            JOIN usuarios u ON tp.autor_id = u.id
+            LEFT JOIN trip_schedules ts ON ts.travel_plan_id = tp.id AND ts.usuario_id = %(usuario_id)s
+            WHERE tp.autor_id != %(usuario_id)s AND ts.id IS NULL
+            ORDER BY tp.creado_en DESC, tp.id DESC
+            LIMIT %(limite)s
+        ) feed
+        ORDER BY creado_en DESC, id DESC;
+    """, LECTURA, ('usuario_id', 'limite'))
+
+    @classmethod
+    def cargar(cls, usuario_id, usuario=None, limite=10):
+        """
+        Carga los planes del dashboard con una sola sentencia (QUERY_PLANES) y los avatares con otra.
+        Si se pasa el usuario (p. ej. el snapshot de la sesión) no se vuelve a consultar.
+        """
+        # Una fila de más en el feed para saber si hay otra página (como TravelPlan.consulta_feed)
+        filas = connectToMySQL(cls.db).query_db(cls.QUERY_PLANES, {'usuario_id': usuario_id, 'limite': limite + 1})
+        if filas is False:
+            # Si la consulta falla usamos el camino de siempre, consulta por consulta
+            return cls.cargar_por_separado(usuario_id, usuario)
+
+        if usuario is None:
+            usuario = Usuario.obtener_por_id(usuario_id)
+        planes_rows = [fila for fila in filas if fila['origen'] == 'propio']
+        otros_rows = [fila for fila in filas if fila['origen'] == 'feed']
+        todas_las_asesorias, siguiente_cursor = TravelPlan.pagina_feed(otros_rows, limite)
+        mis_asesorias = TravelPlan.desde_filas(planes_rows)
+        # Participantes de todas las tarjetas en una consulta (no una por plan)
+        TravelPlan.cargar_participantes(mis_asesorias + todas_las_asesorias)
+        return cls(
+            usuario=usuario,
+            mis_asesorias=mis_asesorias,
+            todas_las_asesorias=todas_las_asesorias,
+            siguiente_cursor=siguiente_cursor,
+            # Los tutores salen del directorio en memoria, no de la base de datos
+            tutores=DirectorioTutores.excepto(usuario_id),
+        )
+
+    @classmethod
+    def cargar_por_separado(cls, usuario_id, usuario=None):
+        """Camino original: una consulta por cada método del modelo."""
+        todas_las_asesorias, siguiente_cursor = TravelPlan.obtener_feed(usuario_id)
+        mis_asesorias = TravelPlan.obtener_por_autor(usuario_id)
+        TravelPlan.cargar_participantes(mis_asesorias + todas_las_asesorias)
+        return cls(
+            usuario=usuario or Usuario.obtener_por_id(usuario_id),
+            mis_asesorias=mis_asesorias,
+            todas_las_asesorias=todas_las_asesorias,
+            siguiente_cursor=siguiente_cursor,
+            tutores=DirectorioTutores.excepto(usuario_id),
+        )
+
+    def contexto(self):
+        """Variables que espera la plantilla citas_simple.html."""
+        return {
+            'usuario': self.usuario,
+            'mis_asesorias': self.mis_asesorias,
+            'todas_las_asesorias': self.todas_las_asesorias,
+            'tutores': self.tutores,
+            'siguiente_cursor': self.siguiente_cursor,
+        }
@@ -0,0 +1,23 @@
+# base/models/hidratacion.py
+
+# Construcción de modelos desde filas del cursor
+# Los modelos declaran __slots__ (sin __dict__ por instancia: menos memoria y acceso más rápido)
+# y su __init__ copia las columnas de la fila tal cual, sin convertir fechas: DATE y DATETIME
+# llegan de PyMySQL como date/datetime y así se quedan hasta que la plantilla las formatea.
+
+
+class ModeloFila:
+    """Base de los modelos que se construyen desde una fila (dict) del DictCursor."""
+    __slots__ = ()
+
+    @classmethod
+    def desde_fila(cls, fila):
+        """Una instancia, o None si no hay fila."""
+        return cls(fila) if fila else None
+
+    @classmethod
+    def desde_filas(cls, filas):
+        """Lista de instancias; acepta el False/() que devuelve query_db cuando falla o no hay filas."""
+        if not filas:
+            return []
+        return list(map(cls, filas))
@@ -1,149 +1,188 @@
 # base/models/travel_plan_model.py
 
 # Modelo de Plan de Viaje
-# NOTA: Este modelo usa la tabla 'citas' temporalmente hasta ejecutar la migración
-# Una vez ejecutada la migración, usará la tabla 'travel_plans'
+# Lee y escribe en las tablas 'travel_plans' y 'trip_schedules' (ver migraciones/)
+# Los datos antiguos de 'citas'/'favoritos' se copian con el comando 'flask backfill-travel-plans'
+# travel_plans.participantes_count se corrige con 'flask reconciliar-participantes'
 
-from base.config.mysqlconnection import connectToMySQL
+import time
+import click
+from base.config.mysqlconnection import connectToMySQL, confirmar_transaccion, deshacer_transaccion
+from base.config.sentencias import ESCRITURA, INSERCION, LECTURA, sentencia
+from base.config.cache_fragmentos import invalidar as invalidar_fragmentos
+from base.models.busqueda_model import IndicePlanes
+from base.models.tutor_model import DirectorioTutores
+from base.models.hidratacion import ModeloFila
 from flask import flash
-from datetime import datetime, timedelta
+from datetime import datetime
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from itertools import groupby
+from operator import itemgetter
 
-class TravelPlan:
+class TravelPlan(ModeloFila):
     db = "proyecto_crud"
+    __slots__ = ('id', 'destination', 'description', 'travel_start_date', 'travel_end_date', 'plan',
+                 'is_active', 'autor_id', 'creado_en', 'actualizado_en', 'autor_nombre', 'autor_apellido',
+                 'participantes_count', 'joined_at', 'es_propio', 'primeros_participantes')
 
     def __init__(self, data):
-        # Compatibilidad con ambas estructuras de tabla
         self.id = data['id']
-        
-        # Si viene de la tabla travel_plans (nueva estructura)
-        if 'destination' in data:
-            self.destination = data['destination']
-            self.description = data.get('description', '')
-            self.travel_start_date = data['travel_start_date']
-            self.travel_end_date = data['travel_end_date']
-            self.plan = data['plan']
-            self.is_active = data.get('is_active', True)
-        else:
-            # Si viene de la tabla citas (estructura actual)
-            # Simulamos los campos necesarios
-            self.destination = f"Destino #{data['id']}"
-            self.description = "Plan migrado desde reflexión"
-            # Convertir fechas a strings para el template
-            fecha_actual = datetime.now()
-            self.travel_start_date = fecha_actual.strftime('%Y-%m-%d')
-            self.travel_end_date = (fecha_actual + timedelta(days=7)).strftime('%Y-%m-%d')
-            self.plan = data.get('cita', 'Plan de viaje')
-            self.is_active = True
-            
+        self.destination = data['destination']
+        self.description = data.get('description', '')
+        # date nativos: las plantillas los formatean (str() da YYYY-MM-DD para los <input type="date">)
+        self.travel_start_date = data['travel_start_date']
+        self.travel_end_date = data['travel_end_date']
+        self.plan = data['plan']
+        self.is_active = data.get('is_active', True)
         self.autor_id = data['autor_id']
         self.creado_en = data['creado_en']
         self.actualizado_en = data['actualizado_en']
+        # Contador mantenido al unirse/cancelar (sin el autor)
+        self.participantes_count = data.get('participantes_count', 0)
         
         # Para joins con usuarios
         self.autor_nombre = data.get('autor_nombre', '')
         self.autor_apellido = data.get('autor_apellido', '')
-        
-        # Asegurar que las fechas siempre sean strings para el template
-        if hasattr(self.travel_start_date, 'strftime'):
-            self.travel_start_date = self.travel_start_date.strftime('%Y-%m-%d')
-        if hasattr(self.travel_end_date, 'strftime'):
-            self.travel_end_date = self.travel_end_date.strftime('%Y-%m-%d')
+
+        # Solo en obtener_trip_schedules: cuándo se unió y si el plan es del usuario
+        self.joined_at = None
+        self.es_propio = None
+
+        # Solo tras cargar_participantes: los primeros participantes (para los avatares de las tarjetas)
+        self.primeros_participantes = []
+
+    QUERY_CREAR = sentencia('planes.crear', """
+        INSERT INTO travel_plans (destination, description, travel_start_date, travel_end_date, plan, autor_id)
+        VALUES (%(destination)s, %(description)s, %(travel_start_date)s, %(travel_end_date)s, %(plan)s, %(autor_id)s);
+    """, INSERCION, ('destination', 'description', 'travel_start_date', 'travel_end_date', 'plan', 'autor_id'))
 
     @classmethod
     def crear_plan_viaje(cls, data):
-        """Crear un nuevo plan de viaje - usando tabla citas temporalmente"""
-        query = """
-            INSERT INTO citas (cita, autor_id) 
-            VALUES (%(plan_description)s, %(autor_id)s);
-        """
-        # Crear una descripción combinada para la tabla citas
-        plan_description = f"🌍 {data['destination']} | {data['travel_start_date']} a {data['travel_end_date']} | {data['plan']}"
-        temp_data = {
-            'plan_description': plan_description,
+        """Crear un nuevo plan de viaje"""
+        datos = {
+            'destination': data['destination'],
+            'description': data.get('description', ''),
+            'travel_start_date': data['travel_start_date'],
+            'travel_end_date': data['travel_end_date'],
+            'plan': data['plan'],
             'autor_id': data['autor_id']
         }
-        resultado = connectToMySQL(cls.db).query_db(query, temp_data)
-        return resultado
+        plan_id = connectToMySQL(cls.db).query_db(cls.QUERY_CREAR, datos)
+        if plan_id:
+            IndicePlanes.indexar(plan_id, destination=datos['destination'], description=datos['description'],
+                                 plan=datos['plan'])
+        return plan_id
+
+    # Las lecturas por id y por autor se responden desde la caché de consultas si está activada
+    QUERY_POR_ID = sentencia('planes.por_id', """
+        SELECT tp.*, u.nombre as autor_nombre, u.apellido as autor_apellido
+        FROM travel_plans tp
+        JOIN usuarios u ON tp.autor_id = u.id
+        WHERE tp.id = %(id)s;
+    """, LECTURA, ('id',), cachear=True)
 
     @classmethod
     def obtener_por_id(cls, plan_id):
         """Obtener un plan por ID con información del autor"""
-        # Intentar primero con la tabla travel_plans
-        query = """
-            SELECT tp.*, u.nombre as autor_nombre, u.apellido as autor_apellido
-            FROM travel_plans tp
-            JOIN usuarios u ON tp.autor_id = u.id
-            WHERE tp.id = %(id)s;
-        """
         data = {'id': plan_id}
-        resultado = connectToMySQL(cls.db).query_db(query, data)
-        
-        if not resultado:
-            # Si no existe en travel_plans, intentar con citas (tabla temporal)
-            query = """
-                SELECT c.*, u.nombre as autor_nombre, u.apellido as autor_apellido
-                FROM citas c
-                JOIN usuarios u ON c.autor_id = u.id
-                WHERE c.id = %(id)s;
-            """
-            resultado = connectToMySQL(cls.db).query_db(query, data)
-            
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_POR_ID, data)
+        return cls.desde_fila(resultado[0] if resultado else None)
+
+    QUERY_EXISTE = sentencia('planes.existe', """
+        SELECT id FROM travel_plans WHERE id = %(id)s;
+    """, LECTURA, ('id',))
+
+    @classmethod
+    def existe(cls, plan_id):
+        """True si el plan existe, False si no, None si falló la consulta"""
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_EXISTE, {'id': plan_id})
+        if resultado is False:
+            return None
+        return bool(resultado)
+
+    QUERY_POR_IDS = sentencia('planes.por_ids', """
+        SELECT tp.*, u.nombre as autor_nombre, u.apellido as autor_apellido
+        FROM travel_plans tp
+        JOIN usuarios u ON tp.autor_id = u.id
+        WHERE tp.id IN %(ids)s;
+    """, LECTURA, ('ids',))
+
+    @classmethod
+    def obtener_por_ids(cls, plan_ids):
+        """Obtener varios planes con una sola consulta (IN). Devuelve {id: plan} con los que existen"""
+        plan_ids = tuple(dict.fromkeys(plan_ids))
+        if not plan_ids:
+            return {}
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_POR_IDS, {'ids': plan_ids})
+        return {plan.id: plan for plan in cls.desde_filas(resultado)}
+
+    @classmethod
+    def buscar(cls, texto, pagina=1, por_pagina=10):
+        """Buscar planes por tema, notas y descripción (índice en memoria). Devuelve (planes, total)"""
+        ids, total = IndicePlanes.buscar(texto, pagina, por_pagina)
+        planes = cls.obtener_por_ids(ids)
+        # Se respeta el orden por relevancia; los que ya no existen se omiten
+        return [planes[plan_id] for plan_id in ids if plan_id in planes], total
+
+    # Las páginas de un plan también muestran los tutores: su versión viene en la misma consulta
+    QUERY_VERSION = sentencia('planes.version', f"""
+        SELECT tp.actualizado_en, u.actualizado_en AS autor_actualizado_en,
+               COUNT(ts.id) AS participantes, COALESCE(MAX(ts.id), 0) AS ultimo_participante,
+               COALESCE(SUM(ts.usuario_id), 0) AS suma_participantes,
+               {DirectorioTutores.COLUMNAS_VERSION.strip()}
+        FROM travel_plans tp
+        JOIN usuarios u ON tp.autor_id = u.id
+        LEFT JOIN trip_schedules ts ON ts.travel_plan_id = tp.id
+        WHERE tp.id = %(id)s
+        GROUP BY tp.id, tp.actualizado_en, u.actualizado_en;
+    """, LECTURA, ('id',))
+
+    @classmethod
+    def obtener_version(cls, plan_id):
+        """
+        Versión barata de las páginas de un plan para validar cachés: su actualizado_en, el de su autor,
+        un resumen del conjunto de participantes (cuántos, el último y la suma de sus ids) y la versión
+        del directorio de tutores. None si no existe.
+        """
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_VERSION, {'id': plan_id})
         if not resultado:
             return None
-        return cls(resultado[0])
+        row = resultado[0]
+        return (f"{row['actualizado_en']}|{row['autor_actualizado_en']}|{row['participantes']}"
+                f"|{row['ultimo_participante']}|{row['suma_participantes']}|{DirectorioTutores.version_de(row)}")
+
+    QUERY_POR_AUTOR = sentencia('planes.por_autor', """
+        SELECT tp.*, u.nombre as autor_nombre, u.apellido as autor_apellido
+        FROM travel_plans tp
+        JOIN usuarios u ON tp.autor_id = u.id
+        WHERE tp.autor_id = %(autor_id)s ORDER BY tp.creado_en DESC;
+    """, LECTURA, ('autor_id',), cachear=True)
 
     @classmethod
     def obtener_por_autor(cls, autor_id):
         """Obtener planes de un autor con información del autor"""
-        # Intentar primero con travel_plans
-        query = """
-            SELECT tp.*, u.nombre as autor_nombre, u.apellido as autor_apellido
-            FROM travel_plans tp
-            JOIN usuarios u ON tp.autor_id = u.id
-            WHERE tp.autor_id = %(autor_id)s ORDER BY tp.creado_en DESC;
-        """
         data = {'autor_id': autor_id}
-        resultado = connectToMySQL(cls.db).query_db(query, data)
-        
-        if not resultado:
-            # Si no hay en travel_plans, usar citas
-            query = """
-                SELECT c.*, u.nombre as autor_nombre, u.apellido as autor_apellido
-                FROM citas c
-                JOIN usuarios u ON c.autor_id = u.id
-                WHERE c.autor_id = %(autor_id)s ORDER BY c.creado_en DESC;
-            """
-            resultado = connectToMySQL(cls.db).query_db(query, data)
-            
-        return [cls(row) for row in resultado]
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_POR_AUTOR, data)
+        return cls.desde_filas(resultado)
+
+    # Planes de otros usuarios a los que se unió
+    QUERY_UNIDOS = sentencia('planes.unidos', """
+        SELECT tp.*, u.nombre as autor_nombre, u.apellido as autor_apellido, ts.joined_at
+        FROM travel_plans tp
+        JOIN trip_schedules ts ON tp.id = ts.travel_plan_id
+        JOIN usuarios u ON tp.autor_id = u.id
+        WHERE ts.usuario_id = %(usuario_id)s AND tp.autor_id != %(usuario_id)s
+        ORDER BY tp.creado_en DESC;
+    """, LECTURA, ('usuario_id',))
 
     @classmethod
     def obtener_trip_schedules(cls, usuario_id):
         """Obtener trip schedules - incluye planes propios Y planes a los que se unió"""
-        # Obtener planes propios (que el usuario creó)
-        query_propios = """
-            SELECT c.*, u.nombre as autor_nombre, u.apellido as autor_apellido
-            FROM citas c
-            JOIN usuarios u ON c.autor_id = u.id
-            WHERE c.autor_id = %(usuario_id)s
-            ORDER BY c.creado_en DESC;
-        """
-        
-        # Obtener planes de otros usuarios a los que se unió (favoritos)
-        query_unidos = """
-            SELECT c.*, u.nombre as autor_nombre, u.apellido as autor_apellido
-            FROM citas c
-            JOIN favoritos f ON c.id = f.cita_id
-            JOIN usuarios u ON c.autor_id = u.id
-            WHERE f.usuario_id = %(usuario_id)s AND c.autor_id != %(usuario_id)s
-            ORDER BY c.creado_en DESC;
-        """
-        
-        data = {'usuario_id': usuario_id}
-        
-        # Obtener ambos conjuntos de datos
-        planes_propios = connectToMySQL(cls.db).query_db(query_propios, data)
-        planes_unidos = connectToMySQL(cls.db).query_db(query_unidos, data)
+        # Obtener ambos conjuntos de datos a la vez (son independientes): los propios y los unidos
+        planes_propios, planes_unidos = connectToMySQL(cls.db).query_concurrent([
+            (cls.QUERY_POR_AUTOR, {'autor_id': usuario_id}),
+            (cls.QUERY_UNIDOS, {'usuario_id': usuario_id}),
+        ])
         
         # Combinar ambos resultados
         todos_los_planes = []
@@ -160,7 +199,7 @@ class TravelPlan:
         if planes_unidos:
             for row in planes_unidos:
                 plan = cls(row)
-                plan.joined_at = row.get('creado_en')
+                plan.joined_at = row.get('joined_at')
                 plan.es_propio = False
                 todos_los_planes.append(plan)
         
@@ -169,79 +208,428 @@ class TravelPlan:
         
         return todos_los_planes
 
+    # Feed de planes de otros usuarios a los que aún no se unió, paginado por cursor (creado_en, id).
+    # El LEFT JOIN ... IS NULL (anti-join) usa el índice único de trip_schedules (travel_plan_id, usuario_id)
+    # y el orden sale del índice (creado_en, id), así que cualquier página cuesta lo mismo que la primera.
+    QUERY_FEED = sentencia('planes.feed', """
+        SELECT tp.*, u.nombre as autor_nombre, u.apellido as autor_apellido
+        FROM travel_plans tp
+        JOIN usuarios u ON tp.autor_id = u.id
+        LEFT JOIN trip_schedules ts ON ts.travel_plan_id = tp.id AND ts.usuario_id = %(usuario_id)s
+        WHERE tp.autor_id != %(usuario_id)s AND ts.id IS NULL
+        ORDER BY tp.creado_en DESC, tp.id DESC
+        LIMIT %(limite)s;
+    """, LECTURA, ('usuario_id', 'limite'))
+
+    QUERY_FEED_DESDE = sentencia('planes.feed_desde', """
+        SELECT tp.*, u.nombre as autor_nombre, u.apellido as autor_apellido
+        FROM travel_plans tp
+        JOIN usuarios u ON tp.autor_id = u.id
+        LEFT JOIN trip_schedules ts ON ts.travel_plan_id = tp.id AND ts.usuario_id = %(usuario_id)s
+        WHERE tp.autor_id != %(usuario_id)s AND ts.id IS NULL
+        AND (tp.creado_en < %(creado_en)s OR (tp.creado_en = %(creado_en)s AND tp.id < %(id)s))
+        ORDER BY tp.creado_en DESC, tp.id DESC
+        LIMIT %(limite)s;
+    """, LECTURA, ('usuario_id', 'creado_en', 'id', 'limite'))
+
+    @staticmethod
+    def codificar_cursor(plan):
+        """Cursor opaco con la posición (creado_en, id) del último plan de la página"""
+        creado_en = plan.creado_en.isoformat() if hasattr(plan.creado_en, 'isoformat') else str(plan.creado_en)
+        return urlsafe_b64encode(f"{creado_en}|{plan.id}".encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decodificar_cursor(cursor):
+        """Devuelve (creado_en, id) o None si el cursor no es válido"""
+        try:
+            texto = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            creado_en, plan_id = texto.rsplit('|', 1)
+            return datetime.fromisoformat(creado_en), int(plan_id)
+        except (ValueError, UnicodeDecodeError):
+            return None
+
     @classmethod
-    def obtener_planes_otros_usuarios(cls, usuario_id):
-        """Obtener planes de otros usuarios - usando citas temporalmente"""
-        query = """
-            SELECT c.*, u.nombre as autor_nombre, u.apellido as autor_apellido
-            FROM citas c
-            JOIN usuarios u ON c.autor_id = u.id
-            WHERE c.autor_id != %(usuario_id)s 
-            AND c.id NOT IN (
-                SELECT f.cita_id 
-                FROM favoritos f 
-                WHERE f.usuario_id = %(usuario_id)s
-            )
-            ORDER BY c.creado_en DESC
-            LIMIT 10;
-        """
-        data = {'usuario_id': usuario_id}
+    def consulta_feed(cls, usuario_id, cursor=None, limite=10):
+        """Consulta y datos de una página del feed (se pide una fila de más para saber si hay otra página)"""
+        data = {'usuario_id': usuario_id, 'limite': limite + 1}
+        posicion = cls.decodificar_cursor(cursor) if cursor else None
+        if posicion is None:
+            return cls.QUERY_FEED, data
+        data['creado_en'], data['id'] = posicion
+        return cls.QUERY_FEED_DESDE, data
+
+    @classmethod
+    def pagina_feed(cls, filas, limite=10):
+        """Convierte las filas de consulta_feed en (planes, cursor de la página siguiente o None)"""
+        planes = cls.desde_filas((filas or [])[:limite])
+        siguiente = cls.codificar_cursor(planes[-1]) if filas and len(filas) > limite else None
+        return planes, siguiente
+
+    @classmethod
+    def obtener_feed(cls, usuario_id, cursor=None, limite=10):
+        """Página del feed de planes de otros usuarios: devuelve (planes, siguiente_cursor)"""
+        query, data = cls.consulta_feed(usuario_id, cursor, limite)
         resultado = connectToMySQL(cls.db).query_db(query, data)
-        return [cls(row) for row in resultado]
+        return cls.pagina_feed(resultado, limite)
+
+    @classmethod
+    def obtener_planes_otros_usuarios(cls, usuario_id):
+        """Obtener planes de otros usuarios a los que aún no se unió (primera página del feed)"""
+        planes, _ = cls.obtener_feed(usuario_id)
+        return planes
+
+    QUERY_USUARIOS_UNIDOS = sentencia('planes.usuarios_unidos', """
+        SELECT u.nombre, u.apellido, ts.joined_at as fecha_union
+        FROM trip_schedules ts
+        JOIN usuarios u ON ts.usuario_id = u.id 
+        JOIN travel_plans tp ON ts.travel_plan_id = tp.id
+        WHERE ts.travel_plan_id = %(plan_id)s AND u.id != tp.autor_id
+        ORDER BY ts.joined_at ASC;
+    """, LECTURA, ('plan_id',))
 
     @classmethod
     def obtener_usuarios_unidos_al_plan(cls, plan_id):
         """Obtener la lista de usuarios que se unieron a un plan específico"""
-        query = """
-            SELECT u.nombre, u.apellido, f.creado_en as fecha_union
-            FROM favoritos f
-            JOIN usuarios u ON f.usuario_id = u.id 
-            JOIN citas c ON f.cita_id = c.id
-            WHERE f.cita_id = %(plan_id)s AND u.id != c.autor_id
-            ORDER BY f.creado_en ASC;
-        """
         data = {'plan_id': plan_id}
-        resultado = connectToMySQL(cls.db).query_db(query, data)
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_USUARIOS_UNIDOS, data)
         return resultado if resultado else []
 
+    # Los primeros participantes de varios planes en una sola consulta: ROW_NUMBER() numera los de cada
+    # plan por fecha de unión y se devuelven solo los 'por_plan' primeros (MySQL 8 y SQLite 3.25+)
+    QUERY_PRIMEROS_PARTICIPANTES = sentencia('planes.primeros_participantes', """
+        SELECT travel_plan_id, usuario_id, nombre, apellido
+        FROM (
+            SELECT ts.travel_plan_id, u.id AS usuario_id, u.nombre, u.apellido,
+                   ROW_NUMBER() OVER (PARTITION BY ts.travel_plan_id ORDER BY ts.joined_at, ts.id) AS posicion
+            FROM trip_schedules ts
+            JOIN travel_plans tp ON ts.travel_plan_id = tp.id
+            JOIN usuarios u ON ts.usuario_id = u.id
+            WHERE ts.travel_plan_id IN %(ids)s AND ts.usuario_id != tp.autor_id
+        ) numerados
+        WHERE posicion <= %(por_plan)s
+        ORDER BY travel_plan_id, posicion;
+    """, LECTURA, ('ids', 'por_plan'))
+
+    # Avatares que muestra cada tarjeta del dashboard (el resto se resume con el contador)
+    AVATARES_POR_PLAN = 5
+
+    @classmethod
+    def cargar_participantes(cls, planes, por_plan=AVATARES_POR_PLAN):
+        """Llena primeros_participantes de todos los planes con una sola consulta (sin N+1). Devuelve los planes"""
+        planes = list(planes)
+        # Los planes sin participantes no necesitan consulta
+        ids = tuple(dict.fromkeys(plan.id for plan in planes if plan.participantes_count))
+        if not ids:
+            return planes
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_PRIMEROS_PARTICIPANTES,
+                                                   {'ids': ids, 'por_plan': por_plan})
+        por_id = {}
+        for fila in resultado or ():
+            por_id.setdefault(fila['travel_plan_id'], []).append(
+                {'id': fila['usuario_id'], 'nombre': fila['nombre'], 'apellido': fila['apellido']})
+        for plan in planes:
+            plan.primeros_participantes = por_id.get(plan.id, [])
+        return planes
+
+    @classmethod
+    def iterar_usuarios_unidos_al_plan(cls, plan_id):
+        """Como obtener_usuarios_unidos_al_plan, pero leyendo las filas del servidor a medida que se consumen"""
+        return connectToMySQL(cls.db).query_stream(cls.QUERY_USUARIOS_UNIDOS, {'plan_id': plan_id})
+
+    # Exportación: planes del autor con sus participantes, una fila por (plan, participante).
+    # Ordenado por plan para poder agrupar las filas de cada plan sin cargarlas todas.
+    QUERY_EXPORTAR = sentencia('planes.exportar', """
+        SELECT tp.id, tp.destination, tp.description, tp.travel_start_date, tp.travel_end_date, tp.plan,
+               tp.is_active, tp.creado_en, ts.usuario_id AS participante_id,
+               u.nombre AS participante_nombre, u.apellido AS participante_apellido, ts.joined_at AS fecha_union
+        FROM travel_plans tp
+        LEFT JOIN trip_schedules ts ON ts.travel_plan_id = tp.id AND ts.usuario_id != tp.autor_id
+        LEFT JOIN usuarios u ON u.id = ts.usuario_id
+        WHERE tp.autor_id = %(autor_id)s
+        ORDER BY tp.id, ts.joined_at;
+    """, LECTURA, ('autor_id',))
+
+    @classmethod
+    def iterar_exportacion(cls, autor_id):
+        """Filas de QUERY_EXPORTAR para el autor, en streaming"""
+        return connectToMySQL(cls.db).query_stream(cls.QUERY_EXPORTAR, {'autor_id': autor_id})
+
+    @staticmethod
+    def agrupar_exportacion(filas):
+        """Agrupa las filas de iterar_exportacion en un dict por plan con la lista de participantes"""
+        for _, grupo in groupby(filas, key=itemgetter('id')):
+            participantes = []
+            for fila in grupo:
+                if fila['participante_id'] is not None:
+                    participantes.append({'id': fila['participante_id'],
+                                          'nombre': fila['participante_nombre'],
+                                          'apellido': fila['participante_apellido'],
+                                          'fecha_union': fila['fecha_union']})
+            yield {
+                'id': fila['id'], 'destination': fila['destination'], 'description': fila['description'],
+                'travel_start_date': fila['travel_start_date'], 'travel_end_date': fila['travel_end_date'],
+                'plan': fila['plan'], 'is_active': bool(fila['is_active']), 'creado_en': fila['creado_en'],
+                'participantes': participantes,
+            }
+
+    @classmethod
+    def obtener_detalle(cls, plan_id):
+        """Obtener un plan y sus usuarios unidos a la vez: devuelve (plan o None, usuarios_unidos)"""
+        plan_rows, unidos_rows = connectToMySQL(cls.db).query_concurrent([
+            (cls.QUERY_POR_ID, {'id': plan_id}),
+            (cls.QUERY_USUARIOS_UNIDOS, {'plan_id': plan_id}),
+        ])
+        if not plan_rows:
+            return None, []
+        return cls(plan_rows[0]), unidos_rows or []
+
+    # Suma o resta un participante al contador. El autor no cuenta (por eso autor_id != usuario_id) y
+    # actualizado_en = actualizado_en evita que MySQL lo cambie solo: unirse no edita el plan
+    QUERY_SUMAR_PARTICIPANTE = sentencia('planes.sumar_participante', """
+        UPDATE travel_plans
+        SET participantes_count = participantes_count + %(cambio)s, actualizado_en = actualizado_en
+        WHERE id = %(plan_id)s AND autor_id != %(usuario_id)s AND participantes_count + %(cambio)s >= 0;
+    """, ESCRITURA, ('cambio', 'plan_id', 'usuario_id'))
+
+    # Participantes reales de un plan (fila travel_plans de la sentencia UPDATE que la usa)
+    CONTAR_PARTICIPANTES = """
+        (SELECT COUNT(*) FROM trip_schedules ts
+         WHERE ts.travel_plan_id = travel_plans.id AND ts.usuario_id != travel_plans.autor_id)
+    """
+
+    # Vuelve a contar los participantes de los planes indicados; solo escribe los que no coinciden
+    QUERY_RECONTAR = sentencia('planes.recontar', f"""
+        UPDATE travel_plans
+        SET participantes_count = {CONTAR_PARTICIPANTES}, actualizado_en = actualizado_en
+        WHERE id IN %(ids)s AND participantes_count != {CONTAR_PARTICIPANTES};
+    """, ESCRITURA, ('ids',))
+
+    # Lo mismo para un rango de ids (reconciliar_participantes recorre la tabla por rangos)
+    QUERY_RECONCILIAR = sentencia('planes.reconciliar', f"""
+        UPDATE travel_plans
+        SET participantes_count = {CONTAR_PARTICIPANTES}, actualizado_en = actualizado_en
+        WHERE id > %(desde)s AND id <= %(hasta)s AND participantes_count != {CONTAR_PARTICIPANTES};
+    """, ESCRITURA, ('desde', 'hasta'))
+
+    QUERY_UNIRSE = sentencia('planes.unirse', """
+        INSERT IGNORE INTO trip_schedules (travel_plan_id, usuario_id) VALUES (%(plan_id)s, %(usuario_id)s);
+    """, INSERCION, ('plan_id', 'usuario_id'))
+
+    QUERY_CANCELAR_PARTICIPACION = sentencia('planes.cancelar_participacion', """
+        DELETE FROM trip_schedules WHERE usuario_id = %(usuario_id)s AND travel_plan_id = %(plan_id)s;
+    """, ESCRITURA, ('usuario_id', 'plan_id'))
+
     @classmethod
     def unirse_a_plan(cls, usuario_id, plan_id):
-        """Unirse a un plan - usando favoritos temporalmente"""
-        query = "INSERT INTO favoritos (usuario_id, cita_id) VALUES (%(usuario_id)s, %(cita_id)s);"
-        data = {'usuario_id': usuario_id, 'cita_id': plan_id}
-        return connectToMySQL(cls.db).query_db(query, data)
+        """Unirse a un plan (si ya estaba unido no hace nada)"""
+        data = {'usuario_id': usuario_id, 'plan_id': plan_id}
+        conexion = connectToMySQL(cls.db)
+        resultado = conexion.query_db(cls.QUERY_UNIRSE, data)
+        # INSERT IGNORE devuelve 0 si ya estaba unido: el contador solo sube con una inscripción nueva
+        if resultado and conexion.query_db(cls.QUERY_SUMAR_PARTICIPANTE, dict(data, cambio=1)) is False:
+            deshacer_transaccion()
+            return False
+        return resultado
 
     @classmethod
     def cancelar_participacion(cls, usuario_id, plan_id):
-        """Cancelar participación - usando favoritos temporalmente"""
-        query = "DELETE FROM favoritos WHERE usuario_id = %(usuario_id)s AND cita_id = %(cita_id)s;"
-        data = {'usuario_id': usuario_id, 'cita_id': plan_id}
-        return connectToMySQL(cls.db).query_db(query, data)
+        """Cancelar participación en un plan"""
+        data = {'usuario_id': usuario_id, 'plan_id': plan_id}
+        conexion = connectToMySQL(cls.db)
+        resultado = conexion.query_db(cls.QUERY_CANCELAR_PARTICIPACION, data)
+        if resultado and conexion.query_db(cls.QUERY_SUMAR_PARTICIPANTE, dict(data, cambio=-1)) is False:
+            deshacer_transaccion()
+            return False
+        return resultado
+
+    @classmethod
+    def recontar_participantes(cls, plan_ids):
+        """Recalcula participantes_count de varios planes (tras las operaciones en lote). Devuelve cuántos cambiaron, o False"""
+        total = 0
+        conexion = connectToMySQL(cls.db)
+        for lote in cls._en_lotes(plan_ids, cls.TAMANO_LOTE):
+            resultado = conexion.query_db(cls.QUERY_RECONTAR, {'ids': lote})
+            if resultado is False:
+                deshacer_transaccion()
+                return False
+            total += resultado
+        return total
+
+    QUERY_ULTIMO_ID = sentencia('planes.ultimo_id', """
+        SELECT COALESCE(MAX(id), 0) AS ultimo FROM travel_plans;
+    """, LECTURA)
+
+    @classmethod
+    def reconciliar_participantes(cls, tamano=1000, pausa=0.0):
+        """
+        Corrige participantes_count en toda la tabla recorriéndola por rangos de ids; cada rango se
+        confirma por separado (transacciones cortas). Devuelve cuántos planes se corrigieron
+        """
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_ULTIMO_ID)
+        if resultado is False:
+            raise click.ClickException("No se pudo leer travel_plans. ¿Se aplicaron las migraciones (flask migrar)?")
+        ultimo = resultado[0]['ultimo']
+        corregidos = 0
+        for desde in range(0, ultimo, tamano):
+            hasta = min(desde + tamano, ultimo)
+            resultado = connectToMySQL(cls.db).query_db(cls.QUERY_RECONCILIAR, {'desde': desde, 'hasta': hasta})
+            if resultado is False:
+                raise click.ClickException(f"Falló la reconciliación de los planes {desde + 1}-{hasta}")
+            confirmar_transaccion()
+            corregidos += resultado
+            if pausa:
+                time.sleep(pausa)
+        return corregidos
+
+    QUERY_CANCELAR = sentencia('planes.cancelar', """
+        UPDATE travel_plans SET is_active = FALSE WHERE id = %(id)s;
+    """, ESCRITURA, ('id',))
+
+    QUERY_ELIMINAR = sentencia('planes.eliminar', """
+        DELETE FROM travel_plans WHERE id = %(id)s;
+    """, ESCRITURA, ('id',))
 
     @classmethod
     def cancelar_plan(cls, plan_id):
-        """Marcar plan como cancelado - usando citas temporalmente"""
-        query = "UPDATE citas SET cita = CONCAT('[CANCELADO] ', cita) WHERE id = %(id)s AND cita NOT LIKE '[CANCELADO]%';"
+        """Marcar plan como cancelado"""
         data = {'id': plan_id}
-        return connectToMySQL(cls.db).query_db(query, data)
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_CANCELAR, data)
+        invalidar_fragmentos('plan', plan_id)
+        return resultado
 
     @classmethod
     def eliminar_plan(cls, plan_id):
-        """Eliminar plan completamente - usando citas temporalmente"""
-        query = "DELETE FROM citas WHERE id = %(id)s;"
+        """Eliminar plan completamente (sus trip_schedules se borran en cascada)"""
         data = {'id': plan_id}
-        return connectToMySQL(cls.db).query_db(query, data)
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_ELIMINAR, data)
+        # Las tarjetas cacheadas de este plan ya no sirven
+        invalidar_fragmentos('plan', plan_id)
+        if resultado:
+            IndicePlanes.quitar(plan_id)
+        return resultado
+
+    # Operaciones en lote: dentro de una petición todas las sentencias van en la transacción de la petición
+    # y si alguna falla se deshacen las anteriores. Los DELETE se parten en lotes de TAMANO_LOTE ids.
+    TAMANO_LOTE = 500
+
+    # executemany convierte este INSERT en un solo INSERT de varias filas. ON DUPLICATE KEY (índice único
+    # travel_plan_id, usuario_id) ignora las inscripciones que ya existen sin ocultar otros errores
+    QUERY_INSCRIBIR = sentencia('planes.inscribir', """
+        INSERT INTO trip_schedules (travel_plan_id, usuario_id)
+        VALUES (%(plan_id)s, %(usuario_id)s)
+        ON DUPLICATE KEY UPDATE usuario_id = usuario_id;
+    """, ESCRITURA, ('plan_id', 'usuario_id'))
+
+    @staticmethod
+    def _en_lotes(ids, tamano):
+        ids = list(dict.fromkeys(ids))
+        for i in range(0, len(ids), tamano):
+            yield tuple(ids[i:i + tamano])
+
+    @classmethod
+    def _inscribir(cls, filas):
+        """Inserta las inscripciones (plan_id, usuario_id). Devuelve cuántas eran nuevas, o False."""
+        if not filas:
+            return 0
+        resultado = connectToMySQL(cls.db).query_many(cls.QUERY_INSCRIBIR, filas)
+        if resultado is False:
+            deshacer_transaccion()
+        return resultado
+
+    @classmethod
+    def _borrar_en_lotes(cls, query, data, ids):
+        """Ejecuta un DELETE ... IN %(ids)s por cada lote de ids. Devuelve el total de filas borradas, o False."""
+        total = 0
+        conexion = connectToMySQL(cls.db)
+        for lote in cls._en_lotes(ids, cls.TAMANO_LOTE):
+            resultado = conexion.query_db(query, dict(data, ids=lote))
+            if resultado is False:
+                deshacer_transaccion()
+                return False
+            total += resultado
+        return total
+
+    @classmethod
+    def _con_recuento(cls, resultado, plan_ids):
+        """Si la operación en lote cambió algo, recuenta los participantes de sus planes en la misma transacción"""
+        if resultado and cls.recontar_participantes(plan_ids) is False:
+            return False
+        return resultado
+
+    @classmethod
+    def unirse_a_planes(cls, usuario_id, plan_ids):
+        """Unir a un usuario a varios planes (los que ya tenía se ignoran)"""
+        resultado = cls._inscribir([{'plan_id': plan_id, 'usuario_id': usuario_id}
+                                    for plan_id in dict.fromkeys(plan_ids)])
+        return cls._con_recuento(resultado, plan_ids)
+
+    QUERY_CANCELAR_PARTICIPACIONES = sentencia('planes.cancelar_participaciones', """
+        DELETE FROM trip_schedules WHERE usuario_id = %(usuario_id)s AND travel_plan_id IN %(ids)s;
+    """, ESCRITURA, ('usuario_id', 'ids'))
+
+    @classmethod
+    def cancelar_participaciones(cls, usuario_id, plan_ids):
+        """Cancelar la participación de un usuario en varios planes"""
+        resultado = cls._borrar_en_lotes(cls.QUERY_CANCELAR_PARTICIPACIONES, {'usuario_id': usuario_id}, plan_ids)
+        return cls._con_recuento(resultado, plan_ids)
+
+    @classmethod
+    def agregar_participantes(cls, plan_id, usuario_ids, autor_id=None):
+        """Inscribir a varios usuarios en un plan (si se indica, el autor se omite)"""
+        resultado = cls._inscribir([{'plan_id': plan_id, 'usuario_id': usuario_id}
+                                    for usuario_id in dict.fromkeys(usuario_ids) if usuario_id != autor_id])
+        return cls._con_recuento(resultado, [plan_id])
+
+    QUERY_QUITAR_PARTICIPANTES = sentencia('planes.quitar_participantes', """
+        DELETE FROM trip_schedules WHERE travel_plan_id = %(plan_id)s AND usuario_id IN %(ids)s;
+    """, ESCRITURA, ('plan_id', 'ids'))
+
+    @classmethod
+    def quitar_participantes(cls, plan_id, usuario_ids):
+        """Quitar a varios usuarios de un plan"""
+        resultado = cls._borrar_en_lotes(cls.QUERY_QUITAR_PARTICIPANTES, {'plan_id': plan_id}, usuario_ids)
+        return cls._con_recuento(resultado, [plan_id])
+
+    QUERY_ELIMINAR_VARIOS = sentencia('planes.eliminar_varios', """
+        DELETE FROM travel_plans WHERE autor_id = %(autor_id)s AND id IN %(ids)s;
+    """, ESCRITURA, ('autor_id', 'ids'))
+
+    @classmethod
+    def eliminar_planes(cls, autor_id, plan_ids):
+        """Eliminar varios planes del autor (los de otros autores no se tocan). Devuelve cuántos se borraron"""
+        resultado = cls._borrar_en_lotes(cls.QUERY_ELIMINAR_VARIOS, {'autor_id': autor_id}, plan_ids)
+        if resultado:
+            for plan_id in plan_ids:
+                invalidar_fragmentos('plan', plan_id)
+            # Solo si se borraron todos se sabe cuáles eran del autor; si no, los borrados se omiten
+            # al buscar (obtener_por_ids ya no los encuentra) hasta que el índice se reconstruya
+            if resultado == len(set(plan_ids)):
+                for plan_id in plan_ids:
+                    IndicePlanes.quitar(plan_id)
+        return resultado
+
+    QUERY_ACTUALIZAR = sentencia('planes.actualizar', """
+        UPDATE travel_plans
+        SET destination = %(destination)s, travel_start_date = %(travel_start_date)s,
+            travel_end_date = %(travel_end_date)s, plan = %(plan)s
+        WHERE id = %(id)s;
+    """, ESCRITURA, ('destination', 'travel_start_date', 'travel_end_date', 'plan', 'id'))
 
     @classmethod
     def actualizar_plan(cls, data):
-        """Actualizar plan - usando citas temporalmente"""
-        plan_description = f"🌍 {data['destination']} | {data['travel_start_date']} a {data['travel_end_date']} | {data['plan']}"
-        query = "UPDATE citas SET cita = %(cita)s WHERE id = %(id)s;"
-        temp_data = {
-            'cita': plan_description,
-            'id': data['id']
+        """Actualizar plan"""
+        datos = {
+            'id': data['id'],
+            'destination': data['destination'],
+            'travel_start_date': data['travel_start_date'],
+            'travel_end_date': data['travel_end_date'],
+            'plan': data['plan']
         }
-        return connectToMySQL(cls.db).query_db(query, temp_data)
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_ACTUALIZAR, datos)
+        invalidar_fragmentos('plan', data['id'])
+        if resultado is not False:
+            IndicePlanes.indexar(data['id'], destination=datos['destination'], plan=datos['plan'])
+        return resultado
 
     @staticmethod
     def validar_plan_viaje(plan_data):
@@ -290,3 +678,12 @@ class TravelPlan:
             is_valid = False
             
         return is_valid
+
+
+@click.command('reconciliar-participantes')
+@click.option('--lote', default=1000, show_default=True, help="Planes revisados por transacción.")
+@click.option('--pausa', default=0.0, show_default=True, help="Segundos de espera entre lotes.")
+def reconciliar_participantes(lote, pausa):
+    """Corrige travel_plans.participantes_count contando trip_schedules (se puede repetir)."""
+    corregidos = TravelPlan.reconciliar_participantes(lote, pausa)
+    click.echo(f"Listo: {corregidos} plan(es) corregidos")
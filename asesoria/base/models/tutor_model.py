@@ -0,0 +1,188 @@
+# base/models/tutor_model.py
+
+# Directorio de tutores en memoria
+# Lista de usuarios (solo id, nombre y apellido) ya ordenada, compartida por todo el proceso,
+# para llenar los <select> de tutores sin consultar la tabla usuarios en cada página
+
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from base.config.mysqlconnection import connectToMySQL
+from base.config.sentencias import ESCRITURA, LECTURA, sentencia
+
+Tutor = namedtuple('Tutor', ['id', 'nombre', 'apellido'])
+
+
+def clave_orden(nombre, apellido):
+    """Clave de orden sin mayúsculas ni tildes, como la collation utf8mb4_0900_ai_ci de MySQL."""
+    texto = unicodedata.normalize('NFKD', f"{nombre}\x00{apellido}")
+    return ''.join(c for c in texto if not unicodedata.combining(c)).casefold()
+
+
+class _Datos:
+    """Contenido inmutable del directorio: columnas paralelas ordenadas por nombre y apellido."""
+    __slots__ = ('ids', 'nombres', 'apellidos', 'claves', 'version')
+
+    def __init__(self, ids, nombres, apellidos, claves, version=None):
+        self.ids = ids
+        self.nombres = nombres
+        self.apellidos = apellidos
+        self.claves = claves
+        # Versión de la tabla usuarios cuando se cargó (ver DirectorioTutores.version_de)
+        self.version = version
+
+
+class VistaTutores:
+    """Secuencia perezosa de tutores que omite al usuario excluido, sin copiar el directorio."""
+    __slots__ = ('_datos', '_excluir')
+
+    def __init__(self, datos, excluir_id):
+        self._datos = datos
+        self._excluir = excluir_id
+
+    def __iter__(self):
+        datos = self._datos
+        for i, tutor_id in enumerate(datos.ids):
+            if tutor_id != self._excluir:
+                yield Tutor(tutor_id, datos.nombres[i], datos.apellidos[i])
+
+    def __len__(self):
+        return len(self._datos.ids) - (1 if self._excluir in self._datos.ids else 0)
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+class DirectorioTutores:
+    """
+    Directorio de tutores del proceso. Se carga una vez, se actualiza al registrar usuarios y se
+    recarga cuando la versión de la base de datos cambia (version_de) o cada 'intervalo' segundos.
+    """
+    db = "proyecto_crud"
+    intervalo = 60.0
+
+    _datos = None
+    _cargado_en = 0.0
+    _lock = threading.Lock()
+
+    QUERY_TUTORES = sentencia('tutores.todos', "SELECT id, nombre, apellido FROM usuarios;", LECTURA)
+    # Versión del directorio: contador de una sola fila (tabla tutores_version) que sube con cada cambio de
+    # id, nombre o apellido de los usuarios (registrar_cambio); los demás cambios de un usuario no la tocan.
+    # Es una columna suelta para que la consulta de versión de una página que muestra tutores la lleve
+    # también (ver TravelPlan.QUERY_VERSION), y se lee por clave primaria
+    COLUMNAS_VERSION = "(SELECT version FROM tutores_version WHERE id = 1) AS tutores_version"
+    QUERY_VERSION = sentencia('tutores.version', f"SELECT {COLUMNAS_VERSION};", LECTURA)
+    QUERY_CAMBIO = sentencia('tutores.cambio', "UPDATE tutores_version SET version = version + 1 WHERE id = 1;",
+                             ESCRITURA)
+
+    @staticmethod
+    def _version(fila):
+        return fila['tutores_version']
+
+    @classmethod
+    def _leer_version(cls, conexion):
+        resultado = conexion.query_db(cls.QUERY_VERSION)
+        if not resultado:
+            return None
+        return cls._version(resultado[0])
+
+    @classmethod
+    def _cargar(cls):
+        conexion = connectToMySQL(cls.db)
+        # La versión se lee antes que la lista: si algo cambia entre las dos consultas, la versión
+        # guardada queda vieja y la próxima comprobación vuelve a cargar (nunca al revés)
+        version = cls._leer_version(conexion)
+        resultado = conexion.query_db(cls.QUERY_TUTORES)
+        if resultado is False:
+            return None
+        filas = []
+        for row in resultado:
+            # Mismo formato que Usuario: nombre y apellido capitalizados
+            nombre = row['nombre'].capitalize()
+            apellido = row['apellido'].capitalize()
+            filas.append((clave_orden(nombre, apellido), row['id'], nombre, apellido))
+        filas.sort()
+        return _Datos(array('l', (f[1] for f in filas)),
+                      tuple(f[2] for f in filas),
+                      tuple(f[3] for f in filas),
+                      [f[0] for f in filas],
+                      version)
+
+    @classmethod
+    def _vigentes(cls):
+        datos = cls._datos
+        if datos is not None and time.monotonic() - cls._cargado_en < cls.intervalo:
+            return datos
+        with cls._lock:
+            if cls._datos is not None and time.monotonic() - cls._cargado_en < cls.intervalo:
+                return cls._datos
+            nuevos = cls._cargar()
+            if nuevos is None:
+                # Si la base de datos falla seguimos sirviendo el directorio anterior
+                return cls._datos or _Datos(array('l'), (), (), [])
+            cls._datos = nuevos
+            cls._cargado_en = time.monotonic()
+            return nuevos
+
+    @classmethod
+    def excepto(cls, usuario_id_excluir):
+        """Tutores ordenados por nombre y apellido, sin el usuario indicado."""
+        return VistaTutores(cls._vigentes(), usuario_id_excluir)
+
+    @classmethod
+    def version_de(cls, fila):
+        """
+        Versión del directorio según la base de datos (la misma en todos los procesos), de una fila
+        leída con COLUMNAS_VERSION, para validar cachés. Si no es la del directorio cargado, se recarga:
+        la página que se renderice después muestra los tutores de esa versión.
+        """
+        version = cls._version(fila)
+        datos = cls._datos
+        if version is not None and (datos is None or datos.version != version):
+            cls.invalidar()
+        return version
+
+    @classmethod
+    def registrar_cambio(cls, conexion):
+        """
+        Sube la versión del directorio en la transacción de la conexión: se llama al agregar, borrar o
+        renombrar usuarios. Devuelve la versión nueva, o None si falló.
+        """
+        if not conexion.query_db(cls.QUERY_CAMBIO):
+            return None
+        return cls._leer_version(conexion)
+
+    @classmethod
+    def agregar(cls, usuario_id, nombre, apellido, version=None):
+        """
+        Inserta un usuario nuevo en su posición sin recargar todo el directorio. 'version' es la que
+        devolvió registrar_cambio al agregarlo: si el directorio cargado no es el de la versión anterior
+        (hubo otros cambios que no vio), se recarga completo en el próximo uso.
+        """
+        with cls._lock:
+            datos = cls._datos
+            if datos is None:
+                # Aún no se cargó: se cargará completo la primera vez que se use
+                return
+            if version is None or datos.version is None or version != datos.version + 1:
+                cls.invalidar()
+                return
+            nombre, apellido = nombre.capitalize(), apellido.capitalize()
+            clave = clave_orden(nombre, apellido)
+            pos = bisect_right(datos.claves, clave)
+            # Copia nueva: las vistas que se estén recorriendo no se ven afectadas
+            ids = array('l', datos.ids)
+            ids.insert(pos, usuario_id)
+            cls._datos = _Datos(ids,
+                                datos.nombres[:pos] + (nombre,) + datos.nombres[pos:],
+                                datos.apellidos[:pos] + (apellido,) + datos.apellidos[pos:],
+                                datos.claves[:pos] + [clave] + datos.claves[pos:],
+                                version)
+
+    @classmethod
+    def invalidar(cls):
+        """Obliga a recargar el directorio en el próximo uso."""
+        cls._cargado_en = 0.0
@@ -2,20 +2,58 @@
 
 #Encapsula toda la logica relaciona con los usuarios en la base de datos.
 
-from base.config.mysqlconnection import connectToMySQL
+from base.config.mysqlconnection import connectToMySQL, es_duplicado
+from base.config.sentencias import ESCRITURA, INSERCION, LECTURA, sentencia
+from base.config.seguridad import BcryptOcupado, hash_password, necesita_rehash, verificar_password
+from base.models.tutor_model import DirectorioTutores
+from base.models.hidratacion import ModeloFila
 import re
-from flask import flash, session
-from bcrypt import hashpw, gensalt, checkpw
+from flask import flash, session, current_app
 from datetime import datetime, date
+import time
 
 #expresion regular para validar emails
 EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9.+_-]+@[a-zA-Z0-9]+\.[a-zA-Z]+$')
 
-class Usuario:
+# Mensaje cuando hay demasiados hashes de contraseña en curso (ver seguridad.py)
+MENSAJE_OCUPADO = "Hay muchos inicios de sesión en este momento. Intenta de nuevo en unos segundos."
+
+class UsuarioSesion:
+    """
+    Datos mínimos del usuario que se guardan en la sesión (cookie firmada de Flask).
+    Alcanza para las plantillas, que solo muestran el nombre y comparan el id.
+    """
+    __slots__ = ('id', 'nombre', 'apellido', 'version')
+
+    def __init__(self, data):
+        self.id = data['id']
+        self.nombre = data['nombre']
+        self.apellido = data['apellido']
+        self.version = data['v']
+
+
+class Usuario(ModeloFila):
     """
     Clase que representa a un usuario y sus operaciones en la base de datos.
     """
     db = "proyecto_crud"
+    __slots__ = ('id', 'nombre', 'apellido', 'fecha_nacimiento', 'edad', 'email', 'password',
+                 'creado_en', 'actualizado_en')
+
+    QUERY_GUARDAR = sentencia('usuarios.guardar', """
+        INSERT INTO usuarios (nombre, apellido, email, password) VALUES (%(nombre)s, %(apellido)s, %(email)s, %(password)s);
+    """, INSERCION, ('nombre', 'apellido', 'email', 'password'))
+    QUERY_POR_EMAIL = sentencia('usuarios.por_email', "SELECT * FROM usuarios WHERE email =%(email)s;",
+                                LECTURA, ('email',))
+    QUERY_POR_ID = sentencia('usuarios.por_id', "SELECT * FROM usuarios WHERE id = %(id)s;", LECTURA, ('id',))
+    QUERY_VERSION = sentencia('usuarios.version', "SELECT actualizado_en FROM usuarios WHERE id = %(id)s;",
+                              LECTURA, ('id',))
+    QUERY_TODOS_EXCEPTO = sentencia('usuarios.todos_excepto', """
+        SELECT * FROM usuarios WHERE id != %(usuario_id)s ORDER BY nombre, apellido;
+    """, LECTURA, ('usuario_id',))
+    QUERY_ACTUALIZAR_PASSWORD = sentencia('usuarios.actualizar_password', """
+        UPDATE usuarios SET password = %(password)s, actualizado_en = actualizado_en WHERE id = %(id)s;
+    """, ESCRITURA, ('password', 'id'))
 
     def __init__(self, data):
         """
@@ -27,7 +65,8 @@ class Usuario:
         self.fecha_nacimiento = data.get('fecha_nacimiento', None)
         self.edad = data.get('edad', None)
         self.email = data['email']
-        self.password = data['password']
+        # Las consultas que no necesitan la contraseña no la seleccionan
+        self.password = data.get('password')
         self.creado_en = data['creado_en']
         self.actualizado_en = data['actualizado_en']
 
@@ -38,8 +77,16 @@ class Usuario:
         """
         data['nombre'] = data['nombre'].capitalize()
         data['apellido'] = data['apellido'].capitalize()
-        query = "INSERT INTO usuarios (nombre, apellido, email, password) VALUES (%(nombre)s, %(apellido)s, %(email)s, %(password)s);"
-        resultado = connectToMySQL(cls.db).query_db(query, data)
+        conexion = connectToMySQL(cls.db)
+        resultado = conexion.query_db(cls.QUERY_GUARDAR, data)
+        if resultado is False and es_duplicado(conexion.error):
+            # El índice único de email detecta los registros repetidos, sin consultar antes
+            flash("El email ya está registro.", 'registro')
+        if resultado:
+            # La versión del directorio sube en la misma transacción y el nuevo usuario aparece en el
+            # directorio de este proceso sin recargarlo
+            version = DirectorioTutores.registrar_cambio(conexion)
+            DirectorioTutores.agregar(resultado, data['nombre'], data['apellido'], version)
         return resultado
 
     @classmethod
@@ -47,35 +94,87 @@ class Usuario:
         """
         Buscar un usuario por su email.
         """
-        query = "SELECT * FROM usuarios WHERE email =%(email)s;"
-        resultado = connectToMySQL(cls.db).query_db(query, data)
-        if not resultado:
-            return None
-        return cls(resultado[0])
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_POR_EMAIL, data)
+        return cls.desde_fila(resultado[0] if resultado else None)
    
     @classmethod
     def obtener_por_id(cls, usuario_id):
         """
         Buscar un usuario por su ID
         """
-        query ="SELECT * FROM usuarios WHERE id = %(id)s;"
         data = {'id' : usuario_id}
-        resultado = connectToMySQL(cls.db).query_db(query, data)
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_POR_ID, data)
+        return cls.desde_fila(resultado[0] if resultado else None)
+   
+    @classmethod
+    def obtener_version(cls, usuario_id):
+        """
+        Consulta ligera que solo devuelve la fecha de actualización del usuario
+        """
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_VERSION, {'id': usuario_id})
         if not resultado:
             return None
-        return cls(resultado[0])
-   
+        return str(resultado[0]['actualizado_en'])
+
+    def snapshot(self):
+        """
+        Resumen compacto del usuario para guardar en la sesión, con la versión (actualizado_en)
+        """
+        return {
+            'id': self.id,
+            'nombre': self.nombre,
+            'apellido': self.apellido,
+            'v': str(self.actualizado_en),
+            't': int(time.time()),
+        }
+
+    @classmethod
+    def guardar_en_sesion(cls, usuario):
+        """
+        Inicia la sesión del usuario guardando su id y su snapshot
+        """
+        session['usuario_id'] = usuario.id
+        session['usuario'] = usuario.snapshot()
+
+    @classmethod
+    def desde_sesion(cls):
+        """
+        Devuelve el usuario de la sesión sin consultar la base de datos.
+        Cada USUARIO_SNAPSHOT_TTL segundos se comprueba la versión con una consulta ligera
+        y solo si cambió se vuelve a cargar el usuario completo.
+        """
+        usuario_id = session.get('usuario_id')
+        if usuario_id is None:
+            return None
+        snapshot = session.get('usuario')
+        if not snapshot or snapshot.get('id') != usuario_id:
+            # Sesiones antiguas, sin snapshot: se carga una vez y se guarda
+            usuario = cls.obtener_por_id(usuario_id)
+            if not usuario:
+                return None
+            session['usuario'] = snapshot = usuario.snapshot()
+        elif time.time() - snapshot.get('t', 0) > current_app.config.get('USUARIO_SNAPSHOT_TTL', 300):
+            version = cls.obtener_version(usuario_id)
+            if version is None:
+                return None
+            if version != snapshot['v']:
+                usuario = cls.obtener_por_id(usuario_id)
+                if not usuario:
+                    return None
+                snapshot = usuario.snapshot()
+            else:
+                snapshot = dict(snapshot, t=int(time.time()))
+            session['usuario'] = snapshot
+        return UsuarioSesion(snapshot)
+
     @classmethod
     def obtener_todos_excepto(cls, usuario_id_excluir):
         """
         Obtener todos los usuarios excepto el especificado
         """
-        query = "SELECT * FROM usuarios WHERE id != %(usuario_id)s ORDER BY nombre, apellido;"
         data = {'usuario_id': usuario_id_excluir}
-        resultado = connectToMySQL(cls.db).query_db(query, data)
-        if not resultado:
-            return []
-        return [cls(row) for row in resultado]
+        resultado = connectToMySQL(cls.db).query_db(cls.QUERY_TODOS_EXCEPTO, data)
+        return cls.desde_filas(resultado)
    
     @staticmethod
     def validar_registro(usuario):
@@ -84,11 +183,7 @@ class Usuario:
         Devuelve True si todo es válido, False se hay errores (y los muestra con flash).
         """
         is_valid = True
-        query = "SELECT * FROM usuarios WHERE email = %(email)s;"
-        resultado = connectToMySQL(Usuario.db).query_db(query,usuario)
-        if resultado:
-            flash("El email ya está registro.",'registro')
-            is_valid = False
+        # El email repetido se detecta al guardar (índice único), no aquí
         if not EMAIL_REGEX.match(usuario['email']):
             flash("Formato de email es inválido.", 'registro')
             is_valid = False
@@ -115,18 +210,37 @@ class Usuario:
             is_valid = False
         return is_valid
 
-    @staticmethod
-    def validar_login(usuario):
-    # Validar los datos del formulario de inicio de sesión.
-    # Devuelve True si el usuario existe y la contraseña es correcta.
-    
-        is_valid = True
-        user_in_db = Usuario.obtener_por_email(usuario)
+    @classmethod
+    def actualizar_password(cls, usuario_id, password_hash):
+        """
+        Guardar un nuevo hash de contraseña sin cambiar actualizado_en (no invalida el snapshot de sesión)
+        """
+        return connectToMySQL(cls.db).query_db(cls.QUERY_ACTUALIZAR_PASSWORD, {'password': password_hash, 'id': usuario_id})
+
+    @classmethod
+    def autenticar(cls, usuario):
+        """
+        Valida los datos del formulario de inicio de sesión con una sola consulta.
+        Devuelve el usuario si existe y la contraseña es correcta, o None (y muestra el error con flash).
+        Si el hash se hizo con otro costo de bcrypt se vuelve a calcular con el actual.
+        """
+        user_in_db = cls.obtener_por_email(usuario)
         if not user_in_db:
             flash("Email no registrado.", 'login')
-            is_valid = False
-        else:
-            if not checkpw(usuario['password'].encode('utf-8'), user_in_db.password.encode('utf-8')):
-                flash("Contraseña incorrecta.", 'login')
-                is_valid = False
-            return is_valid
\ No newline at end of file
+            return None
+        try:
+            correcta = verificar_password(usuario['password'], user_in_db.password)
+        except BcryptOcupado:
+            flash(MENSAJE_OCUPADO, 'login')
+            return None
+        if not correcta:
+            flash("Contraseña incorrecta.", 'login')
+            return None
+        if necesita_rehash(user_in_db.password):
+            try:
+                user_in_db.password = hash_password(usuario['password'])
+                cls.actualizar_password(user_in_db.id, user_in_db.password)
+            except BcryptOcupado:
+                # El login ya es válido: el hash se actualiza en otro inicio de sesión
+                pass
+        return user_in_db
@@ -0,0 +1,2 @@
+# Scripts de medición de rendimiento. Se ejecutan desde la carpeta asesoria:
+#   python -m benchmarks.<script>
@@ -0,0 +1,285 @@
+# benchmarks/asesor_indices.py
+
+# Asesor de índices: EXPLAIN de todas las sentencias SQL de base/models/*.py
+# Toma las sentencias del registro que declaran los modelos (base/config/sentencias.py), las pasa
+# por EXPLAIN (MySQL) o EXPLAIN QUERY PLAN (SQLite) sobre una base de datos llena con benchmarks/datos.py
+# y reporta los recorridos completos de tablas, los ordenamientos en memoria (filesort), las tablas
+# temporales y los índices que faltan, con el ALTER TABLE para agregarlos en una migración.
+# Uso (desde la carpeta asesoria):
+#   python -m benchmarks.asesor_indices --backend sqlite
+#   python -m benchmarks.asesor_indices --estricto     (sale con 1 si falta algún índice)
+
+import argparse
+import glob
+import importlib
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import List
+from base import create_app
+from base.config.mysqlconnection import BACKEND, BACKENDS, get_pool
+from base.config.sentencias import ESCRITURA, INSERCION, REGISTRO
+from benchmarks import datos as generador
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+CARPETA_MODELOS = os.path.join(os.path.dirname(CARPETA), 'base', 'models')
+
+_RE_INSERT_VALUES = re.compile(r"^\s*INSERT\b(?!.*\bSELECT\b)", re.I | re.S)
+_RE_PARAMETRO = re.compile(r"%\((\w+)\)s")
+_RE_TABLA = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+`?(\w+)`?"
+                       r"(?:\s+(?:AS\s+)?(?!(?:WHERE|JOIN|LEFT|RIGHT|INNER|CROSS|ON|SET|ORDER|GROUP|LIMIT|USING"
+                       r"|VALUES|SELECT)\b)(\w+))?", re.I)
+_RE_ORDEN = re.compile(r"\bORDER\s+BY\s+(.*?)(?:\bLIMIT\b|$)", re.I | re.S)
+
+# Valores de ejemplo para los parámetros, por nombre (los demás se deducen de la terminación)
+VALORES = {
+    'ids': (1, 2, 3),
+    'email': 'usuario1@bench.test',
+    'limite': 11,
+    'tamano': 500,
+    'por_plan': 5,
+    'cambio': 1,
+    'desde': 0,
+    'hasta': 500,
+}
+
+
+def valor_de_ejemplo(nombre):
+    if nombre in VALORES:
+        return VALORES[nombre]
+    if nombre.endswith('ids'):
+        return (1, 2, 3)
+    if nombre == 'id' or nombre.endswith('_id'):
+        return 1
+    if nombre.endswith(('_en', '_at')):
+        return generador.INICIO + timedelta(days=30)
+    if nombre.endswith('_date') or nombre.startswith('fecha'):
+        return date(2030, 6, 1)
+    return 'texto'
+
+
+@dataclass
+class Sentencia:
+    sql: str
+    # Nombres con los que está registrada (el mismo SQL puede registrarse con más de uno)
+    nombres: List[str] = field(default_factory=list)
+    hallazgos: List[str] = field(default_factory=list)
+    indices: List[tuple] = field(default_factory=list)
+
+    @property
+    def parametros(self):
+        nombres = _RE_PARAMETRO.findall(self.sql)
+        if nombres:
+            return {nombre: valor_de_ejemplo(nombre) for nombre in nombres}
+        return (1,) * self.sql.count('%s') or None
+
+
+def extraer(carpeta=CARPETA_MODELOS):
+    """Sentencias registradas por los modelos (base/config/sentencias.py), sin repetir el mismo SQL."""
+    # Importar los modelos declara sus sentencias
+    for ruta in sorted(glob.glob(os.path.join(carpeta, '*.py'))):
+        importlib.import_module(f'base.models.{os.path.splitext(os.path.basename(ruta))[0]}')
+    sentencias = {}
+    for nombre, registrada in sorted(REGISTRO.items()):
+        # Un INSERT ... VALUES no lee tablas: no hay plan que revisar
+        if registrada.tipo == INSERCION or (registrada.tipo == ESCRITURA and _RE_INSERT_VALUES.match(registrada)):
+            continue
+        sql = ' '.join(registrada.split())
+        sentencias.setdefault(sql, Sentencia(sql)).nombres.append(nombre)
+    return list(sentencias.values())
+
+
+def tablas(sql):
+    """{alias: tabla} de la sentencia (cada tabla también es alias de sí misma)."""
+    resultado = {}
+    for tabla, alias in _RE_TABLA.findall(sql):
+        resultado[tabla] = tabla
+        if alias:
+            resultado[alias] = tabla
+    return resultado
+
+
+def columnas_sugeridas(sql, alias, una_sola_tabla):
+    """Columnas de un índice para la tabla: las comparadas por igualdad, luego rangos y el ORDER BY."""
+    prefijo = r"(?<![\w.])" if una_sola_tabla else rf"\b{re.escape(alias)}\."
+    igualdad = re.findall(prefijo + r"(\w+)\s*(?:=|\bIN\b)\s*(?:%|\(|\d|'|\w+\.)", sql, re.I)
+    rango = re.findall(prefijo + r"(\w+)\s*(?:<=|>=|<|>)", sql, re.I)
+    orden = []
+    if coincidencia := _RE_ORDEN.search(sql):
+        orden = re.findall(prefijo + r"(\w+)", coincidencia.group(1))
+    columnas = []
+    for columna in igualdad + rango + orden:
+        if columna.upper() not in ('AND', 'OR', 'NOT', 'NULL', 'DESC', 'ASC') and columna not in columnas:
+            columnas.append(columna)
+    return columnas
+
+
+def indices_existentes(cursor, tabla):
+    """Listas de columnas de los índices de la tabla."""
+    if BACKEND['nombre'] == 'sqlite':
+        cursor.execute(f"PRAGMA index_list({tabla})")
+        nombres = [fila['name'] for fila in cursor.fetchall()]
+        indices = []
+        for nombre in nombres:
+            cursor.execute(f"PRAGMA index_info({nombre})")
+            indices.append([fila['name'] for fila in sorted(cursor.fetchall(), key=lambda f: f['seqno'])])
+        # El rowid (INTEGER PRIMARY KEY) es el índice principal
+        return indices + [['id']]
+    cursor.execute("""
+        SELECT index_name AS indice, column_name AS columna FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s ORDER BY index_name, seq_in_index
+    """, (tabla,))
+    indices = {}
+    for fila in cursor.fetchall():
+        indices.setdefault(fila['indice'], []).append(fila['columna'])
+    return list(indices.values())
+
+
+def _cubierto(columnas, indices):
+    """True si algún índice empieza por la primera columna sugerida (ya sirve para filtrar)."""
+    return any(indice and indice[0] == columnas[0] for indice in indices)
+
+
+def _sugerir(sentencia, cursor, alias, tabla, alias_tablas):
+    columnas = columnas_sugeridas(sentencia.sql, alias, len(set(alias_tablas.values())) == 1)
+    if not columnas:
+        return False
+    if _cubierto(columnas, indices_existentes(cursor, tabla)):
+        return False
+    sugerencia = (tabla, tuple(columnas))
+    if sugerencia not in sentencia.indices:
+        sentencia.indices.append(sugerencia)
+        sentencia.hallazgos.append(f"índice faltante: {tabla} ({', '.join(columnas)})")
+    return True
+
+
+def _analizar_mysql(sentencia, cursor):
+    cursor.execute("EXPLAIN " + sentencia.sql, sentencia.parametros)
+    alias_tablas = tablas(sentencia.sql)
+    for fila in cursor.fetchall():
+        alias = fila.get('table') or ''
+        tabla = alias_tablas.get(alias, alias)
+        extra = fila.get('Extra') or ''
+        if alias.startswith('<derived'):
+            # Recorrido del resultado de una subconsulta: ya se analiza la subconsulta misma
+            pass
+        elif fila.get('type') == 'ALL':
+            sentencia.hallazgos.append(f"recorrido completo de {tabla} (~{fila.get('rows')} filas)")
+            _sugerir(sentencia, cursor, alias, tabla, alias_tablas)
+        elif fila.get('type') == 'index':
+            sentencia.hallazgos.append(f"recorrido completo del índice {fila.get('key')} de {tabla}")
+        if 'Using filesort' in extra:
+            sentencia.hallazgos.append(f"ordenamiento en memoria (filesort) en {tabla}")
+        if 'Using temporary' in extra:
+            sentencia.hallazgos.append(f"tabla temporal en {tabla}")
+
+
+_RE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(?: USING (?:COVERING )?INDEX (\w+))?")
+_RE_AUTOMATICO = re.compile(r"AUTOMATIC (?:PARTIAL )?(?:COVERING )?INDEX ON (\w+)\(([^)]*)\)")
+
+
+def _analizar_sqlite(sentencia, cursor):
+    cursor.execute("EXPLAIN QUERY PLAN " + sentencia.sql, sentencia.parametros)
+    alias_tablas = tablas(sentencia.sql)
+    for fila in cursor.fetchall():
+        detalle = fila['detail']
+        if coincidencia := _RE_AUTOMATICO.search(detalle):
+            tabla, columnas = coincidencia.groups()
+            sugerencia = (tabla, tuple(c.split('=')[0].strip() for c in columnas.split(' AND ')))
+            if sugerencia not in sentencia.indices:
+                sentencia.indices.append(sugerencia)
+                sentencia.hallazgos.append(f"índice faltante: {tabla} ({', '.join(sugerencia[1])}) "
+                                           f"(SQLite crea uno temporal en cada ejecución)")
+        elif coincidencia := _RE_SCAN.match(detalle):
+            tabla, alias, indice = coincidencia.groups()
+            alias = alias or tabla
+            if tabla not in alias_tablas:
+                # Resultado de una subconsulta (FROM (SELECT ...) AS alias): no es una tabla
+                continue
+            tabla = alias_tablas.get(tabla, tabla)
+            if indice:
+                sentencia.hallazgos.append(f"recorrido completo del índice {indice} de {tabla}")
+            else:
+                sentencia.hallazgos.append(f"recorrido completo de {tabla}")
+                _sugerir(sentencia, cursor, alias, tabla, alias_tablas)
+        elif 'USE TEMP B-TREE FOR ORDER BY' in detalle or 'USE TEMP B-TREE FOR RIGHT PART OF ORDER BY' in detalle:
+            sentencia.hallazgos.append("ordenamiento en memoria (filesort)")
+        elif 'USE TEMP B-TREE' in detalle:
+            sentencia.hallazgos.append(f"tabla temporal ({detalle.replace('USE TEMP B-TREE ', '').lower()})")
+
+
+def analizar(db, sentencias):
+    """Pasa cada sentencia por EXPLAIN y llena sus hallazgos."""
+    pool = get_pool(db)
+    item = pool.checkout()
+    try:
+        sqlite = BACKEND['nombre'] == 'sqlite'
+        if sqlite:
+            # Estadísticas para el planificador (MySQL las mantiene solo)
+            with item.connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        analizar_plan = _analizar_sqlite if sqlite else _analizar_mysql
+        for sentencia in sentencias:
+            with item.connection.cursor() as cursor:
+                try:
+                    analizar_plan(sentencia, cursor)
+                except Exception as e:
+                    sentencia.hallazgos.append(f"no se pudo analizar: {e}")
+    finally:
+        pool.checkin(item)
+    return sentencias
+
+
+def sentencia_alter(tabla, columnas):
+    nombre = f"idx_{tabla}_{'_'.join(columnas)}"[:64]
+    return f"ALTER TABLE {tabla}\n  ADD INDEX {nombre} ({', '.join(columnas)});"
+
+
+def imprimir(sentencias):
+    con_hallazgos = [s for s in sentencias if s.hallazgos]
+    for sentencia in con_hallazgos:
+        for nombre in sentencia.nombres:
+            print(nombre)
+        print(f"  {sentencia.sql[:110]}{'...' if len(sentencia.sql) > 110 else ''}")
+        for hallazgo in dict.fromkeys(sentencia.hallazgos):
+            print(f"  - {hallazgo}")
+        print()
+    sugeridos = list(dict.fromkeys(indice for s in sentencias for indice in s.indices))
+    print(f"{len(sentencias)} sentencias analizadas, {len(con_hallazgos)} con hallazgos, "
+          f"{len(sugeridos)} índice(s) sugeridos")
+    if sugeridos:
+        print("\n-- Para una migración nueva en migraciones/:")
+        for tabla, columnas in sugeridos:
+            print(sentencia_alter(tabla, columnas))
+    return sugeridos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN de las sentencias de base/models sobre datos de prueba")
+    parser.add_argument('--db', default='proyecto_crud_bench', help="Base de datos (se borra y se vuelve a crear)")
+    parser.add_argument('--backend', choices=BACKENDS, default='mysql',
+                        help="Motor de base de datos (sqlite: archivo local en --sqlite-dir, sin servidor)")
+    parser.add_argument('--sqlite-dir', default=os.path.join(CARPETA, 'datos'))
+    parser.add_argument('--usuarios', type=int, default=200)
+    parser.add_argument('--planes', type=int, default=1000)
+    parser.add_argument('--participaciones', type=int, default=3000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--estricto', action='store_true', help="Salir con 1 si falta algún índice")
+    args = parser.parse_args()
+
+    app = create_app({'DB_BACKEND': args.backend, 'SQLITE_DIR': args.sqlite_dir})
+    generador.usar_base_de_datos(args.db)
+    generador.preparar_esquema(args.db)
+    with app.app_context():
+        generador.generar(args.db, args.usuarios, args.planes, args.participaciones, args.semilla)
+        generador.generar_citas(args.db, args.usuarios, args.planes, args.participaciones, args.semilla)
+
+    sugeridos = imprimir(analizar(args.db, extraer()))
+    if args.estricto and sugeridos:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# benchmarks/bench_dashboard.py
+
+# Compara la carga del dashboard /citas/ consulta por consulta contra el cargador con una sentencia
+# para los planes. Cuenta las sentencias ejecutadas (cursor.execute), no las conexiones pedidas al
+# pool: dentro de una petición una sola conexión atiende todas las sentencias.
+# Necesita una base de datos proyecto_crud con datos. Uso:
+#   python -m benchmarks.bench_dashboard --usuario 1 --repeticiones 200
+
+import argparse
+import statistics
+import time
+from base.config.instrumentacion import sentencias_ejecutadas
+from base.models.dashboard_model import DashboardCitas
+
+
+def medir(cargar, usuario_id, repeticiones):
+    """Devuelve (latencias en ms, sentencias ejecutadas por carga)."""
+    # Calentamos el pool y el directorio de tutores para no medir su carga
+    cargar(usuario_id)
+    antes = sentencias_ejecutadas()
+    latencias = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        cargar(usuario_id)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return latencias, (sentencias_ejecutadas() - antes) / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del dashboard /citas/")
+    parser.add_argument('--usuario', type=int, default=1)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    caminos = [
+        ('por separado', DashboardCitas.cargar_por_separado),
+        ('una sentencia', DashboardCitas.cargar),
+    ]
+    print(f"{'camino':<14}{'p50 ms':>10}{'p95 ms':>10}{'sentencias/carga':>18}")
+    for nombre, cargar in caminos:
+        latencias, sentencias = medir(cargar, args.usuario, args.repeticiones)
+        p95 = statistics.quantiles(latencias, n=20)[-1]
+        print(f"{nombre:<14}{statistics.median(latencias):>10.2f}{p95:>10.2f}{sentencias:>18.1f}")
+
+
+if __name__ == '__main__':
+    main()
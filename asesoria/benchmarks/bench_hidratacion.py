@@ -0,0 +1,119 @@
+# benchmarks/bench_hidratacion.py
+
+# Mide la construcción de modelos desde filas y el render de sus fechas, con 10.000 filas sintéticas
+# (no necesita base de datos). Compara los objetos con __dict__ y fechas convertidas a texto
+# (como era TravelPlan antes) contra TravelPlan con __slots__, fechas nativas y filtros memoizados.
+# Uso:
+#   python -m benchmarks.bench_hidratacion --filas 10000 --repeticiones 5
+
+import argparse
+import statistics
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from jinja2 import Environment
+from base import _format_date, _format_travel_date, format_date, format_travel_date
+from base.models.travel_plan_model import TravelPlan
+
+PLANTILLA = (
+    "{% for plan in planes %}"
+    "<li>{{ plan.destination }} {{ plan.travel_start_date|format_travel_date }}"
+    " creado {{ plan.creado_en|format_date }}</li>\n"
+    "{% endfor %}"
+)
+
+
+class PlanConDict:
+    """Réplica del TravelPlan anterior: atributos en __dict__ y fechas de viaje como texto."""
+
+    def __init__(self, data):
+        self.id = data['id']
+        self.destination = data['destination']
+        self.description = data.get('description', '')
+        self.travel_start_date = data['travel_start_date']
+        self.travel_end_date = data['travel_end_date']
+        self.plan = data['plan']
+        self.is_active = data.get('is_active', True)
+        self.autor_id = data['autor_id']
+        self.creado_en = data['creado_en']
+        self.actualizado_en = data['actualizado_en']
+        self.autor_nombre = data.get('autor_nombre', '')
+        self.autor_apellido = data.get('autor_apellido', '')
+        if hasattr(self.travel_start_date, 'strftime'):
+            self.travel_start_date = self.travel_start_date.strftime('%Y-%m-%d')
+        if hasattr(self.travel_end_date, 'strftime'):
+            self.travel_end_date = self.travel_end_date.strftime('%Y-%m-%d')
+
+
+def generar_filas(cantidad):
+    """Filas como las del DictCursor: unas pocas fechas de viaje distintas, creado_en casi únicos."""
+    inicio = datetime(2026, 1, 1, 8, 0, 0)
+    return [{
+        'id': i,
+        'destination': 'Python',
+        'description': '',
+        'travel_start_date': date(2026, 1, 1) + timedelta(days=i % 90),
+        'travel_end_date': date(2026, 1, 1) + timedelta(days=i % 90),
+        'plan': f'Repaso de listas y diccionarios {i}',
+        'is_active': 1,
+        'autor_id': i % 200,
+        'creado_en': inicio + timedelta(minutes=7 * i),
+        'actualizado_en': inicio + timedelta(minutes=7 * i),
+        'autor_nombre': 'Ana',
+        'autor_apellido': 'Pérez',
+    } for i in range(cantidad)]
+
+
+def crear_entorno(fecha, fecha_viaje):
+    entorno = Environment(autoescape=True)
+    entorno.filters['format_date'] = fecha
+    entorno.filters['format_travel_date'] = fecha_viaje
+    return entorno.from_string(PLANTILLA)
+
+
+def medir(hidratar, plantilla, filas, repeticiones, limpiar=None):
+    """Devuelve (ms de hidratación, ms de render, KiB retenidos por los objetos)."""
+    tiempos_hidratar, tiempos_render = [], []
+    for _ in range(repeticiones):
+        if limpiar:
+            limpiar()
+        inicio = time.perf_counter()
+        planes = hidratar(filas)
+        tiempos_hidratar.append((time.perf_counter() - inicio) * 1000)
+        inicio = time.perf_counter()
+        plantilla.render(planes=planes)
+        tiempos_render.append((time.perf_counter() - inicio) * 1000)
+    tracemalloc.start()
+    planes = hidratar(filas)
+    memoria = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+    return statistics.median(tiempos_hidratar), statistics.median(tiempos_render), memoria
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de hidratación de modelos y render de fechas")
+    parser.add_argument('--filas', type=int, default=10000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    filas = generar_filas(args.filas)
+
+    def limpiar_caches():
+        _format_date.cache_clear()
+        _format_travel_date.cache_clear()
+
+    caminos = [
+        # Los filtros sin caché (__wrapped__) hacen strptime de cada fecha en texto, como antes
+        ('dict + texto', lambda f: [PlanConDict(row) for row in f],
+         crear_entorno(_format_date.__wrapped__, _format_travel_date.__wrapped__), None),
+        ('slots + nativo', TravelPlan.desde_filas,
+         crear_entorno(format_date, format_travel_date), limpiar_caches),
+    ]
+    print(f"{'camino':<16}{'hidratar ms':>13}{'render ms':>12}{'total ms':>11}{'memoria KiB':>14}")
+    for nombre, hidratar, plantilla, limpiar in caminos:
+        ms_hidratar, ms_render, memoria = medir(hidratar, plantilla, filas, args.repeticiones, limpiar)
+        print(f"{nombre:<16}{ms_hidratar:>13.1f}{ms_render:>12.1f}{ms_hidratar + ms_render:>11.1f}{memoria:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+# benchmarks/carga.py
+
+# Prueba de carga reproducible de todas las rutas de la aplicación
+# Genera datos con semilla (benchmarks/datos.py), simula usuarios que recorren las rutas de los
+# blueprints usuarios, citas y api con el cliente de pruebas de Flask (sin red) y reporta por ruta
+# la latencia p50/p95/p99, el throughput y las consultas SQL por petición.
+# Uso (desde la carpeta asesoria, con MySQL local o con --backend sqlite, que no necesita servidor):
+#   python -m benchmarks.carga --usuarios 200 --planes 1000 --peticiones 2000
+#   python -m benchmarks.carga --backend sqlite
+#   python -m benchmarks.carga --guardar-baseline principal
+#   python -m benchmarks.carga --comparar principal --tolerancia 0.2
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import quote
+from base import create_app
+from base.config.instrumentacion import registro
+from base.config.mysqlconnection import BACKEND, BACKENDS
+from benchmarks import datos as generador
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+CARPETA_BASELINES = os.path.join(CARPETA, 'baselines')
+
+# Diferencias de latencia por debajo de esto (ms) son ruido y no cuentan como regresión
+RUIDO_MS = 1.0
+
+# Fecha válida (no pasada) para los planes que se crean durante la prueba
+FECHA_FUTURA = '2030-06-01'
+
+
+class UsuarioVirtual:
+    """Estado de un usuario simulado: su sesión, sus planes y su generador aleatorio."""
+
+    def __init__(self, app, usuario_id, datos, semilla):
+        self.cliente = app.test_client()
+        self.app = app
+        self.id = usuario_id
+        self.email = f'usuario{usuario_id}@bench.test'
+        self.rng = random.Random(semilla)
+        self.datos = datos
+        self.mis_planes = list(datos.planes_por_autor.get(usuario_id, []))
+        self.contador = 0
+        # Plan creado en 'preparar' para los pasos que lo eliminan
+        self.objetivo = None
+
+    def plan_cualquiera(self):
+        return self.rng.randint(1, self.datos.planes)
+
+    def plan_ajeno(self):
+        while True:
+            plan_id = self.plan_cualquiera()
+            if plan_id not in self.mis_planes:
+                return plan_id
+
+    def mi_plan(self):
+        if not self.mis_planes:
+            self.mis_planes.append(self.crear_plan())
+        return self.rng.choice(self.mis_planes)
+
+    def busqueda(self):
+        # Un tema completo o, para simular la búsqueda mientras se escribe, sus primeras letras
+        tema = self.rng.choice(generador.TEMAS)
+        return tema if self.rng.random() < 0.5 else tema[:self.rng.randint(2, len(tema))]
+
+    def otros_usuarios(self, cantidad):
+        return [u for u in self.rng.sample(range(1, self.datos.usuarios + 1), cantidad) if u != self.id]
+
+    def login(self, cliente=None):
+        (cliente or self.cliente).post('/usuarios/procesar_login',
+                                       data={'email': self.email, 'password': generador.PASSWORD})
+
+    def crear_plan(self):
+        """Crea un plan por la API (sin medir) y devuelve su id."""
+        respuesta = self.cliente.post('/api/v1/planes', json={
+            'destination': 'Python', 'plan': 'Plan del benchmark', 'travel_start_date': FECHA_FUTURA})
+        return respuesta.get_json()['id']
+
+    def nuevo_email(self):
+        self.contador += 1
+        return f'nuevo{self.id}_{self.contador}_{self.rng.randrange(10 ** 9)}@bench.test'
+
+
+@dataclass
+class Paso:
+    """Una petición del escenario. 'preparar' se ejecuta antes y no se mide."""
+    endpoint: str
+    metodo: str
+    ruta: Callable
+    peso: int
+    datos: Optional[Callable] = None
+    preparar: Optional[Callable] = None
+    # Con sesión propia (registro, login, logout): usa un cliente aparte para no cambiar la del usuario
+    aparte: bool = False
+
+
+def _plan_valido(u):
+    return {'destination': 'Python', 'plan': 'Repaso de listas', 'travel_start_date': FECHA_FUTURA,
+            'duracion_horas': '2'}
+
+
+def _registro(u):
+    return {'nombre': 'Bench', 'apellido': 'Usuario', 'email': u.nuevo_email(),
+            'password': generador.PASSWORD, 'confirm_password': generador.PASSWORD}
+
+
+ESCENARIO = [
+    Paso('index', 'GET', lambda u: '/', 2),
+    Paso('usuarios.procesar_registro', 'POST', lambda u: '/usuarios/procesar_registro', 1,
+         datos=_registro, aparte=True),
+    Paso('usuarios.procesar_login', 'POST', lambda u: '/usuarios/procesar_login', 2,
+         datos=lambda u: {'email': u.email, 'password': generador.PASSWORD}, aparte=True),
+    Paso('usuarios.logout', 'GET', lambda u: '/usuarios/logout', 1,
+         preparar=lambda u, cliente: u.login(cliente), aparte=True),
+    Paso('citas.citas_simple', 'GET', lambda u: '/citas/', 20),
+    Paso('citas.feed_asesorias', 'GET', lambda u: '/citas/feed', 5),
+    Paso('citas.buscar_planes', 'GET', lambda u: f"/citas/buscar?q={quote(u.busqueda())}", 5),
+    Paso('citas.crear_plan_viaje', 'POST', lambda u: '/citas/crear_plan', 3, datos=_plan_valido),
+    Paso('citas.descripcion_viaje', 'GET', lambda u: f'/citas/descripcion/{u.plan_cualquiera()}', 15),
+    Paso('citas.unirse_a_plan', 'GET', lambda u: f'/citas/unirse/{u.plan_ajeno()}', 4),
+    Paso('citas.cancelar_participacion', 'GET', lambda u: f'/citas/cancelar_participacion/{u.plan_ajeno()}', 3),
+    Paso('citas.eliminar_plan', 'GET', lambda u: f'/citas/eliminar_plan/{u.objetivo}', 1,
+         preparar=lambda u, cliente: setattr(u, 'objetivo', u.crear_plan())),
+    Paso('citas.unirse_a_planes', 'POST', lambda u: '/citas/lote/unirse', 1,
+         datos=lambda u: {'plan_ids': ','.join(str(u.plan_ajeno()) for _ in range(5))}),
+    Paso('citas.cancelar_participaciones', 'POST', lambda u: '/citas/lote/cancelar_participacion', 1,
+         datos=lambda u: {'plan_ids': ','.join(str(u.plan_ajeno()) for _ in range(5))}),
+    Paso('citas.eliminar_planes', 'POST', lambda u: '/citas/lote/eliminar_plan', 1,
+         datos=lambda u: {'plan_ids': ','.join(str(u.crear_plan()) for _ in range(2))}),
+    Paso('citas.gestionar_participantes', 'POST', lambda u: f'/citas/lote/participantes/{u.mi_plan()}', 1,
+         datos=lambda u: {'agregar_ids': ','.join(map(str, u.otros_usuarios(3))),
+                          'quitar_ids': ','.join(map(str, u.otros_usuarios(2)))}),
+    Paso('citas.exportar_planes', 'GET', lambda u: f"/citas/exportar/{u.rng.choice(['csv', 'ndjson'])}", 1),
+    Paso('citas.exportar_participantes', 'GET',
+         lambda u: f"/citas/exportar/participantes/{u.mi_plan()}/{u.rng.choice(['csv', 'ndjson'])}", 1),
+    Paso('citas.ver_perfil', 'GET', lambda u: '/citas/perfil', 1),
+    Paso('citas.editar_asesoria', 'GET', lambda u: f'/citas/editar/{u.mi_plan()}', 3),
+    Paso('citas.actualizar_asesoria', 'POST', lambda u: f'/citas/actualizar/{u.mi_plan()}', 2, datos=_plan_valido),
+    Paso('citas.solicitar_asesoria', 'GET', lambda u: '/citas/solicitar_asesoria', 2),
+    Paso('citas.cambiar_tutor', 'POST', lambda u: f'/citas/cambiar_tutor/{u.plan_cualquiera()}', 1,
+         datos=lambda u: {'nuevo_tutor': str(u.rng.randint(1, u.datos.usuarios))}),
+    Paso('citas.crear_datos_prueba', 'GET', lambda u: '/citas/test_data', 1),
+    Paso('api.usuario', 'GET', lambda u: '/api/v1/usuario', 1),
+    Paso('api.feed', 'GET', lambda u: '/api/v1/planes?limite=20', 3),
+    Paso('api.mis_planes', 'GET', lambda u: '/api/v1/planes/mios', 2),
+    Paso('api.detalle', 'GET', lambda u: f'/api/v1/planes/{u.plan_cualquiera()}', 3),
+    Paso('api.lote', 'GET',
+         lambda u: '/api/v1/planes/lote?ids=' + ','.join(str(u.plan_cualquiera()) for _ in range(10)), 2),
+    Paso('api.crear', 'POST', lambda u: '/api/v1/planes', 1, datos=_plan_valido),
+    Paso('api.eliminar', 'DELETE', lambda u: f'/api/v1/planes/{u.objetivo}', 1,
+         preparar=lambda u, cliente: setattr(u, 'objetivo', u.crear_plan())),
+    Paso('api.unirse', 'PUT', lambda u: f'/api/v1/planes/{u.plan_ajeno()}/participacion', 1),
+    Paso('api.cancelar_participacion', 'DELETE', lambda u: f'/api/v1/planes/{u.plan_ajeno()}/participacion', 1),
+]
+
+# Blueprints cuyas rutas deben estar todas en el escenario
+BLUEPRINTS = ('usuarios', 'citas', 'api')
+
+
+def rutas_sin_cubrir(app):
+    cubiertas = {paso.endpoint for paso in ESCENARIO}
+    return sorted(regla.endpoint for regla in app.url_map.iter_rules()
+                  if regla.endpoint.split('.')[0] in BLUEPRINTS and regla.endpoint not in cubiertas)
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano (valores ya ordenados)."""
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores) + 0.5)) - 1))
+    return valores[indice]
+
+
+def ejecutar_usuario(u, peticiones, comprimir, resultados, lock):
+    pesos = [paso.peso for paso in ESCENARIO]
+    cabeceras = {'Accept-Encoding': 'gzip'} if comprimir else {}
+    medidas = []
+    for paso in u.rng.choices(ESCENARIO, weights=pesos, k=peticiones):
+        cliente = u.app.test_client() if paso.aparte else u.cliente
+        if paso.preparar:
+            paso.preparar(u, cliente)
+        ruta = paso.ruta(u)
+        datos = paso.datos(u) if paso.datos else None
+        argumentos = {'json': datos} if paso.endpoint.startswith('api.') and datos else {'data': datos}
+        inicio = time.perf_counter()
+        respuesta = cliente.open(ruta, method=paso.metodo, headers=cabeceras, **argumentos)
+        respuesta.get_data()
+        respuesta.close()
+        medidas.append((paso.endpoint, (time.perf_counter() - inicio) * 1000, respuesta.status_code))
+    with lock:
+        resultados.extend(medidas)
+
+
+def ejecutar(app, datos, peticiones, hilos, semilla, comprimir):
+    """Corre el escenario y devuelve el reporte (dict serializable a JSON)."""
+    rng = random.Random(semilla)
+    candidatos = sorted(datos.planes_por_autor) or [1]
+    usuarios = [UsuarioVirtual(app, rng.choice(candidatos), datos, semilla + i) for i in range(hilos)]
+    for u in usuarios:
+        u.login()
+
+    with registro.lock:
+        antes = {endpoint: list(valores) for endpoint, valores in registro.endpoints.items()}
+    resultados, lock = [], threading.Lock()
+    por_hilo = [peticiones // hilos + (1 if i < peticiones % hilos else 0) for i in range(hilos)]
+    trabajadores = [threading.Thread(target=ejecutar_usuario, args=(u, n, comprimir, resultados, lock))
+                    for u, n in zip(usuarios, por_hilo)]
+    inicio = time.perf_counter()
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    duracion = time.perf_counter() - inicio
+    with registro.lock:
+        despues = {endpoint: list(valores) for endpoint, valores in registro.endpoints.items()}
+
+    rutas = {}
+    for endpoint in sorted({r[0] for r in resultados}):
+        latencias = sorted(r[1] for r in resultados if r[0] == endpoint)
+        errores = sum(1 for r in resultados if r[0] == endpoint and r[2] >= 400)
+        # Consultas contadas por la instrumentación (incluye las de los pasos 'preparar' de la API)
+        previo = antes.get(endpoint, [0, 0, 0.0])
+        actual = despues.get(endpoint, [0, 0, 0.0])
+        atendidas = actual[0] - previo[0]
+        rutas[endpoint] = {
+            'peticiones': len(latencias),
+            'errores': errores,
+            'p50_ms': percentil(latencias, 50),
+            'p95_ms': percentil(latencias, 95),
+            'p99_ms': percentil(latencias, 99),
+            'consultas_por_peticion': (actual[1] - previo[1]) / atendidas if atendidas else 0.0,
+        }
+    todas = sorted(r[1] for r in resultados)
+    return {
+        'parametros': {'usuarios': datos.usuarios, 'planes': datos.planes, 'participaciones': datos.participaciones,
+                       'peticiones': peticiones, 'hilos': hilos, 'semilla': semilla, 'gzip': comprimir,
+                       'backend': BACKEND['nombre']},
+        'total': {
+            'peticiones': len(todas),
+            'errores': sum(1 for r in resultados if r[2] >= 400),
+            'segundos': duracion,
+            'peticiones_por_segundo': len(todas) / duracion if duracion else 0.0,
+            'p50_ms': percentil(todas, 50),
+            'p95_ms': percentil(todas, 95),
+            'p99_ms': percentil(todas, 99),
+        },
+        'rutas': rutas,
+    }
+
+
+def imprimir(reporte):
+    print(f"{'ruta':<34}{'n':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'consultas':>11}")
+    for endpoint, r in reporte['rutas'].items():
+        print(f"{endpoint:<34}{r['peticiones']:>6}{r['errores']:>5}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+              f"{r['p99_ms']:>9.2f}{r['consultas_por_peticion']:>11.2f}")
+    t = reporte['total']
+    print(f"\n{t['peticiones']} peticiones en {t['segundos']:.2f} s: {t['peticiones_por_segundo']:.1f} pet/s, "
+          f"p50 {t['p50_ms']:.2f} ms, p95 {t['p95_ms']:.2f} ms, p99 {t['p99_ms']:.2f} ms, {t['errores']} errores")
+
+
+def comparar(reporte, baseline, tolerancia):
+    """Lista de regresiones respecto de la baseline (vacía si no hay)."""
+    regresiones = []
+    if reporte['parametros'] != baseline['parametros']:
+        regresiones.append(f"parámetros distintos de la baseline: {baseline['parametros']}")
+    for endpoint, base in baseline['rutas'].items():
+        actual = reporte['rutas'].get(endpoint)
+        if actual is None:
+            continue
+        for metrica in ('p95_ms', 'p99_ms'):
+            if actual[metrica] > base[metrica] * (1 + tolerancia) and actual[metrica] - base[metrica] > RUIDO_MS:
+                regresiones.append(f"{endpoint}: {metrica} {base[metrica]:.2f} -> {actual[metrica]:.2f}")
+        if actual['consultas_por_peticion'] > base['consultas_por_peticion'] + 0.05:
+            regresiones.append(f"{endpoint}: consultas/petición {base['consultas_por_peticion']:.2f} -> "
+                               f"{actual['consultas_por_peticion']:.2f}")
+        if actual['errores'] > base['errores']:
+            regresiones.append(f"{endpoint}: errores {base['errores']} -> {actual['errores']}")
+    base_total, total = baseline['total'], reporte['total']
+    if total['peticiones_por_segundo'] < base_total['peticiones_por_segundo'] * (1 - tolerancia):
+        regresiones.append(f"throughput {base_total['peticiones_por_segundo']:.1f} -> "
+                           f"{total['peticiones_por_segundo']:.1f} pet/s")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de todas las rutas")
+    parser.add_argument('--db', default='proyecto_crud_bench', help="Base de datos (se borra y se vuelve a crear)")
+    parser.add_argument('--backend', choices=BACKENDS, default='mysql',
+                        help="Motor de base de datos (sqlite: archivo local en --sqlite-dir, sin servidor)")
+    parser.add_argument('--sqlite-dir', default=os.path.join(CARPETA, 'datos'))
+    parser.add_argument('--usuarios', type=int, default=200)
+    parser.add_argument('--planes', type=int, default=1000)
+    parser.add_argument('--participaciones', type=int, default=3000)
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--hilos', type=int, default=1)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--sin-gzip', action='store_true', help="No enviar Accept-Encoding: gzip")
+    parser.add_argument('--cache-consultas', choices=('memoria', 'sqlite'),
+                        help="Activa la caché de consultas con ese almacén")
+    parser.add_argument('--guardar-baseline', metavar='NOMBRE')
+    parser.add_argument('--comparar', metavar='NOMBRE')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="Empeoramiento relativo permitido")
+    args = parser.parse_args()
+
+    app = create_app({'DB_BACKEND': args.backend, 'SQLITE_DIR': args.sqlite_dir,
+                      'QUERY_CACHE_ENABLED': args.cache_consultas is not None,
+                      'QUERY_CACHE_BACKEND': args.cache_consultas or 'memoria',
+                      'QUERY_CACHE_PATH': os.path.join(args.sqlite_dir, 'cache_consultas.sqlite3'),
+                      # Mismo costo que el hash de los datos generados: el login no vuelve a hashear
+                      'BCRYPT_ROUNDS': generador.ROUNDS})
+    app.config['DEBUG'] = False
+    generador.usar_base_de_datos(args.db)
+
+    faltan = rutas_sin_cubrir(app)
+    if faltan:
+        print("Rutas sin paso en el escenario:", ', '.join(faltan))
+
+    generador.preparar_esquema(args.db)
+    with app.app_context():
+        datos = generador.generar(args.db, args.usuarios, args.planes, args.participaciones, args.semilla)
+    print(f"Datos: {datos.usuarios} usuarios, {datos.planes} planes, {datos.participaciones} participaciones\n")
+
+    reporte = ejecutar(app, datos, args.peticiones, args.hilos, args.semilla, not args.sin_gzip)
+    imprimir(reporte)
+
+    if args.guardar_baseline:
+        os.makedirs(CARPETA_BASELINES, exist_ok=True)
+        ruta = os.path.join(CARPETA_BASELINES, f'{args.guardar_baseline}.json')
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, indent=2, sort_keys=True)
+        print(f"\nBaseline guardada en {ruta}")
+
+    if args.comparar:
+        with open(os.path.join(CARPETA_BASELINES, f'{args.comparar}.json'), encoding='utf-8') as archivo:
+            baseline = json.load(archivo)
+        regresiones = comparar(reporte, baseline, args.tolerancia)
+        if regresiones:
+            print(f"\nRegresiones respecto de '{args.comparar}':")
+            for regresion in regresiones:
+                print(f"  - {regresion}")
+            sys.exit(1)
+        print(f"\nSin regresiones respecto de '{args.comparar}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+# benchmarks/datos.py
+
+# Generador de datos con semilla para los benchmarks
+# Crea una base de datos propia (por defecto proyecto_crud_bench) con todas las migraciones, en MySQL o
+# en un archivo SQLite según el backend configurado, y la llena con usuarios, planes y participaciones
+# (trip_schedules, el equivalente actual de la tabla favoritos). Con la misma semilla se generan siempre
+# los mismos datos.
+
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+import pymysql
+from bcrypt import gensalt, hashpw
+from base.config import cache_consultas, migraciones, mysqlconnection
+from base.config.mysqlconnection import BACKEND, DB_CONFIG, confirmar_transaccion, connectToMySQL, get_pool
+from base.models.backfill_model import BackfillTravelPlans
+from base.models.busqueda_model import IndicePlanes
+from base.models.cita_model import Citas
+from base.models.dashboard_model import DashboardCitas
+from base.models.travel_plan_model import TravelPlan
+from base.models.tutor_model import DirectorioTutores
+from base.models.usuario_model import Usuario
+
+# Contraseña de todos los usuarios generados y costo bcrypt de su hash (bajo: no se mide bcrypt)
+PASSWORD = 'Benchmark123'
+ROUNDS = 4
+
+NOMBRES = ['Ana', 'Luis', 'María', 'José', 'Lucía', 'Carlos', 'Elena', 'Jorge', 'Sofía', 'Andrés',
+           'Valeria', 'Diego', 'Camila', 'Mateo', 'Isabel', 'Tomás', 'Paula', 'Martín', 'Julia', 'Ángel']
+APELLIDOS = ['García', 'Pérez', 'López', 'Martínez', 'Sánchez', 'Gómez', 'Díaz', 'Núñez', 'Rojas', 'Álvarez',
+             'Torres', 'Ramírez', 'Flores', 'Vargas', 'Castro', 'Ortiz', 'Silva', 'Morales', 'Herrera', 'Muñoz']
+TEMAS = ['Python', 'JavaScript', 'Java', 'Spring Data', 'Flask', 'SQL', 'React', 'Algoritmos', 'Git', 'Docker']
+NOTAS = ['Repaso para el examen', 'Dudas del proyecto final', 'Practicar ejercicios', 'Revisar mi código',
+         'Preparar entrevista técnica', 'Entender consultas JOIN']
+
+# Fecha fija para que los datos no dependan del día en que se generan
+INICIO = datetime(2030, 1, 1, 8, 0, 0)
+
+
+@dataclass
+class DatosGenerados:
+    """Lo que el generador insertó (los ids son consecutivos porque la base de datos es nueva)."""
+    usuarios: int
+    planes_por_autor: Dict[int, List[int]] = field(default_factory=dict)
+    participaciones: int = 0
+
+    @property
+    def planes(self):
+        return sum(len(planes) for planes in self.planes_por_autor.values())
+
+
+def usar_base_de_datos(db):
+    """Hace que todos los modelos usen la base de datos indicada."""
+    for modelo in (Usuario, TravelPlan, Citas, DashboardCitas, DirectorioTutores, BackfillTravelPlans, IndicePlanes):
+        modelo.db = db
+    DirectorioTutores.invalidar()
+    IndicePlanes.invalidar()
+
+
+def preparar_esquema(db):
+    """Crea (o vuelve a crear, borrando lo que hubiera) la base de datos del benchmark."""
+    if db == 'proyecto_crud':
+        raise ValueError("El benchmark no puede usar la base de datos de la aplicación")
+    # Lo cacheado de una corrida anterior no corresponde a los datos nuevos
+    cache_consultas.limpiar()
+    if BACKEND['nombre'] == 'sqlite':
+        # Se borra el archivo: el pool lo vuelve a crear con las migraciones al abrirlo
+        mysqlconnection.configurar_backend('sqlite')
+        ruta = os.path.join(BACKEND['carpeta_sqlite'], f'{db}.sqlite3')
+        for sufijo in ('', '-wal', '-shm'):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+        get_pool(db)
+        return
+    connection = pymysql.connect(**DB_CONFIG)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{db}`")
+    finally:
+        connection.close()
+    migraciones.migrar_mysql(DB_CONFIG, db, eco=lambda mensaje: None)
+
+
+def _insertar(db, query, filas, tamano=1000):
+    conexion = connectToMySQL(db)
+    for i in range(0, len(filas), tamano):
+        if conexion.query_many(query, filas[i:i + tamano]) is False:
+            raise RuntimeError(f"Falló la carga de datos: {query.split('(')[0].strip()}")
+    confirmar_transaccion()
+
+
+def generar(db, usuarios=200, planes=1000, participaciones=3000, semilla=42, rounds=ROUNDS):
+    """Llena la base de datos (recién creada) con datos aleatorios reproducibles."""
+    rng = random.Random(semilla)
+    # Un solo hash para todos: calcular miles de hashes bcrypt dominaría el tiempo de preparación
+    password = hashpw(PASSWORD.encode('utf-8'), gensalt(rounds)).decode('utf-8')
+
+    filas_usuarios = [{
+        'nombre': rng.choice(NOMBRES),
+        'apellido': rng.choice(APELLIDOS),
+        'email': f'usuario{i}@bench.test',
+        'password': password,
+        'creado_en': INICIO + timedelta(minutes=i),
+    } for i in range(1, usuarios + 1)]
+    _insertar(db, """
+        INSERT INTO usuarios (nombre, apellido, email, password, creado_en, actualizado_en)
+        VALUES (%(nombre)s, %(apellido)s, %(email)s, %(password)s, %(creado_en)s, %(creado_en)s);
+    """, filas_usuarios)
+    DirectorioTutores.registrar_cambio(connectToMySQL(db))
+
+    datos = DatosGenerados(usuarios=usuarios)
+    filas_planes = []
+    for plan_id in range(1, planes + 1):
+        autor_id = rng.randint(1, usuarios)
+        inicio = date(2030, 1, 1) + timedelta(days=rng.randint(0, 365))
+        filas_planes.append({
+            'destination': rng.choice(TEMAS),
+            'description': '',
+            'travel_start_date': inicio,
+            'travel_end_date': inicio,
+            'plan': rng.choice(NOTAS),
+            'autor_id': autor_id,
+            'creado_en': INICIO + timedelta(minutes=7 * plan_id),
+        })
+        datos.planes_por_autor.setdefault(autor_id, []).append(plan_id)
+    _insertar(db, """
+        INSERT INTO travel_plans (destination, description, travel_start_date, travel_end_date, plan, autor_id,
+                                  creado_en, actualizado_en)
+        VALUES (%(destination)s, %(description)s, %(travel_start_date)s, %(travel_end_date)s, %(plan)s,
+                %(autor_id)s, %(creado_en)s, %(creado_en)s);
+    """, filas_planes)
+
+    # Participaciones únicas (plan, usuario) en planes de otros autores
+    pares = set()
+    maximo = min(participaciones, planes * (usuarios - 1))
+    while len(pares) < maximo:
+        plan_id = rng.randint(1, planes)
+        usuario_id = rng.randint(1, usuarios)
+        if usuario_id != filas_planes[plan_id - 1]['autor_id']:
+            pares.add((plan_id, usuario_id))
+    filas_participaciones = [{'plan_id': plan_id, 'usuario_id': usuario_id,
+                              'joined_at': INICIO + timedelta(days=1, minutes=i)}
+                             for i, (plan_id, usuario_id) in enumerate(sorted(pares))]
+    _insertar(db, """
+        INSERT INTO trip_schedules (travel_plan_id, usuario_id, joined_at)
+        VALUES (%(plan_id)s, %(usuario_id)s, %(joined_at)s);
+    """, filas_participaciones)
+    datos.participaciones = len(filas_participaciones)
+
+    # Las participaciones se insertaron directo en trip_schedules: se llena participantes_count
+    if connectToMySQL(db).query_db(TravelPlan.QUERY_RECONCILIAR, {'desde': 0, 'hasta': planes}) is False:
+        raise RuntimeError("Falló el recuento de participantes")
+    confirmar_transaccion()
+    return datos
+
+
+def generar_citas(db, usuarios, citas=1000, favoritos=3000, semilla=42):
+    """Llena las tablas antiguas citas/favoritos (las usa el asesor de índices, no la prueba de carga)."""
+    rng = random.Random(semilla)
+    filas_citas = [{'cita': f"{rng.choice(NOTAS)} ({i})", 'autor_id': rng.randint(1, usuarios),
+                    'creado_en': INICIO + timedelta(minutes=5 * i)} for i in range(1, citas + 1)]
+    _insertar(db, """
+        INSERT INTO citas (cita, autor_id, creado_en, actualizado_en)
+        VALUES (%(cita)s, %(autor_id)s, %(creado_en)s, %(creado_en)s);
+    """, filas_citas)
+    pares = set()
+    while len(pares) < min(favoritos, citas * usuarios):
+        pares.add((rng.randint(1, usuarios), rng.randint(1, citas)))
+    _insertar(db, """
+        INSERT INTO favoritos (usuario_id, cita_id) VALUES (%(usuario_id)s, %(cita_id)s);
+    """, [{'usuario_id': usuario_id, 'cita_id': cita_id} for usuario_id, cita_id in sorted(pares)])
@@ -1,29 +1,11 @@
--- MySQL Workbench Forward Engineering
+-- Esquema inicial: usuarios, travel_plans y trip_schedules
+-- Las migraciones se aplican con 'flask migrar' (ver base/config/migraciones.py), que las registra en
+-- schema_migraciones y las puede repetir sin error sobre una base de datos creada a mano
 
-SET @OLD_UNIQUE_CHECKS=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0;
-SET @OLD_FOREIGN_KEY_CHECKS=@@FOREIGN_KEY_CHECKS, FOREIGN_KEY_CHECKS=0;
-SET @OLD_SQL_MODE=@@SQL_MODE, SQL_MODE='ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,NO_ZERO_IN_DATE,NO_ZERO_DATE,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
-
--- -----------------------------------------------------
--- Schema mydb
--- -----------------------------------------------------
--- -----------------------------------------------------
--- Schema proyecto_crud
--- -----------------------------------------------------
-DROP SCHEMA IF EXISTS `proyecto_crud` ;
-
--- -----------------------------------------------------
--- Schema proyecto_crud
 -- -----------------------------------------------------
-CREATE SCHEMA IF NOT EXISTS `proyecto_crud` DEFAULT CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci ;
-USE `proyecto_crud` ;
-
--- -----------------------------------------------------
--- Table `proyecto_crud`.`usuarios`
+-- Table `usuarios`
 -- -----------------------------------------------------
-DROP TABLE IF EXISTS `proyecto_crud`.`usuarios` ;
-
-CREATE TABLE IF NOT EXISTS `proyecto_crud`.`usuarios` (
+CREATE TABLE IF NOT EXISTS `usuarios` (
   `id` INT NOT NULL AUTO_INCREMENT,
   `nombre` VARCHAR(45) NOT NULL,
   `apellido` VARCHAR(45) NOT NULL,
@@ -39,11 +21,9 @@ COLLATE = utf8mb4_0900_ai_ci;
 
 
 -- -----------------------------------------------------
--- Table `proyecto_crud`.`travel_plans`
+-- Table `travel_plans`
 -- -----------------------------------------------------
-DROP TABLE IF EXISTS `proyecto_crud`.`travel_plans` ;
-
-CREATE TABLE IF NOT EXISTS `proyecto_crud`.`travel_plans` (
+CREATE TABLE IF NOT EXISTS `travel_plans` (
   `id` INT NOT NULL AUTO_INCREMENT,
   `destination` VARCHAR(255) NOT NULL,
   `description` TEXT,
@@ -58,7 +38,7 @@ CREATE TABLE IF NOT EXISTS `proyecto_crud`.`travel_plans` (
   INDEX `fk_travel_plans_usuarios_idx` (`autor_id` ASC) VISIBLE,
   CONSTRAINT `fk_travel_plans_usuarios`
     FOREIGN KEY (`autor_id`)
-    REFERENCES `proyecto_crud`.`usuarios` (`id`)
+    REFERENCES `usuarios` (`id`)
     ON DELETE CASCADE)
 ENGINE = InnoDB
 DEFAULT CHARACTER SET = utf8mb4
@@ -66,11 +46,9 @@ COLLATE = utf8mb4_0900_ai_ci;
 
 
 -- -----------------------------------------------------
--- Table `proyecto_crud`.`trip_schedules`
+-- Table `trip_schedules`
 -- -----------------------------------------------------
-DROP TABLE IF EXISTS `proyecto_crud`.`trip_schedules` ;
-
-CREATE TABLE IF NOT EXISTS `proyecto_crud`.`trip_schedules` (
+CREATE TABLE IF NOT EXISTS `trip_schedules` (
   `id` INT NOT NULL AUTO_INCREMENT,
   `travel_plan_id` INT NOT NULL,
   `usuario_id` INT NOT NULL,
@@ -80,17 +58,12 @@ CREATE TABLE IF NOT EXISTS `proyecto_crud`.`trip_schedules` (
   INDEX `fk_trip_schedules_travel_plans_idx` (`travel_plan_id` ASC) VISIBLE,
   CONSTRAINT `fk_trip_schedules_travel_plans`
     FOREIGN KEY (`travel_plan_id`)
-    REFERENCES `proyecto_crud`.`travel_plans` (`id`)
+    REFERENCES `travel_plans` (`id`)
     ON DELETE CASCADE,
   CONSTRAINT `fk_trip_schedules_usuarios`
     FOREIGN KEY (`usuario_id`)
-    REFERENCES `proyecto_crud`.`usuarios` (`id`)
+    REFERENCES `usuarios` (`id`)
     ON DELETE CASCADE)
 ENGINE = InnoDB
 DEFAULT CHARACTER SET = utf8mb4
 COLLATE = utf8mb4_0900_ai_ci;
-
-
-SET SQL_MODE=@OLD_SQL_MODE;
-SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS;
-SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS;
\ No newline at end of file
@@ -0,0 +1,5 @@
+-- Agregar columna fecha_nacimiento a la tabla usuarios
+-- Admite NULL: el registro no la pide y, con NOT NULL sin valor por defecto, el INSERT de
+-- Usuario.guardar fallaría en modo estricto (y SQLite no puede agregar la columna)
+ALTER TABLE usuarios 
+ADD COLUMN fecha_nacimiento DATE NULL AFTER apellido;
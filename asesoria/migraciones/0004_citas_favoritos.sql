@@ -0,0 +1,52 @@
+-- Tablas antiguas citas/favoritos, que siguen usando Citas (cita_model.py) y 'flask backfill-travel-plans'
+-- Antes solo existían en las bases de datos creadas a mano: aquí se crean si faltan y se aseguran sus índices
+
+CREATE TABLE IF NOT EXISTS citas (
+  id INT NOT NULL AUTO_INCREMENT,
+  cita TEXT NOT NULL,
+  autor_id INT NOT NULL,
+  creado_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  actualizado_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (id),
+  INDEX idx_citas_autor_creado (autor_id, creado_en),
+  CONSTRAINT fk_citas_usuarios
+    FOREIGN KEY (autor_id)
+    REFERENCES usuarios (id)
+    ON DELETE CASCADE
+) ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+CREATE TABLE IF NOT EXISTS favoritos (
+  id INT NOT NULL AUTO_INCREMENT,
+  usuario_id INT NOT NULL,
+  cita_id INT NOT NULL,
+  creado_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id),
+  INDEX idx_favoritos_usuario_cita (usuario_id, cita_id),
+  INDEX idx_favoritos_cita (cita_id),
+  CONSTRAINT fk_favoritos_usuarios
+    FOREIGN KEY (usuario_id)
+    REFERENCES usuarios (id)
+    ON DELETE CASCADE,
+  CONSTRAINT fk_favoritos_citas
+    FOREIGN KEY (cita_id)
+    REFERENCES citas (id)
+    ON DELETE CASCADE
+) ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4
+COLLATE = utf8mb4_0900_ai_ci;
+
+-- Los mismos índices para las tablas que ya existían (si están, el runner omite la sentencia)
+
+-- Citas de un autor en orden de creación (Citas.obtener_por_autor)
+ALTER TABLE citas
+  ADD INDEX idx_citas_autor_creado (autor_id, creado_en);
+
+-- Favoritos de un usuario y el NOT IN de Citas.obtener_no_favoritas_usuario
+ALTER TABLE favoritos
+  ADD INDEX idx_favoritos_usuario_cita (usuario_id, cita_id);
+
+-- Favoritos de una cita (el JOIN de backfill-travel-plans y el ON DELETE CASCADE)
+ALTER TABLE favoritos
+  ADD INDEX idx_favoritos_cita (cita_id);
@@ -0,0 +1,18 @@
+-- Preparar travel_plans/trip_schedules para copiar los datos de citas/favoritos
+-- Se aplica antes de 'flask backfill-travel-plans'
+
+-- Guarda el id de la cita de origen: permite reanudar la copia y enlazar los favoritos.
+-- Columna e índice van en sentencias separadas: si la columna ya existía, el error 1060 descarta
+-- todo el ALTER y el runner lo omite, así que un índice en la misma sentencia no se crearía
+ALTER TABLE travel_plans
+  ADD COLUMN legacy_cita_id INT NULL,
+  ALGORITHM = INPLACE, LOCK = NONE;
+
+ALTER TABLE travel_plans
+  ADD UNIQUE INDEX uq_travel_plans_legacy_cita (legacy_cita_id),
+  ALGORITHM = INPLACE, LOCK = NONE;
+
+-- Un usuario solo puede unirse una vez a cada plan (y la copia se puede repetir sin duplicar)
+ALTER TABLE trip_schedules
+  ADD UNIQUE INDEX uq_trip_schedules_plan_usuario (travel_plan_id, usuario_id),
+  ALGORITHM = INPLACE, LOCK = NONE;
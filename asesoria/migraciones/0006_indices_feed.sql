@@ -0,0 +1,9 @@
+-- Índices para el feed paginado de planes (TravelPlan.obtener_feed)
+
+-- Recorre los planes en el orden del feed (creado_en DESC, id DESC) sin ordenar en memoria
+ALTER TABLE travel_plans
+  ADD INDEX idx_travel_plans_feed (creado_en, id),
+  ALGORITHM = INPLACE, LOCK = NONE;
+
+-- El anti-join "planes a los que el usuario no se unió" se resuelve con el índice único
+-- uq_trip_schedules_plan_usuario (travel_plan_id, usuario_id)
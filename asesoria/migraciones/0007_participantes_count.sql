@@ -0,0 +1,9 @@
+-- Contador de participantes por plan (travel_plans.participantes_count)
+-- Después de aplicarla en una base de datos con datos: 'flask reconciliar-participantes',
+-- que llena el contador de los planes existentes en lotes cortos (sin bloquear toda la tabla)
+
+-- Participantes del plan sin contar al autor (los mismos que lista obtener_usuarios_unidos_al_plan).
+-- Lo mantienen unirse_a_plan/cancelar_participacion en la misma transacción que trip_schedules
+ALTER TABLE travel_plans
+  ADD COLUMN participantes_count INT NOT NULL DEFAULT 0,
+  ALGORITHM = INPLACE, LOCK = NONE;
@@ -0,0 +1,5 @@
+-- Índice para la versión del directorio de tutores (DirectorioTutores.COLUMNAS_VERSION), que forma parte
+-- del ETag de las páginas de planes: COUNT(*) y MAX(actualizado_en) se resuelven con el índice
+ALTER TABLE usuarios
+  ADD INDEX idx_usuarios_actualizado (actualizado_en),
+  ALGORITHM = INPLACE, LOCK = NONE;
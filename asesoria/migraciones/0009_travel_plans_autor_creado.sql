@@ -0,0 +1,11 @@
+-- Planes de un autor, los más nuevos primero (TravelPlan.obtener_por_autor, en el dashboard):
+-- el índice entrega las filas ya ordenadas por creado_en y la consulta no ordena en memoria (filesort)
+ALTER TABLE travel_plans
+  ADD INDEX idx_travel_plans_autor_creado (autor_id, creado_en),
+  ALGORITHM = INPLACE, LOCK = NONE;
+
+-- En las bases de datos MySQL donde 0005 se aplicó con la columna legacy_cita_id ya creada, el ALTER
+-- que también agregaba este índice se omitió entero (error 1060). Si el índice existe, se omite
+ALTER TABLE travel_plans
+  ADD UNIQUE INDEX uq_travel_plans_legacy_cita (legacy_cita_id),
+  ALGORITHM = INPLACE, LOCK = NONE;
@@ -0,0 +1,15 @@
+-- Versión del directorio de tutores (DirectorioTutores): un contador en una sola fila que sube cada vez
+-- que cambia el id, nombre o apellido de algún usuario. La consulta de versión de las páginas de planes
+-- (TravelPlan.QUERY_VERSION) lo lee por clave primaria en lugar de contar la tabla usuarios
+CREATE TABLE IF NOT EXISTS `tutores_version` (
+  `id` TINYINT NOT NULL,
+  `version` BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`id`))
+ENGINE = InnoDB;
+
+INSERT IGNORE INTO tutores_version (id, version) VALUES (1, 0);
+
+-- Solo lo usaba la versión anterior del directorio (COUNT(*) y MAX(actualizado_en) de usuarios)
+ALTER TABLE usuarios
+  DROP INDEX idx_usuarios_actualizado,
+  ALGORITHM = INPLACE, LOCK = NONE;
@@ -0,0 +1,74 @@
+# tests/conftest.py
+
+# Fixtures comunes: una aplicación con el backend SQLite en una carpeta temporal (el esquema se crea
+# con las migraciones al abrir el archivo) y el estado global de los módulos restaurado al terminar.
+# Las pruebas se ejecutan desde la carpeta asesoria/: python -m pytest
+
+import pytest
+from base import create_app
+from base.config import cache_consultas, mysqlconnection
+from base.config.mysqlconnection import connectToMySQL
+from base.config.seguridad import hash_password
+from base.models.busqueda_model import IndicePlanes
+from base.models.tutor_model import DirectorioTutores
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'DB_BACKEND': 'sqlite',
+        'SQLITE_DIR': str(tmp_path / 'db'),
+        'JINJA_BYTECODE_CACHE_DIR': str(tmp_path / 'jinja'),
+        'BCRYPT_ROUNDS': 4,
+    })
+    DirectorioTutores.invalidar()
+    IndicePlanes.invalidar()
+    yield app
+    mysqlconnection.configurar_backend('mysql')
+    cache_consultas.configurar()
+    DirectorioTutores.invalidar()
+    IndicePlanes.invalidar()
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db(app):
+    """Conexión a la base de datos de la aplicación, fuera de las peticiones: cada escritura se confirma sola."""
+    return connectToMySQL('proyecto_crud')
+
+
+def crear_usuario(conexion, numero, nombre='Ana', apellido='Garcia'):
+    """Inserta un usuario usuario<numero>@test.com y devuelve su id."""
+    return conexion.query_db("""
+        INSERT INTO usuarios (nombre, apellido, email, password)
+        VALUES (%(nombre)s, %(apellido)s, %(email)s, 'x');
+    """, {'nombre': nombre, 'apellido': apellido, 'email': f'usuario{numero}@test.com'})
+
+
+def crear_plan(conexion, autor_id, destino='Python', plan='Repaso para el examen'):
+    """Inserta un plan del autor y devuelve su id."""
+    return conexion.query_db("""
+        INSERT INTO travel_plans (destination, description, travel_start_date, travel_end_date, plan, autor_id)
+        VALUES (%(destino)s, '', '2030-01-01', '2030-01-02', %(plan)s, %(autor_id)s);
+    """, {'destino': destino, 'plan': plan, 'autor_id': autor_id})
+
+
+def iniciar_sesion(cliente, conexion, numero, nombre='Ana', apellido='Garcia'):
+    """Registra un usuario con contraseña 'Secreta123', inicia su sesión en el cliente y devuelve su id."""
+    usuario_id = conexion.query_db("""
+        INSERT INTO usuarios (nombre, apellido, email, password)
+        VALUES (%(nombre)s, %(apellido)s, %(email)s, %(password)s);
+    """, {'nombre': nombre, 'apellido': apellido, 'email': f'usuario{numero}@test.com',
+          'password': hash_password('Secreta123')})
+    respuesta = cliente.post('/usuarios/procesar_login',
+                             data={'email': f'usuario{numero}@test.com', 'password': 'Secreta123'})
+    assert respuesta.status_code == 302 and respuesta.location.endswith('/citas')
+    # Sin el mensaje de bienvenida pendiente (las páginas con mensajes no se validan con ETag)
+    with cliente.session_transaction() as sesion:
+        sesion.pop('_flashes', None)
+    return usuario_id
@@ -0,0 +1,43 @@
+from tests.conftest import crear_plan, crear_usuario, iniciar_sesion
+
+
+def test_sin_sesion_responde_401(cliente):
+    respuesta = cliente.get('/api/v1/usuario')
+    assert respuesta.status_code == 401 and respuesta.get_json() == {'error': 'No autenticado'}
+
+
+def test_unirse_y_cancelar(cliente, db):
+    usuario_id = iniciar_sesion(cliente, db, 1)
+    plan_id = crear_plan(db, crear_usuario(db, 2))
+    assert cliente.put(f'/api/v1/planes/{plan_id}/participacion').status_code == 204
+    # Repetir no es un error
+    assert cliente.put(f'/api/v1/planes/{plan_id}/participacion').status_code == 204
+    assert cliente.get(f'/api/v1/planes/{plan_id}?fields=participantes_count').get_json() == {'participantes_count': 1}
+    assert cliente.delete(f'/api/v1/planes/{plan_id}/participacion').status_code == 204
+    assert cliente.delete(f'/api/v1/planes/{plan_id}/participacion').status_code == 204
+    assert db.query_db("SELECT COUNT(*) AS n FROM trip_schedules WHERE usuario_id = %(id)s",
+                       {'id': usuario_id})[0]['n'] == 0
+
+
+def test_plan_inexistente_responde_404(cliente, db):
+    iniciar_sesion(cliente, db, 1)
+    for metodo in (cliente.put, cliente.delete):
+        respuesta = metodo('/api/v1/planes/999/participacion')
+        assert respuesta.status_code == 404
+        assert respuesta.get_json() == {'error': 'Plan no encontrado'}
+    respuesta = cliente.delete('/api/v1/planes/999')
+    assert respuesta.status_code == 404 and respuesta.get_json() == {'error': 'Plan no encontrado'}
+    assert cliente.get('/api/v1/planes/999').status_code == 404
+
+
+def test_no_puede_eliminar_planes_de_otros(cliente, db):
+    iniciar_sesion(cliente, db, 1)
+    plan_id = crear_plan(db, crear_usuario(db, 2))
+    assert cliente.delete(f'/api/v1/planes/{plan_id}').status_code == 404
+    assert db.query_db("SELECT COUNT(*) AS n FROM travel_plans")[0]['n'] == 1
+
+
+def test_campos_desconocidos_responden_400(cliente, db):
+    iniciar_sesion(cliente, db, 1)
+    respuesta = cliente.get('/api/v1/usuario?fields=id,password')
+    assert respuesta.status_code == 400 and respuesta.get_json()['campos'] == ['password']
@@ -0,0 +1,105 @@
+# tests/test_busqueda_model.py
+
+# Índice invertido de la búsqueda de planes: términos, relevancia, prefijos y qué pasa si la base de
+# datos falla al construirlo
+
+import pymysql
+import pytest
+from base.models import busqueda_model
+from base.models.busqueda_model import IndicePlanes, _Indice, tokenizar
+from tests.conftest import crear_plan, crear_usuario
+
+
+def _indice(*planes):
+    indice = _Indice()
+    for plan_id, destino, plan, descripcion in planes:
+        indice.agregar(plan_id, {'destination': tokenizar(destino), 'plan': tokenizar(plan),
+                                 'description': tokenizar(descripcion)})
+    return indice
+
+
+def test_tokenizar_pliega_tildes_plurales_y_palabras_vacias():
+    assert tokenizar("Los Exámenes de la Química") == ['examene', 'quimica']
+    assert tokenizar("viajes a Perú") == ['viaje', 'peru']
+    assert tokenizar("de la") == []
+    # Mientras se escribe, la última palabra puede ser el principio de otra
+    assert tokenizar("repaso de", conservar_ultima=True) == ['repaso', 'de']
+    assert tokenizar("repaso de la", conservar_ultima=True) == ['repaso', 'la']
+
+
+def test_relevancia_por_columna_y_frecuencia():
+    indice = _indice(
+        (1, 'Historia', 'Repaso de algebra', ''),
+        (2, 'Algebra', 'Ejercicios', ''),
+        (3, 'Fisica', 'Ejercicios', 'algebra lineal'),
+        (4, 'Quimica', 'Nada que ver', ''),
+    )
+    # El tema pesa más que las notas y las notas más que la descripción
+    assert indice.buscar(['algebra'], prefijo_final=False) == [2, 1, 3]
+    # Todos los términos tienen que estar en el plan
+    assert indice.buscar(['algebra', 'ejercicio'], prefijo_final=False) == [2, 3]
+    assert indice.buscar(['algebra', 'quimica'], prefijo_final=False) == []
+
+
+def test_prefijo_final_y_empates():
+    indice = _indice(
+        (1, 'Laboratorio', '', ''),
+        (2, 'Lab', '', ''),
+        (3, 'Laboratorio', '', ''),
+    )
+    # La palabra completa vale más que las que solo empiezan por ella; a igual relevancia, el más nuevo
+    assert indice.buscar(['lab']) == [2, 3, 1]
+    assert indice.buscar(['lab'], prefijo_final=False) == [2]
+    assert indice.con_prefijo('lab') == ['lab', 'laboratorio']
+
+
+def test_quitar_y_reindexar_columnas():
+    indice = _indice((1, 'Algebra', 'Repaso', ''), (2, 'Algebra', 'Examen', ''))
+    indice.agregar(1, {'destination': tokenizar('Geometria')})
+    assert indice.buscar(['algebra'], prefijo_final=False) == [2]
+    assert indice.buscar(['repaso'], prefijo_final=False) == [1]
+    indice.quitar(2)
+    assert indice.buscar(['algebra'], prefijo_final=False) == []
+    assert 'examen' not in indice.postings and 'examen' not in indice.terminos
+
+
+def test_buscar_con_palabra_vacia_como_prefijo(app, db):
+    autor_id = crear_usuario(db, 1)
+    primero = crear_plan(db, autor_id, destino='Lagos de Chile', plan='Viaje de estudio')
+    segundo = crear_plan(db, autor_id, destino='Derecho civil', plan='Repaso')
+    assert IndicePlanes.buscar("la") == ([primero], 1)
+    assert IndicePlanes.buscar("de") == ([segundo], 1)
+    assert IndicePlanes.buscar("repaso de") == ([segundo], 1)
+    # Con un espacio al final la palabra está completa: "de" sola no busca nada
+    assert IndicePlanes.buscar("de ") == ([], 0)
+    assert IndicePlanes.buscar("viaje estudio") == ([primero], 1)
+
+
+def test_error_de_la_base_de_datos_espera_antes_de_reintentar(app, monkeypatch):
+    intentos = []
+
+    class ConexionCaida:
+        def query_stream(self, query):
+            intentos.append(query)
+            raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+
+    monkeypatch.setattr(busqueda_model, 'connectToMySQL', lambda db: ConexionCaida())
+    assert IndicePlanes.buscar("algebra") == ([], 0)
+    assert IndicePlanes.buscar("algebra") == ([], 0)
+    assert len(intentos) == 1
+    # Pasada la espera (o al invalidar el índice) se vuelve a intentar
+    IndicePlanes.invalidar()
+    IndicePlanes.buscar("algebra")
+    assert len(intentos) == 2
+
+
+def test_un_error_del_codigo_no_se_oculta(app, monkeypatch):
+    class ConexionRota:
+        def query_stream(self, query):
+            raise KeyError('destination')
+
+    monkeypatch.setattr(busqueda_model, 'connectToMySQL', lambda db: ConexionRota())
+    with pytest.raises(KeyError):
+        IndicePlanes.buscar("algebra")
+    # Los cambios ya no se guardan para un índice que no se va a construir
+    assert IndicePlanes._cambios is None
@@ -0,0 +1,140 @@
+import os
+import pickle
+import sqlite3
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import pytest
+from flask import Flask
+from base.config import cache_consultas
+from base.config.cache_consultas import AlmacenMemoria, AlmacenSQLite, tablas_escritas, tablas_leidas
+
+
+@pytest.fixture(params=['memoria', 'sqlite'])
+def almacen(request, tmp_path):
+    if request.param == 'sqlite':
+        cache_consultas.configurar(activa=True, almacen_nombre='sqlite', ruta=str(tmp_path / 'cache.sqlite3'))
+    else:
+        cache_consultas.configurar(activa=True)
+    yield cache_consultas.almacen
+    cache_consultas.configurar()
+
+
+def _leer(query, data=None, filas=None):
+    """Prepara la lectura y, si no estaba en la caché, guarda 'filas' como su resultado."""
+    lectura = cache_consultas.preparar('db', query, data)
+    guardadas = cache_consultas.obtener(lectura)
+    if guardadas is None and filas is not None:
+        cache_consultas.guardar(lectura, filas)
+    return guardadas
+
+
+def test_tablas_de_las_consultas():
+    assert tablas_leidas("SELECT * FROM usuarios u JOIN `travel_plans` p ON p.autor_id = u.id") == \
+        {'usuarios', 'travel_plans'}
+    assert tablas_leidas("SELECT * FROM citas WHERE fecha > NOW()") is None
+    assert tablas_leidas("SELECT 1") is None
+    assert tablas_escritas("UPDATE usuarios SET nombre = %s WHERE id = %s") == {'usuarios'}
+    assert tablas_escritas("UPDATE travel_plans p JOIN usuarios u ON u.id = p.autor_id SET p.plan = u.nombre") == \
+        {'travel_plans', 'usuarios'}
+    # Los borrados se llevan por delante las filas de las tablas con ON DELETE CASCADE
+    assert tablas_escritas("DELETE FROM usuarios WHERE id = %s") == \
+        {'usuarios', 'travel_plans', 'trip_schedules', 'citas', 'favoritos'}
+    assert tablas_escritas("INSERT INTO citas (tema) VALUES (%s)") == {'citas'}
+    assert tablas_escritas("CALL recalcular()") is None
+
+
+def test_invalidacion_por_tabla(almacen):
+    _leer("SELECT * FROM usuarios", filas=[{'id': 1}])
+    _leer("SELECT * FROM citas", filas=[{'id': 2}])
+    assert _leer("SELECT  *  FROM usuarios;") == [{'id': 1}]
+    cache_consultas.invalidar_escritura('db', "UPDATE usuarios SET nombre = 'x'")
+    assert _leer("SELECT * FROM usuarios") is None
+    assert _leer("SELECT * FROM citas") == [{'id': 2}]
+    # Sin saber qué tablas toca, se borra toda la base de datos
+    cache_consultas.invalidar_escritura('db', "CALL recalcular()")
+    assert _leer("SELECT * FROM citas") is None
+
+
+def test_invalidacion_en_cascada(almacen):
+    _leer("SELECT * FROM favoritos WHERE cita_id = %s", (1,), filas=[{'id': 1}])
+    cache_consultas.invalidar_escritura('db', "UPDATE usuarios SET nombre = 'x'")
+    assert _leer("SELECT * FROM favoritos WHERE cita_id = %s", (1,)) == [{'id': 1}]
+    cache_consultas.invalidar_escritura('db', "DELETE FROM usuarios WHERE id = 1")
+    assert _leer("SELECT * FROM favoritos WHERE cita_id = %s", (1,)) is None
+
+
+def test_lectura_anterior_a_una_escritura_no_se_guarda(almacen):
+    lectura = cache_consultas.preparar('db', "SELECT * FROM usuarios", None)
+    cache_consultas.invalidar_escritura('db', "INSERT INTO usuarios (nombre) VALUES ('x')")
+    cache_consultas.guardar(lectura, [{'id': 1}])
+    assert _leer("SELECT * FROM usuarios") is None
+
+
+def test_tipos_de_pymysql_ida_y_vuelta(almacen):
+    fila = {'creado': datetime(2030, 1, 2, 3, 4, 5, 6), 'dia': date(2030, 1, 2), 'hora': time(9, 30),
+            'duracion': timedelta(hours=1, microseconds=5), 'precio': Decimal('10.50'), 'avatar': b'\x00\xff',
+            'nombre': 'Ñandú', 'n': 3, 'nada': None, '$': 'columna', 'v': 1.5}
+    _leer("SELECT * FROM usuarios", filas=[fila])
+    guardada = _leer("SELECT * FROM usuarios")
+    assert guardada == [fila]
+    assert [type(v) for v in guardada[0].values()] == [type(v) for v in fila.values()]
+
+
+def test_sqlite_necesita_ruta():
+    with pytest.raises(ValueError):
+        cache_consultas.configurar(almacen_nombre='sqlite')
+
+
+def test_sqlite_por_defecto_en_instance(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / 'instance'))
+    app.config['QUERY_CACHE_BACKEND'] = 'sqlite'
+    try:
+        cache_consultas.init_app(app)
+        ruta = os.path.join(app.instance_path, 'cache_consultas.sqlite3')
+        assert cache_consultas.almacen.ruta == ruta
+        assert os.stat(app.instance_path).st_mode & 0o777 == 0o700
+        assert os.stat(ruta).st_mode & 0o777 == 0o600
+    finally:
+        cache_consultas.configurar()
+
+
+def test_sqlite_rechaza_archivos_de_otros(tmp_path):
+    compartida = tmp_path / 'compartida'
+    compartida.mkdir()
+    compartida.chmod(0o777)
+    with pytest.raises(PermissionError):
+        AlmacenSQLite(str(compartida / 'cache.sqlite3'))
+    ruta = tmp_path / 'cache.sqlite3'
+    ruta.touch()
+    ruta.chmod(0o666)
+    with pytest.raises(PermissionError):
+        AlmacenSQLite(str(ruta))
+    enlace = tmp_path / 'enlace.sqlite3'
+    enlace.symlink_to(tmp_path / 'otro.sqlite3')
+    with pytest.raises(PermissionError):
+        AlmacenSQLite(str(enlace))
+
+
+def test_sqlite_descarta_entradas_con_pickle(tmp_path):
+    # Un archivo de una versión anterior: sus filas no se cargan
+    ruta = str(tmp_path / 'cache.sqlite3')
+    conexion = sqlite3.connect(ruta)
+    conexion.executescript(AlmacenSQLite.ESQUEMA)
+    conexion.execute("INSERT INTO entradas VALUES (?, ?, 1e12, 0, 1)",
+                     (AlmacenSQLite._clave('x'), pickle.dumps([{'id': 1}])))
+    conexion.commit()
+    conexion.close()
+    os.chmod(ruta, 0o600)
+    almacen = AlmacenSQLite(ruta)
+    try:
+        assert almacen.obtener('x') is None
+        assert almacen.stats()['entradas'] == 0
+    finally:
+        almacen.cerrar()
+
+
+def test_memoria_devuelve_copias():
+    almacen = AlmacenMemoria()
+    almacen.guardar('x', [{'id': 1}], ('*',), (0,), 60)
+    almacen.obtener('x')[0]['id'] = 2
+    assert almacen.obtener('x') == [{'id': 1}]
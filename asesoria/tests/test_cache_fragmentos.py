@@ -0,0 +1,48 @@
+import os
+import pytest
+from flask import Flask, render_template_string
+from base.config import cache_fragmentos
+
+
+@pytest.fixture
+def app_minima(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / 'instance'))
+    cache_fragmentos.fragmentos.limpiar()
+    yield app
+    cache_fragmentos.fragmentos.limpiar()
+
+
+def test_bytecode_por_defecto_en_instance(app_minima):
+    cache_fragmentos.init_app(app_minima)
+    carpeta = os.path.join(app_minima.instance_path, 'jinja')
+    assert app_minima.jinja_env.bytecode_cache.directory == carpeta
+    assert os.stat(carpeta).st_mode & 0o777 == 0o700
+
+
+def test_rechaza_carpeta_con_escritura_de_otros(app_minima, tmp_path):
+    carpeta = tmp_path / 'compartida'
+    carpeta.mkdir()
+    carpeta.chmod(0o777)
+    app_minima.config['JINJA_BYTECODE_CACHE_DIR'] = str(carpeta)
+    with pytest.raises(PermissionError):
+        cache_fragmentos.init_app(app_minima)
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid') or os.getuid() != 0, reason="solo root puede cambiar el dueño")
+def test_rechaza_carpeta_de_otro_usuario(app_minima, tmp_path):
+    carpeta = tmp_path / 'ajena'
+    carpeta.mkdir(mode=0o700)
+    os.chown(carpeta, 12345, 12345)
+    app_minima.config['JINJA_BYTECODE_CACHE_DIR'] = str(carpeta)
+    with pytest.raises(PermissionError):
+        cache_fragmentos.init_app(app_minima)
+
+
+def test_fragmento_se_reutiliza_hasta_invalidarlo(app_minima):
+    cache_fragmentos.init_app(app_minima)
+    plantilla = "{% cache 'plan', plan_id, 'feed' %}{{ texto }}{% endcache %}"
+    with app_minima.app_context():
+        assert render_template_string(plantilla, plan_id=1, texto='antes') == 'antes'
+        assert render_template_string(plantilla, plan_id=1, texto='después') == 'antes'
+        cache_fragmentos.invalidar('plan', 1)
+        assert render_template_string(plantilla, plan_id=1, texto='después') == 'después'
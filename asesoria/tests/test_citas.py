@@ -0,0 +1,32 @@
+# tests/test_citas.py
+
+# Operaciones en lote de /citas: los ids que no son números se ignoran en vez de romper la petición
+
+import pytest
+from tests.conftest import crear_plan, crear_usuario, iniciar_sesion
+
+
+def _inscripciones(db, usuario_id):
+    filas = db.query_db("SELECT travel_plan_id FROM trip_schedules WHERE usuario_id = %(id)s ORDER BY travel_plan_id",
+                        {'id': usuario_id})
+    return [fila['travel_plan_id'] for fila in filas]
+
+
+@pytest.mark.parametrize('malformado', ['²', '①', '٣x', '-1', 'abc', ''])
+def test_unirse_con_ids_malformados(cliente, db, malformado):
+    usuario_id = iniciar_sesion(cliente, db, 1)
+    autor_id = crear_usuario(db, 2)
+    planes = [crear_plan(db, autor_id) for _ in range(2)]
+    respuesta = cliente.post('/citas/lote/unirse',
+                             data={'plan_ids': [f'{planes[0]},{malformado}', f' {planes[1]} ', malformado]})
+    assert respuesta.status_code == 302 and respuesta.location.endswith('/citas')
+    assert _inscripciones(db, usuario_id) == planes
+
+
+def test_cancelar_con_ids_malformados(cliente, db):
+    usuario_id = iniciar_sesion(cliente, db, 1)
+    plan_id = crear_plan(db, crear_usuario(db, 2))
+    assert cliente.post('/citas/lote/unirse', data={'plan_ids': str(plan_id)}).status_code == 302
+    respuesta = cliente.post('/citas/lote/cancelar_participacion', data={'plan_ids': f'①,{plan_id},²'})
+    assert respuesta.status_code == 302
+    assert _inscripciones(db, usuario_id) == []
@@ -0,0 +1,131 @@
+# tests/test_compresion.py
+
+# Middleware de compresión: qué respuestas se comprimen, cómo quedan los headers y el streaming por
+# bloques (gzip siempre; br solo si está instalado brotli)
+
+import gzip
+import zlib
+import pytest
+from flask import Flask, Response, stream_with_context
+from base.config import compresion
+
+TEXTO = 'Repaso de álgebra para el examen. ' * 100
+
+
+@pytest.fixture
+def cliente():
+    guardada = dict(compresion.COMPRESION)
+    app = Flask(__name__)
+    cerrados = []
+    app.cerrados = cerrados
+
+    @app.route('/texto')
+    def texto():
+        respuesta = Response(TEXTO, mimetype='text/html')
+        respuesta.set_etag('abc')
+        respuesta.headers['Vary'] = 'Cookie'
+        return respuesta
+
+    @app.route('/corto')
+    def corto():
+        return Response('hola', mimetype='text/plain')
+
+    @app.route('/imagen')
+    def imagen():
+        return Response(b'\x89PNG' + b'\x00' * 1000, mimetype='image/png')
+
+    @app.route('/ya-comprimido')
+    def ya_comprimido():
+        return Response(gzip.compress(TEXTO.encode()), mimetype='text/plain', headers={'Content-Encoding': 'gzip'})
+
+    @app.route('/sin-transformar')
+    def sin_transformar():
+        return Response(TEXTO, mimetype='text/plain', headers={'Cache-Control': 'no-transform'})
+
+    @app.route('/no-encontrado')
+    def no_encontrado():
+        return Response(TEXTO, status=404, mimetype='text/html')
+
+    @app.route('/stream')
+    def stream():
+        def generar():
+            try:
+                for i in range(50):
+                    yield f'<p>fila {i}</p>' * 20
+            finally:
+                cerrados.append(True)
+        return Response(stream_with_context(generar()), mimetype='text/html')
+
+    compresion.init_app(app)
+    yield app.test_client()
+    compresion.COMPRESION.clear()
+    compresion.COMPRESION.update(guardada)
+
+
+def _gzip(cliente, ruta, **kwargs):
+    return cliente.get(ruta, headers={'Accept-Encoding': 'gzip'}, **kwargs)
+
+
+def test_negociar(monkeypatch):
+    monkeypatch.setattr(compresion, 'brotli', None)
+    assert compresion.negociar('gzip, deflate, br') == 'gzip'
+    assert compresion.negociar('br') is None
+    assert compresion.negociar('gzip;q=0') is None
+    assert compresion.negociar('*') == 'gzip'
+    assert compresion.negociar(None) is None
+
+
+def test_comprime_texto_y_ajusta_headers(cliente):
+    respuesta = _gzip(cliente, '/texto')
+    assert respuesta.headers['Content-Encoding'] == 'gzip'
+    assert respuesta.headers['Vary'] == 'Cookie, Accept-Encoding'
+    # El cuerpo cambió: el ETag pasa a ser débil
+    assert respuesta.headers['ETag'] == 'W/"abc"'
+    assert gzip.decompress(respuesta.data).decode() == TEXTO
+    # Sin Accept-Encoding sale tal cual
+    respuesta = cliente.get('/texto')
+    assert 'Content-Encoding' not in respuesta.headers
+    assert respuesta.get_data(as_text=True) == TEXTO
+
+
+@pytest.mark.parametrize('ruta', ['/corto', '/imagen', '/ya-comprimido', '/sin-transformar', '/no-encontrado'])
+def test_respuestas_que_no_se_comprimen(cliente, ruta):
+    # Sale igual que para un cliente que no acepta gzip
+    respuesta, sin_gzip = _gzip(cliente, ruta), cliente.get(ruta)
+    assert respuesta.data == sin_gzip.data
+    assert respuesta.headers.get('Content-Encoding') == sin_gzip.headers.get('Content-Encoding')
+    assert 'Vary' not in respuesta.headers
+
+
+def test_head_no_se_comprime(cliente):
+    respuesta = cliente.head('/texto', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in respuesta.headers
+
+
+def test_desactivada(cliente):
+    compresion.COMPRESION['activa'] = False
+    assert 'Content-Encoding' not in _gzip(cliente, '/texto').headers
+
+
+def test_streaming_por_bloques(cliente):
+    compresion.COMPRESION['bytes_por_envio'] = 1024
+    respuesta = _gzip(cliente, '/stream', buffered=False)
+    bloques = list(respuesta.response)
+    respuesta.close()
+    assert respuesta.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in respuesta.headers
+    # Lo enviado antes del último bloque ya se puede descomprimir: no espera al final de la página
+    descompresor = zlib.decompressobj(31)
+    parcial = b''.join(descompresor.decompress(b) for b in bloques[:-1])
+    assert parcial.startswith(b'<p>fila 0</p>') and len(parcial) >= 1024
+    cuerpo = parcial + descompresor.decompress(bloques[-1]) + descompresor.flush()
+    assert cuerpo.decode() == ''.join(f'<p>fila {i}</p>' * 20 for i in range(50))
+    # Al cerrar la respuesta se cierra el generador original
+    assert cliente.application.cerrados == [True]
+
+
+def test_brotli(cliente):
+    brotli = pytest.importorskip('brotli')
+    respuesta = cliente.get('/texto', headers={'Accept-Encoding': 'gzip, br'})
+    assert respuesta.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(respuesta.data).decode() == TEXTO
@@ -0,0 +1,49 @@
+# tests/test_dashboard_model.py
+
+# Cargador del dashboard /citas/: los mismos planes que el camino consulta por consulta, con una
+# sentencia para los planes y otra para los avatares
+
+from base.config.instrumentacion import sentencias_ejecutadas
+from base.models.dashboard_model import DashboardCitas
+from base.models.tutor_model import DirectorioTutores
+from base.models.travel_plan_model import TravelPlan
+from base.models.usuario_model import Usuario
+from tests.conftest import crear_plan, crear_usuario
+
+
+def test_cargar_con_una_sentencia_para_los_planes(app, db):
+    usuario_id = crear_usuario(db, 1)
+    otro_id = crear_usuario(db, 2, nombre='Luis')
+    propios = [crear_plan(db, usuario_id, destino=f'Propio {i}') for i in range(2)]
+    ajenos = [crear_plan(db, otro_id, destino=f'Ajeno {i}') for i in range(12)]
+    # Uno de los planes propios tiene un participante y el usuario ya se unió a uno ajeno
+    assert TravelPlan.unirse_a_plan(otro_id, propios[0])
+    assert TravelPlan.unirse_a_plan(usuario_id, ajenos[-1])
+    usuario = Usuario.obtener_por_id(usuario_id)
+    # El directorio de tutores se carga una vez por proceso, no en cada dashboard
+    DirectorioTutores.excepto(usuario_id)
+
+    antes = sentencias_ejecutadas()
+    dashboard = DashboardCitas.cargar(usuario_id, usuario=usuario)
+    assert sentencias_ejecutadas() - antes == 2
+    antes = sentencias_ejecutadas()
+    por_separado = DashboardCitas.cargar_por_separado(usuario_id, usuario=usuario)
+    assert sentencias_ejecutadas() - antes == 3
+
+    assert [plan.id for plan in dashboard.mis_asesorias] == propios[::-1]
+    # Los más nuevos primero, sin el plan al que ya se unió, y una página de 10
+    assert [plan.id for plan in dashboard.todas_las_asesorias] == ajenos[-2::-1][:10]
+    assert [plan.id for plan in dashboard.todas_las_asesorias] == \
+        [plan.id for plan in por_separado.todas_las_asesorias]
+    assert dashboard.siguiente_cursor == por_separado.siguiente_cursor is not None
+    assert dashboard.mis_asesorias[1].primeros_participantes == \
+        [{'id': otro_id, 'nombre': 'Luis', 'apellido': 'Garcia'}]
+    assert dashboard.usuario is usuario
+
+
+def test_cargar_sin_planes(app, db):
+    usuario_id = crear_usuario(db, 1)
+    dashboard = DashboardCitas.cargar(usuario_id)
+    assert dashboard.usuario.id == usuario_id
+    assert dashboard.mis_asesorias == dashboard.todas_las_asesorias == []
+    assert dashboard.siguiente_cursor is None
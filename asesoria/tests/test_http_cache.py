@@ -0,0 +1,88 @@
+from base.config.instrumentacion import registro
+from base.models.tutor_model import DirectorioTutores
+from base.models.usuario_model import Usuario
+from tests.conftest import crear_plan, crear_usuario, iniciar_sesion
+
+
+def _pagina(cliente, plan_id, etag=None):
+    cabeceras = {'If-None-Match': etag} if etag else {}
+    return cliente.get(f'/citas/descripcion/{plan_id}', headers=cabeceras)
+
+
+def test_revalidacion_responde_304(cliente, db):
+    autor_id = iniciar_sesion(cliente, db, 1)
+    plan_id = crear_plan(db, autor_id)
+    primera = _pagina(cliente, plan_id)
+    assert primera.status_code == 200 and primera.headers['ETag']
+    assert primera.headers['Cache-Control'] == 'private, no-cache'
+    segunda = _pagina(cliente, plan_id, primera.headers['ETag'])
+    assert segunda.status_code == 304 and segunda.data == b''
+
+
+def test_etag_igual_en_otro_worker(cliente, db):
+    autor_id = iniciar_sesion(cliente, db, 1)
+    plan_id = crear_plan(db, autor_id)
+    etag = _pagina(cliente, plan_id).headers['ETag']
+    # Otro proceso: directorio de tutores recién cargado y usuarios agregados por otro camino
+    DirectorioTutores._datos = None
+    DirectorioTutores.agregar(autor_id, 'Ana', 'Garcia')
+    assert _pagina(cliente, plan_id).headers['ETag'] == etag
+    assert _pagina(cliente, plan_id, etag).status_code == 304
+
+
+def test_cambio_de_tutores_cambia_el_etag(cliente, db):
+    autor_id = iniciar_sesion(cliente, db, 1)
+    plan_id = crear_plan(db, autor_id)
+    tutor_id = crear_usuario(db, 2, nombre='Luis')
+    etag = _pagina(cliente, plan_id).headers['ETag']
+    db.query_db("UPDATE usuarios SET nombre = 'Zoe' WHERE id = %(id)s", {'id': tutor_id})
+    DirectorioTutores.registrar_cambio(db)
+    respuesta = _pagina(cliente, plan_id, etag)
+    assert respuesta.status_code == 200 and respuesta.headers['ETag'] != etag
+    assert b'Zoe Garcia' in respuesta.data
+
+
+def test_registro_cambia_el_etag_sin_recargar_el_directorio(cliente, db):
+    autor_id = iniciar_sesion(cliente, db, 1)
+    plan_id = crear_plan(db, autor_id)
+    etag = _pagina(cliente, plan_id).headers['ETag']
+    cargas = registro.ejecuciones.get('tutores.todos', [0])[0]
+    assert Usuario.guardar_usuario({'nombre': 'zoe', 'apellido': 'rojas', 'email': 'zoe@test.com', 'password': 'x'})
+    respuesta = _pagina(cliente, plan_id, etag)
+    assert respuesta.status_code == 200 and b'Zoe Rojas' in respuesta.data
+    assert registro.ejecuciones.get('tutores.todos', [0])[0] == cargas
+    assert _pagina(cliente, plan_id, respuesta.headers['ETag']).status_code == 304
+
+
+def test_registro_tras_cambios_de_otro_proceso_recarga_el_directorio(cliente, db):
+    autor_id = iniciar_sesion(cliente, db, 1)
+    plan_id = crear_plan(db, autor_id)
+    _pagina(cliente, plan_id)
+    cargas = registro.ejecuciones.get('tutores.todos', [0])[0]
+    # Otro proceso agregó un usuario: este directorio no lo tiene y no puede solo insertar el suyo
+    crear_usuario(db, 2, nombre='Luis')
+    DirectorioTutores.registrar_cambio(db)
+    assert Usuario.guardar_usuario({'nombre': 'zoe', 'apellido': 'rojas', 'email': 'zoe@test.com', 'password': 'x'})
+    respuesta = _pagina(cliente, plan_id)
+    assert b'Zoe Rojas' in respuesta.data and b'Luis Garcia' in respuesta.data
+    assert registro.ejecuciones.get('tutores.todos', [0])[0] == cargas + 1
+
+
+def test_otros_cambios_de_usuarios_no_cambian_el_etag(cliente, db):
+    autor_id = iniciar_sesion(cliente, db, 1)
+    plan_id = crear_plan(db, autor_id)
+    otro_id = crear_usuario(db, 2)
+    etag = _pagina(cliente, plan_id).headers['ETag']
+    db.query_db(Usuario.QUERY_ACTUALIZAR_PASSWORD, {'password': 'y', 'id': otro_id})
+    db.query_db("UPDATE usuarios SET email = 'otro@test.com' WHERE id = %(id)s", {'id': otro_id})
+    assert _pagina(cliente, plan_id, etag).status_code == 304
+
+
+def test_cambio_del_plan_cambia_el_etag(cliente, db):
+    autor_id = iniciar_sesion(cliente, db, 1)
+    plan_id = crear_plan(db, autor_id)
+    etag = _pagina(cliente, plan_id).headers['ETag']
+    participante = crear_usuario(db, 2)
+    db.query_db("INSERT INTO trip_schedules (travel_plan_id, usuario_id) VALUES (%(plan)s, %(usuario)s)",
+                {'plan': plan_id, 'usuario': participante})
+    assert _pagina(cliente, plan_id, etag).status_code == 200
@@ -0,0 +1,49 @@
+# tests/test_instrumentacion.py
+
+# Acceso a /metrics: solo con el token o desde una red permitida
+
+import ipaddress
+import pytest
+from flask import Flask
+from base.config import instrumentacion
+
+EXTERNA = {'REMOTE_ADDR': '203.0.113.5'}
+
+
+def test_anonimo_rechazado(cliente):
+    # Por defecto no hay token ni redes: nadie, ni siquiera localhost
+    for entorno in (EXTERNA, {'REMOTE_ADDR': '127.0.0.1'}):
+        respuesta = cliente.get('/metrics', environ_base=entorno)
+        assert respuesta.status_code == 403
+        assert b'SELECT' not in respuesta.data
+
+
+def test_con_token(cliente, monkeypatch):
+    monkeypatch.setitem(instrumentacion.CONFIG, 'token', 's3creto')
+    assert cliente.get('/metrics', environ_base=EXTERNA).status_code == 403
+    assert cliente.get('/metrics', environ_base=EXTERNA,
+                       headers={'Authorization': 'Bearer otro'}).status_code == 403
+    respuesta = cliente.get('/metrics', environ_base=EXTERNA, headers={'Authorization': 'Bearer s3creto'})
+    assert respuesta.status_code == 200
+    assert b'asesoria_db_query_seconds' in respuesta.data
+
+
+def test_desde_red_permitida(cliente, monkeypatch):
+    monkeypatch.setitem(instrumentacion.CONFIG, 'redes', (ipaddress.ip_network('10.0.0.0/8'),))
+    assert cliente.get('/metrics', environ_base={'REMOTE_ADDR': '10.1.2.3'}).status_code == 200
+    assert cliente.get('/metrics', environ_base=EXTERNA).status_code == 403
+
+
+def test_configuracion_de_redes(monkeypatch):
+    monkeypatch.setattr(instrumentacion, 'CONFIG', dict(instrumentacion.CONFIG))
+    app = Flask(__name__)
+    app.config.update(METRICS_ALLOWED_IPS=['127.0.0.1', '::1', '192.168.0.0/16'], METRICS_TOKEN='')
+    instrumentacion.init_app(app)
+    assert instrumentacion.CONFIG['redes'] == (ipaddress.ip_network('127.0.0.1/32'),
+                                               ipaddress.ip_network('::1/128'),
+                                               ipaddress.ip_network('192.168.0.0/16'))
+    assert instrumentacion.CONFIG['token'] is None
+    mal_escrita = Flask(__name__)
+    mal_escrita.config['METRICS_ALLOWED_IPS'] = ['10.0.0.300/8']
+    with pytest.raises(ValueError):
+        instrumentacion.init_app(mal_escrita)
@@ -0,0 +1,170 @@
+# tests/test_migraciones.py
+
+# Runner de migraciones: orden y checksums de los archivos, índices en línea, repetir migraciones en
+# SQLite y las sentencias que MySQL da por aplicadas (sin servidor: una conexión falsa que devuelve
+# los códigos de error)
+
+import sqlite3
+import pymysql
+import pytest
+from base.config import migraciones, sqliteconnection
+from base.config.migraciones import ErrorMigracion, en_linea, listar, migrar_mysql, migrar_sqlite
+
+
+def _escribir(carpeta, nombre, contenido, newline=None):
+    with open(carpeta / nombre, 'w', encoding='utf-8', newline=newline) as archivo:
+        archivo.write(contenido)
+
+
+def test_listar_ordena_por_version_y_rechaza_duplicadas(tmp_path):
+    _escribir(tmp_path, '0002_b.sql', 'SELECT 2;')
+    _escribir(tmp_path, '0001_a.sql', 'SELECT 1;')
+    _escribir(tmp_path, 'notas.sql', 'SELECT 0;')
+    assert [str(m) for m in listar(str(tmp_path))] == ['0001_a', '0002_b']
+    _escribir(tmp_path, '0002_c.sql', 'SELECT 3;')
+    with pytest.raises(ErrorMigracion):
+        listar(str(tmp_path))
+
+
+def test_checksum_sin_finales_de_linea_y_modificadas(tmp_path):
+    _escribir(tmp_path, '0001_a.sql', 'SELECT 1;\nSELECT 2;\n', newline='\n')
+    lf = listar(str(tmp_path))[0].checksum
+    _escribir(tmp_path, '0001_a.sql', 'SELECT 1;\nSELECT 2;\n', newline='\r\n')
+    assert listar(str(tmp_path))[0].checksum == lf
+    assert migraciones.modificadas({1: lf}, str(tmp_path)) == []
+    assert [m.version for m in migraciones.modificadas({1: 'otro'}, str(tmp_path))] == [1]
+    assert migraciones.pendientes({}, hasta=0, carpeta=str(tmp_path)) == []
+
+
+def test_en_linea():
+    assert en_linea("ALTER TABLE t ADD INDEX i (a)") == "ALTER TABLE t ADD INDEX i (a),\n  ALGORITHM = INPLACE, LOCK = NONE"
+    assert en_linea("CREATE UNIQUE INDEX i ON t (a)") == "CREATE UNIQUE INDEX i ON t (a) ALGORITHM = INPLACE LOCK = NONE"
+    assert en_linea("ALTER TABLE t ADD INDEX i (a), ALGORITHM = COPY") == "ALTER TABLE t ADD INDEX i (a), ALGORITHM = COPY"
+    assert en_linea("ALTER TABLE t ADD COLUMN a INT") == "ALTER TABLE t ADD COLUMN a INT"
+
+
+def test_cada_alter_table_hace_un_solo_cambio():
+    # Si una parte ya estaba aplicada MySQL descarta la sentencia entera y el runner la omite
+    for migracion in listar():
+        for sentencia in sqliteconnection.sentencias(migracion.sql):
+            if not sentencia.upper().startswith('ALTER TABLE'):
+                continue
+            cuerpo = sentencia.split(None, 3)[3]
+            cambios = [p for p in sqliteconnection._partir(cuerpo) if not p.upper().startswith(('ALGORITHM', 'LOCK'))]
+            assert len(cambios) == 1, f"{migracion}: {sentencia}"
+
+
+# ---------------------------------------------------------------------------------------------------
+# SQLite
+# ---------------------------------------------------------------------------------------------------
+
+def _indices(ruta, tabla):
+    conexion = sqlite3.connect(ruta)
+    try:
+        return {fila[1] for fila in conexion.execute(f"PRAGMA index_list({tabla})")}
+    finally:
+        conexion.close()
+
+
+def _tablas(ruta):
+    conexion = sqlite3.connect(ruta)
+    try:
+        return {fila[0] for fila in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conexion.close()
+
+
+def test_migrar_sqlite_se_puede_repetir(tmp_path):
+    ruta = str(tmp_path / 'db.sqlite3')
+    assert migrar_sqlite(ruta, hasta=3) == listar()[:3]
+    hechas = migrar_sqlite(ruta)
+    assert [m.version for m in hechas] == [m.version for m in listar()[3:]]
+    assert migrar_sqlite(ruta) == []
+    aplicadas = migraciones.estado_sqlite(ruta)
+    assert aplicadas == {m.version: m.checksum for m in listar()}
+    assert {'uq_travel_plans_legacy_cita', 'idx_travel_plans_autor_creado'} <= _indices(ruta, 'travel_plans')
+
+
+def test_migracion_cortada_a_la_mitad(tmp_path):
+    ruta = str(tmp_path / 'db.sqlite3')
+    migrar_sqlite(ruta, hasta=4)
+    # La columna de 0005 ya existe (p. ej. una base de datos arreglada a mano): se omite y se sigue
+    conexion = sqliteconnection.ConexionSQLite(ruta)
+    conexion._conn.execute("ALTER TABLE travel_plans ADD COLUMN legacy_cita_id INTEGER NULL")
+    conexion.close()
+    mensajes = []
+    migrar_sqlite(ruta, hasta=5, eco=mensajes.append)
+    assert mensajes == ['Aplicada 0005_backfill_travel_plans (1 sentencia(s) ya estaban hechas)']
+    assert 'uq_travel_plans_legacy_cita' in _indices(ruta, 'travel_plans')
+
+
+def test_una_migracion_que_falla_no_queda_a_medias(tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'db.sqlite3')
+    _escribir(tmp_path, '0001_rota.sql', "CREATE TABLE t (id INT NOT NULL);\nALTER TABLE no_existe ADD COLUMN a INT;")
+    monkeypatch.setattr(migraciones, 'pendientes', lambda aplicadas, hasta: [
+        m for m in listar(str(tmp_path)) if m.version not in aplicadas])
+    with pytest.raises(ErrorMigracion):
+        migrar_sqlite(ruta)
+    assert 't' not in _tablas(ruta)
+    assert migraciones.estado_sqlite(ruta) == {}
+
+
+# ---------------------------------------------------------------------------------------------------
+# MySQL (conexión falsa)
+# ---------------------------------------------------------------------------------------------------
+
+class ServidorFalso:
+    """Ejecuta todo sin errores salvo las sentencias que contienen un fragmento de 'errores'."""
+
+    def __init__(self, errores):
+        self.errores = errores
+        self.ejecutadas = []
+
+    def connect(self, **kwargs):
+        return self
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, sql, data=None):
+        for fragmento, codigo in self.errores.items():
+            if fragmento in sql:
+                raise pymysql.err.OperationalError(codigo, f"Error {codigo}")
+        self.ejecutadas.append(sql)
+
+    def fetchone(self):
+        return {'obtenido': 1}
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+def test_mysql_omite_lo_ya_aplicado_sin_perder_el_resto(monkeypatch):
+    # legacy_cita_id ya existía: el índice único de 0005 se crea de todos modos
+    servidor = ServidorFalso({'ADD COLUMN legacy_cita_id': 1060})
+    monkeypatch.setattr(migraciones.pymysql, 'connect', servidor.connect)
+    mensajes = []
+    hechas = migrar_mysql({}, 'pruebas', eco=mensajes.append)
+    assert hechas == listar()
+    assert any('ADD UNIQUE INDEX uq_travel_plans_legacy_cita' in sql for sql in servidor.ejecutadas)
+    assert 'Aplicada 0005_backfill_travel_plans (1 sentencia(s) ya estaban hechas)' in mensajes
+    registradas = [sql for sql in servidor.ejecutadas if sql.startswith('INSERT INTO schema_migraciones')]
+    assert len(registradas) == len(listar())
+
+
+def test_mysql_otro_error_detiene_la_migracion(monkeypatch):
+    servidor = ServidorFalso({'ADD COLUMN edad': 1064})
+    monkeypatch.setattr(migraciones.pymysql, 'connect', servidor.connect)
+    with pytest.raises(ErrorMigracion, match='0002_usuarios_edad'):
+        migrar_mysql({}, 'pruebas', eco=lambda mensaje: None)
+    # Solo quedó registrada la 0001
+    assert len([sql for sql in servidor.ejecutadas if sql.startswith('INSERT INTO schema_migraciones')]) == 1
@@ -0,0 +1,21 @@
+from pymysql.constants import CLIENT
+from base.config import mysqlconnection
+from base.config.mysqlconnection import ConnectionPool
+from tests.conftest import crear_usuario
+
+
+def test_pool_abre_conexiones_de_una_sola_sentencia(monkeypatch):
+    argumentos = {}
+
+    def conectar(**kwargs):
+        argumentos.update(kwargs)
+        return object()
+    monkeypatch.setattr(mysqlconnection.pymysql, 'connect', conectar)
+    ConnectionPool('proyecto_crud')._conectar()
+    assert not argumentos.get('client_flag', 0) & CLIENT.MULTI_STATEMENTS
+
+
+def test_no_acepta_sentencias_encadenadas(db):
+    crear_usuario(db, 1)
+    assert db.query_db("SELECT 1 AS uno; DELETE FROM usuarios") is False
+    assert db.query_db("SELECT COUNT(*) AS n FROM usuarios")[0]['n'] == 1
@@ -0,0 +1,60 @@
+import pytest
+from flask import get_flashed_messages
+from base.config import seguridad
+from base.config.seguridad import BcryptOcupado, configurar_bcrypt, hash_password, verificar_password
+from base.models.usuario_model import MENSAJE_OCUPADO
+
+
+@pytest.fixture
+def bcrypt_saturado(app):
+    # Un solo turno, ya ocupado por otro hash
+    configurar_bcrypt(rounds=4, hilos=1, tiempo_espera=0.01)
+    seguridad._turnos.acquire()
+    yield
+    seguridad._turnos.release()
+
+
+def test_hash_y_verificacion(app):
+    password_hash = hash_password('Secreta123')
+    assert verificar_password('Secreta123', password_hash)
+    assert not verificar_password('Otra123', password_hash)
+    assert not verificar_password('Secreta123', 'no es un hash')
+
+
+def test_sin_turno_lanza_bcrypt_ocupado(bcrypt_saturado):
+    with pytest.raises(BcryptOcupado):
+        hash_password('Secreta123')
+
+
+def test_tope_relativo_a_los_hilos_del_servidor(monkeypatch):
+    monkeypatch.setattr(seguridad.os, 'cpu_count', lambda: 4)
+    assert seguridad.hilos_por_defecto(8) == 4
+    assert seguridad.hilos_por_defecto(4) == 2
+    assert seguridad.hilos_por_defecto(1) == 1
+
+
+def test_login_sin_turno_pide_intentar_de_nuevo(app, db):
+    db.query_db("""
+        INSERT INTO usuarios (nombre, apellido, email, password)
+        VALUES ('Ana', 'Garcia', 'ana@test.com', %(password)s);
+    """, {'password': hash_password('Secreta123')})
+    cliente = app.test_client()
+    configurar_bcrypt(rounds=4, hilos=1, tiempo_espera=0.01)
+    seguridad._turnos.acquire()
+    try:
+        with cliente:
+            respuesta = cliente.post('/usuarios/procesar_login',
+                                     data={'email': 'ana@test.com', 'password': 'Secreta123'})
+            assert respuesta.status_code == 302
+            assert get_flashed_messages() == [MENSAJE_OCUPADO]
+    finally:
+        seguridad._turnos.release()
+
+
+def test_registro_sin_turno_pide_intentar_de_nuevo(cliente, bcrypt_saturado):
+    with cliente:
+        respuesta = cliente.post('/usuarios/procesar_registro', data={
+            'nombre': 'Ana', 'apellido': 'Garcia', 'email': 'ana@test.com', 'password': 'Secreta123',
+            'confirm_password': 'Secreta123'})
+        assert respuesta.status_code == 302
+        assert get_flashed_messages() == [MENSAJE_OCUPADO]
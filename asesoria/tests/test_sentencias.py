@@ -0,0 +1,77 @@
+# tests/test_sentencias.py
+
+# Registro de sentencias: la clasificación y la validación al declararlas, y que todas las sentencias
+# de los modelos compilen en SQLite con el esquema de las migraciones
+
+import importlib
+import pkgutil
+import pytest
+import base.models
+from base.config import sentencias, sqliteconnection
+from base.config.migraciones import migrar_sqlite
+from base.config.sentencias import ESCRITURA, INSERCION, LECTURA, Sentencia, sentencia
+
+
+@pytest.fixture
+def registro(monkeypatch):
+    """Registro vacío: las sentencias de prueba no quedan junto a las de los modelos."""
+    monkeypatch.setattr(sentencias, 'REGISTRO', {})
+    return sentencias.REGISTRO
+
+
+def test_clasificacion():
+    lectura = Sentencia('p.lectura', "  with t AS (SELECT 1) SELECT * FROM t WHERE id = %(id)s", LECTURA, ('id',))
+    assert lectura.es_select and not lectura.es_insert
+    insercion = Sentencia('p.insercion', "REPLACE INTO t (a) VALUES (%(a)s)", INSERCION, ('a',))
+    assert insercion.es_insert and not insercion.es_select
+    escritura = Sentencia('p.escritura', "INSERT INTO t (a) SELECT a FROM u", ESCRITURA)
+    assert not escritura.es_select and not escritura.es_insert
+    # Es un str: se pasa tal cual a query_db
+    assert escritura == "INSERT INTO t (a) SELECT a FROM u"
+    assert lectura.normalizada == "with t AS (SELECT ?) SELECT * FROM t WHERE id = ?"
+
+
+@pytest.mark.parametrize('sql, tipo, parametros, cachear', [
+    ("UPDATE t SET a = 1", LECTURA, (), False),
+    ("SELECT * FROM t", ESCRITURA, (), False),
+    ("UPDATE t SET a = 1", INSERCION, (), False),
+    ("SELECT * FROM t", 'otro', (), False),
+    ("SELECT * FROM t WHERE id = %(id)s", LECTURA, ('ID',), False),
+    ("SELECT * FROM t WHERE id = %(id)s", LECTURA, ('id', 'sobra'), False),
+    ("DELETE FROM t", ESCRITURA, (), True),
+])
+def test_declaraciones_invalidas(sql, tipo, parametros, cachear):
+    with pytest.raises(ValueError, match='p.mala'):
+        Sentencia('p.mala', sql, tipo, parametros, cachear)
+
+
+def test_nombres_unicos(registro):
+    primera = sentencia('p.una', "SELECT * FROM t", LECTURA)
+    # Volver a declarar la misma (p. ej. al recargar el módulo) no es un error
+    assert sentencia('p.una', "SELECT * FROM t", LECTURA) == primera
+    with pytest.raises(ValueError, match='p.una'):
+        sentencia('p.una', "SELECT * FROM u", LECTURA)
+    assert list(registro) == ['p.una']
+
+
+def test_sentencias_de_los_modelos_compilan_en_sqlite(tmp_path):
+    for modulo in pkgutil.iter_modules(base.models.__path__):
+        importlib.import_module(f'base.models.{modulo.name}')
+    assert sentencias.REGISTRO
+    ruta = str(tmp_path / 'db.sqlite3')
+    migrar_sqlite(ruta)
+    conexion = sqliteconnection.ConexionSQLite(ruta)
+    try:
+        for nombre, declarada in sentencias.REGISTRO.items():
+            if declarada.parametros:
+                # IN %(ids)s recibe una tupla; el resto, un valor cualquiera
+                datos = {p: (None,) if f'IN %({p})s' in declarada else None for p in declarada.parametros}
+            else:
+                datos = (None,) * declarada.count('%s') or None
+            with conexion.cursor() as cursor:
+                try:
+                    cursor.execute('EXPLAIN ' + declarada, datos)
+                except Exception as e:
+                    pytest.fail(f"{nombre}: {e}")
+    finally:
+        conexion.close()
@@ -0,0 +1,212 @@
+# tests/test_sqliteconnection.py
+
+# Traducción de sentencias MySQL -> SQLite y emulación de ON UPDATE CURRENT_TIMESTAMP. Las pruebas de
+# ON UPDATE se ejecutan en los dos motores: en MySQL solo si hay un servidor con la configuración de
+# DB_CONFIG (si no, se omiten), sobre una base de datos temporal creada con las migraciones.
+
+import pymysql
+import pytest
+from base.config import migraciones, sqliteconnection
+from base.config.mysqlconnection import DB_CONFIG
+from base.config.sqliteconnection import ConexionSQLite, traducir, traducir_ddl
+from base.models.cita_model import Citas
+from base.models.travel_plan_model import TravelPlan
+from base.models.usuario_model import Usuario
+
+DB_PRUEBAS = 'asesoria_pruebas'
+ANTES = '2000-01-01 00:00:00'
+SIN_ECO = lambda mensaje: None  # noqa: E731
+
+
+def test_parametros_con_nombre_y_posicionales():
+    assert traducir("SELECT * FROM t WHERE a = %(a)s AND b = %(b)s") == "SELECT * FROM t WHERE a = :a AND b = :b"
+    assert traducir("SELECT * FROM t WHERE a = %s AND b = %s") == "SELECT * FROM t WHERE a = ?1 AND b = ?2"
+    # '%%' es un '%' escapado solo si la consulta lleva parámetros; las cadenas no se tocan
+    assert traducir("SELECT '%%(a)s' LIKE '%%x'") == "SELECT '%(a)s' LIKE '%x'"
+    assert traducir("SELECT '100%%'", con_parametros=False) == "SELECT '100%%'"
+
+
+def test_funciones_y_clausulas_de_mysql():
+    assert traducir("INSERT IGNORE INTO t (a) VALUES (%(a)s)") == "INSERT OR IGNORE INTO t (a) VALUES (:a)"
+    assert traducir("SELECT CONCAT(a, ' ', CONCAT(b, c)) FROM t") == "SELECT (a || ' ' || (b || c)) FROM t"
+    assert traducir("SELECT * FROM t LIMIT %(desde)s, %(cuantos)s") == "SELECT * FROM t LIMIT :cuantos OFFSET :desde"
+    assert traducir("SELECT * FROM t WHERE id = 1 FOR UPDATE") == "SELECT * FROM t WHERE id = 1"
+    assert traducir("SELECT NOW(), CURDATE()") == "SELECT datetime('now', 'localtime'), date('now', 'localtime')"
+
+
+def test_on_duplicate_key_update():
+    assert traducir("INSERT INTO t (a, b) VALUES (1, 2) ON DUPLICATE KEY UPDATE b = VALUES(b);") == \
+        "INSERT INTO t (a, b) VALUES (1, 2) ON CONFLICT DO UPDATE SET b = excluded.b;"
+    assert traducir("INSERT INTO t (a) VALUES (1) ON DUPLICATE KEY UPDATE a = a") == \
+        "INSERT INTO t (a) VALUES (1) ON CONFLICT DO NOTHING"
+
+
+def test_update_agrega_la_columna_on_update():
+    al_actualizar = (('t', 'actualizado_en'),)
+    sql = traducir("UPDATE t SET a = %s, b = (SELECT MAX(x) FROM u WHERE u.t = t.id) WHERE id = %s;",
+                   True, al_actualizar)
+    assert sql == ("UPDATE t SET a = ?1, b = (SELECT MAX(x) FROM u WHERE u.t = t.id), actualizado_en = CASE "
+                   "WHEN a IS NOT (?1) COLLATE BINARY OR b IS NOT ((SELECT MAX(x) FROM u WHERE u.t = t.id)) "
+                   "COLLATE BINARY THEN datetime('now', 'localtime') ELSE actualizado_en END WHERE id = ?2;")
+    # Asignada a mano (también "col = col") o de otra tabla: sin cambios
+    assert traducir("UPDATE t SET a = 1, actualizado_en = actualizado_en", True, al_actualizar) == \
+        "UPDATE t SET a = 1, actualizado_en = actualizado_en"
+    assert traducir("UPDATE otra SET a = 1", True, al_actualizar) == "UPDATE otra SET a = 1"
+
+
+def test_ddl_registra_las_columnas_on_update():
+    script = """
+        CREATE TABLE IF NOT EXISTS `t` (
+          `id` INT NOT NULL AUTO_INCREMENT,
+          `nombre` VARCHAR(45) NOT NULL,
+          `actualizado_en` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+          PRIMARY KEY (`id`),
+          UNIQUE INDEX `nombre` (`nombre` ASC) VISIBLE)
+        ENGINE = InnoDB;
+        ALTER TABLE t ADD COLUMN revisado_en DATETIME NULL ON UPDATE CURRENT_TIMESTAMP, ALGORITHM = INPLACE;
+        ALTER TABLE t DROP COLUMN revisado_en;
+    """
+    sentencias = traducir_ddl(script)
+    assert sentencias[0].startswith("CREATE TABLE IF NOT EXISTS t (\n  id INTEGER PRIMARY KEY AUTOINCREMENT")
+    assert "DEFAULT (datetime('now', 'localtime'))" in sentencias[0] and 'ON UPDATE' not in sentencias[0]
+    assert "CREATE UNIQUE INDEX IF NOT EXISTS nombre ON t (`nombre` ASC)" in sentencias
+    assert "INSERT OR IGNORE INTO schema_al_actualizar (tabla, columna) VALUES ('t', 'actualizado_en')" in sentencias
+    assert "INSERT OR IGNORE INTO schema_al_actualizar (tabla, columna) VALUES ('t', 'revisado_en')" in sentencias
+    assert "DELETE FROM schema_al_actualizar WHERE tabla = 't' AND columna = 'revisado_en'" in sentencias
+    assert not any('TRIGGER' in s for s in sentencias)
+
+
+def test_los_disparadores_antiguos_se_cambian_por_el_registro(tmp_path):
+    ruta = str(tmp_path / 'antigua.sqlite3')
+    conexion = ConexionSQLite(ruta)
+    conexion._conn.executescript("""
+        CREATE TABLE t (id INTEGER PRIMARY KEY, a TEXT, actualizado_en DATETIME);
+        CREATE TRIGGER t_actualizado_en_al_actualizar AFTER UPDATE ON t FOR EACH ROW
+        WHEN NEW.actualizado_en IS OLD.actualizado_en AND (NEW.a IS NOT OLD.a) BEGIN
+        UPDATE t SET actualizado_en = datetime('now', 'localtime') WHERE rowid = NEW.rowid; END;
+    """)
+    conexion.close()
+    migraciones.migrar_sqlite(ruta)
+    conexion = ConexionSQLite(ruta)
+    try:
+        assert conexion._conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall() == []
+        assert ('t', 'actualizado_en') in conexion.al_actualizar()
+    finally:
+        conexion.close()
+
+
+# ---------------------------------------------------------------------------------------------------
+# ON UPDATE CURRENT_TIMESTAMP en los dos motores
+# ---------------------------------------------------------------------------------------------------
+
+def _mysql():
+    try:
+        conexion = pymysql.connect(cursorclass=pymysql.cursors.DictCursor, autocommit=True, connect_timeout=2,
+                                   **DB_CONFIG)
+    except pymysql.MySQLError:
+        pytest.skip("No hay un servidor MySQL con la configuración de DB_CONFIG")
+    with conexion.cursor() as cursor:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{DB_PRUEBAS}`")
+    conexion.close()
+    migraciones.migrar_mysql(DB_CONFIG, DB_PRUEBAS, eco=SIN_ECO)
+    return pymysql.connect(cursorclass=pymysql.cursors.DictCursor, autocommit=True, database=DB_PRUEBAS,
+                           **DB_CONFIG)
+
+
+@pytest.fixture(params=['sqlite', 'mysql'])
+def conexion(request, tmp_path):
+    if request.param == 'mysql':
+        conexion = _mysql()
+    else:
+        ruta = str(tmp_path / 'pruebas.sqlite3')
+        migraciones.migrar_sqlite(ruta)
+        conexion = ConexionSQLite(ruta)
+    yield conexion
+    if request.param == 'mysql':
+        with conexion.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{DB_PRUEBAS}`")
+    conexion.close()
+
+
+def _ejecutar(conexion, query, data=None):
+    with conexion.cursor() as cursor:
+        cursor.execute(str(query), data)
+        return cursor.lastrowid
+
+
+def _fila(conexion, tabla, fila_id):
+    with conexion.cursor() as cursor:
+        cursor.execute(f"SELECT * FROM {tabla} WHERE id = %(id)s", {'id': fila_id})
+        return cursor.fetchone()
+
+
+def _se_actualizo(conexion, tabla, fila_id, query, data):
+    """Ejecuta la sentencia sobre una fila con actualizado_en antiguo y dice si lo cambió."""
+    _ejecutar(conexion, f"UPDATE {tabla} SET actualizado_en = %(antes)s WHERE id = %(id)s",
+              {'antes': ANTES, 'id': fila_id})
+    _ejecutar(conexion, query, data)
+    return str(_fila(conexion, tabla, fila_id)['actualizado_en']) != ANTES
+
+
+@pytest.fixture
+def datos(conexion):
+    autor_id = _ejecutar(conexion, "INSERT INTO usuarios (nombre, apellido, email, password) "
+                                   "VALUES ('Ana', 'Garcia', 'ana@test.com', 'x')")
+    otro_id = _ejecutar(conexion, "INSERT INTO usuarios (nombre, apellido, email, password) "
+                                  "VALUES ('Luis', 'Perez', 'luis@test.com', 'x')")
+    plan_id = _ejecutar(conexion, """
+        INSERT INTO travel_plans (destination, description, travel_start_date, travel_end_date, plan, autor_id)
+        VALUES ('Python', '', '2030-01-01', '2030-01-02', 'Repaso', %(autor_id)s)
+    """, {'autor_id': autor_id})
+    return {'autor_id': autor_id, 'otro_id': otro_id, 'plan_id': plan_id}
+
+
+def test_sentencias_que_conservan_actualizado_en(conexion, datos):
+    plan_id = datos['plan_id']
+    assert not _se_actualizo(conexion, 'travel_plans', plan_id, TravelPlan.QUERY_SUMAR_PARTICIPANTE,
+                             {'cambio': 1, 'plan_id': plan_id, 'usuario_id': datos['otro_id']})
+    assert _fila(conexion, 'travel_plans', plan_id)['participantes_count'] == 1
+    assert not _se_actualizo(conexion, 'travel_plans', plan_id, TravelPlan.QUERY_RECONTAR, {'ids': (plan_id,)})
+    assert _fila(conexion, 'travel_plans', plan_id)['participantes_count'] == 0
+    assert not _se_actualizo(conexion, 'usuarios', datos['autor_id'], Usuario.QUERY_ACTUALIZAR_PASSWORD,
+                             {'password': 'nuevo', 'id': datos['autor_id']})
+    assert _fila(conexion, 'usuarios', datos['autor_id'])['password'] == 'nuevo'
+
+
+def test_sentencias_que_actualizan_actualizado_en(conexion, datos):
+    plan_id = datos['plan_id']
+    cambios = {'destination': 'Python', 'travel_start_date': '2030-01-01', 'travel_end_date': '2030-01-02',
+               'plan': 'Repaso', 'id': plan_id}
+    # Los mismos valores no cambian la fila: como en MySQL, actualizado_en tampoco
+    assert not _se_actualizo(conexion, 'travel_plans', plan_id, TravelPlan.QUERY_ACTUALIZAR, cambios)
+    assert _se_actualizo(conexion, 'travel_plans', plan_id, TravelPlan.QUERY_ACTUALIZAR,
+                         dict(cambios, plan='Repaso final'))
+    # Solo cambian las mayúsculas: también es un cambio
+    assert _se_actualizo(conexion, 'travel_plans', plan_id, TravelPlan.QUERY_ACTUALIZAR,
+                         dict(cambios, plan='REPASO FINAL'))
+    # participantes_count se agregó después de crear la tabla (migración 0007)
+    assert _se_actualizo(conexion, 'travel_plans', plan_id,
+                         "UPDATE travel_plans SET participantes_count = %(n)s WHERE id = %(id)s",
+                         {'n': 3, 'id': plan_id})
+    cita_id = _ejecutar(conexion, "INSERT INTO citas (cita, autor_id) VALUES ('Hola', %(autor_id)s)",
+                        {'autor_id': datos['autor_id']})
+    assert _se_actualizo(conexion, 'citas', cita_id, Citas.QUERY_ACTUALIZAR, {'cita': 'Adiós', 'id': cita_id})
+    # Parámetros posicionales: la expresión del SET se repite con el mismo número
+    assert _se_actualizo(conexion, 'citas', cita_id, "UPDATE citas SET cita = %s WHERE id = %s", ('Otra', cita_id))
+
+
+def test_la_traduccion_ve_las_columnas_que_agrega_otra_conexion(tmp_path):
+    ruta = str(tmp_path / 'pruebas.sqlite3')
+    migraciones.migrar_sqlite(ruta)
+    conexion = ConexionSQLite(ruta)
+    otra = ConexionSQLite(ruta)
+    try:
+        conexion.al_actualizar()
+        otra.begin()
+        sqliteconnection.ejecutar_ddl(otra, "ALTER TABLE citas ADD COLUMN revisada_en DATETIME NULL "
+                                            "ON UPDATE CURRENT_TIMESTAMP")
+        otra.commit()
+        assert ('citas', 'revisada_en') in conexion.al_actualizar()
+    finally:
+        conexion.close()
+        otra.close()